@@ -0,0 +1,291 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import importlib
+import resource
+import tempfile
+import multiprocessing
+from typing import Any, Dict, List, Optional, Sequence
+
+from synthetic import generate
+
+# Implementations of each question, as "module:function"
+VARIANTS = {
+    "q1": {
+        "baseline": "q1_baseline:q1_baseline",
+        "time": "q1_time:q1_time",
+        "memory": "q1_memory:q1_memory",
+        "numpy": "q1_numpy:q1_numpy",
+        "parallel": "parallel:q1_parallel",
+    },
+    "q2": {
+        "baseline": "q2_baseline:q2_baseline",
+        "time": "q2_time:q2_time",
+        "memory": "q2_memory:q2_memory",
+        "parallel": "parallel:q2_parallel",
+    },
+    "q3": {
+        "baseline": "q3_baseline:q3_baseline",
+        "time": "q3_time:q3_time",
+        "memory": "q3_memory:q3_memory",
+        "parallel": "parallel:q3_parallel",
+    },
+}
+
+# Variant whose result the others are checked against. q2_baseline splits
+# emoji sequences (flags, ZWJ sequences) into code points, so q2 is checked
+# against the sequence-aware tokenizer instead, and a q2_baseline mismatch is
+# reported but does not make the run inconsistent.
+REFERENCE = {"q1": "baseline", "q2": "time", "q3": "baseline"}
+KNOWN_DIFFERENCES = {("q2", "baseline")}
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def _load(spec: str):
+    module, function = spec.split(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def _measure(spec: str, file_path: str, connection) -> None:
+    """
+    Child process entry point: run one variant and send back its result
+    and resource usage.
+    """
+    try:
+        function = _load(spec)
+        devnull = open(os.devnull, "w")
+        stdout, sys.stdout = sys.stdout, devnull  # Silence progress output
+        try:
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            result = function(file_path)
+            cpu = time.process_time() - cpu
+            wall = time.perf_counter() - wall
+        finally:
+            sys.stdout = stdout
+            devnull.close()
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self_usage = resource.getrusage(resource.RUSAGE_SELF)
+        connection.send(
+            {
+                "result": result,
+                "wall_s": wall,
+                "cpu_s": cpu + children.ru_utime + children.ru_stime,
+                "peak_rss_mb": max(self_usage.ru_maxrss, children.ru_maxrss)
+                * RSS_UNIT
+                / (1024 * 1024),
+            }
+        )
+    except BaseException as error:
+        connection.send({"error": f"{type(error).__name__}: {error}"})
+    finally:
+        connection.close()
+
+
+def measure(spec: str, file_path: str) -> Dict[str, Any]:
+    """
+    Run a variant in a fresh process, so its peak RSS is not affected by the
+    benchmark itself or by previous runs.
+
+    :param spec: The variant as "module:function".
+    :param file_path: Input file.
+    :return: The result with wall time, CPU time and peak RSS, or an error.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure, args=(spec, file_path, sender))
+    process.start()
+    sender.close()
+    try:
+        measurement = receiver.recv()
+    except EOFError:
+        measurement = {"error": "worker exited without a result"}
+    process.join()
+    return measurement
+
+
+def _comparable(result: Any) -> Any:
+    # Results are lists of tuples; JSON round-trips dates and tuples uniformly
+    return json.loads(json.dumps(result, default=str))
+
+
+def count_lines(file_path: str) -> int:
+    count = 0
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            count += block.count(b"\n")
+    return count
+
+
+def run_benchmark(
+    file_path: str,
+    questions: Optional[Sequence[str]] = None,
+    variants: Optional[Sequence[str]] = None,
+    repeat: int = 1,
+) -> Dict[str, Any]:
+    """
+    Measure every variant of the selected questions on a file and check that
+    they return the same result as the reference variant (see REFERENCE).
+
+    :param file_path: Input file.
+    :param questions: Questions to run (default is all).
+    :param variants: Variant names to run (default is all).
+    :param repeat: Runs per variant; the fastest run is reported.
+    :return: The report as a dictionary.
+    """
+    size = os.path.getsize(file_path)
+    lines = count_lines(file_path)
+    rows = []
+    consistent = True
+
+    for question in questions or VARIANTS:
+        results = {}
+        question_rows = []
+        for variant, spec in VARIANTS[question].items():
+            if variants and variant not in variants:
+                continue
+            runs = [measure(spec, file_path) for _ in range(max(1, repeat))]
+            errors = [run["error"] for run in runs if "error" in run]
+            row = {"question": question, "variant": variant}
+            question_rows.append(row)
+            if errors:
+                row["error"] = errors[0]
+                consistent = False
+                continue
+
+            best = min(runs, key=lambda run: run["wall_s"])
+            results[variant] = _comparable(best["result"])
+            row.update(
+                wall_s=round(best["wall_s"], 4),
+                cpu_s=round(best["cpu_s"], 4),
+                peak_rss_mb=round(max(run["peak_rss_mb"] for run in runs), 1),
+                tweets_per_s=round(lines / best["wall_s"]) if best["wall_s"] else None,
+                mb_per_s=round(size / (1024 * 1024) / best["wall_s"], 2)
+                if best["wall_s"]
+                else None,
+                result=results[variant],
+            )
+
+        # Fall back to the first successful variant if the reference was not run
+        reference = REFERENCE[question]
+        if reference not in results and results:
+            reference = next(iter(results))
+        for row in question_rows:
+            if row["variant"] in results:
+                matches = results[row["variant"]] == results[reference]
+                row["matches_reference"] = matches
+                if (question, row["variant"]) not in KNOWN_DIFFERENCES:
+                    consistent = consistent and matches
+        rows.extend(question_rows)
+
+    return {
+        "file": os.path.abspath(file_path),
+        "size_bytes": size,
+        "lines": lines,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "consistent": consistent,
+        "runs": rows,
+    }
+
+
+def to_markdown(report: Dict[str, Any]) -> str:
+    """Render a benchmark report as a markdown table."""
+    out = [
+        f"# Benchmark: {os.path.basename(report['file'])}",
+        "",
+        f"{report['lines']} lines, {report['size_bytes'] / (1024 * 1024):.1f} MB, "
+        f"Python {report['python']}, {report['cpus']} CPUs",
+        "",
+        "| Question | Variant | Wall (s) | CPU (s) | Peak RSS (MB) "
+        "| Tweets/s | MB/s | Matches |",
+        "|---|---|---:|---:|---:|---:|---:|---|",
+    ]
+    for row in report["runs"]:
+        if "error" in row:
+            out.append(
+                f"| {row['question']} | {row['variant']} | error: {row['error']} "
+                "| | | | | |"
+            )
+            continue
+        out.append(
+            f"| {row['question']} | {row['variant']} | {row['wall_s']:.3f} "
+            f"| {row['cpu_s']:.3f} | {row['peak_rss_mb']:.1f} "
+            f"| {row['tweets_per_s']} | {row['mb_per_s']} "
+            f"| {'yes' if row['matches_reference'] else 'NO'} |"
+        )
+    out.append("")
+    out.append(
+        "All variants agree."
+        if report["consistent"]
+        else "**Some variants disagree with the reference variant.**"
+    )
+    return "\n".join(out) + "\n"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the q1/q2/q3 implementations on a tweet file."
+    )
+    parser.add_argument("--input", help="existing tweet file (default: generate one)")
+    parser.add_argument("--tweets", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--date-skew", type=float, default=1.0)
+    parser.add_argument("--user-skew", type=float, default=1.1)
+    parser.add_argument("--emoji-density", type=float, default=0.5)
+    parser.add_argument("--mention-density", type=float, default=0.3)
+    parser.add_argument("--malformed-rate", type=float, default=0.001)
+    parser.add_argument("--questions", nargs="+", choices=sorted(VARIANTS))
+    parser.add_argument("--variants", nargs="+")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--output", default="benchmark", help="report path prefix (.json and .md)"
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        file_path = args.input
+        if file_path is None:
+            file_path = generate(
+                os.path.join(workdir, "tweets.json"),
+                args.tweets,
+                seed=args.seed,
+                days=args.days,
+                users=args.users,
+                date_skew=args.date_skew,
+                user_skew=args.user_skew,
+                emoji_density=args.emoji_density,
+                mention_density=args.mention_density,
+                malformed_rate=args.malformed_rate,
+            )
+        report = run_benchmark(file_path, args.questions, args.variants, args.repeat)
+        if args.input is None:
+            report["generator"] = {
+                key: getattr(args, key)
+                for key in (
+                    "tweets", "seed", "days", "users", "date_skew", "user_skew",
+                    "emoji_density", "mention_density", "malformed_rate",
+                )
+            }
+
+    with open(args.output + ".json", "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    markdown = to_markdown(report)
+    with open(args.output + ".md", "w", encoding="utf-8") as file:
+        file.write(markdown)
+    print(markdown)
+
+    return 0 if report["consistent"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
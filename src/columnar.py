@@ -0,0 +1,291 @@
+import os
+import sys
+import json
+import mmap
+import shutil
+import hashlib
+import datetime
+import tempfile
+from array import array
+from typing import Dict, Iterator, Optional, Tuple
+
+from days import day_key, key_date
+from fields import FieldExtractor
+from reader import LineReader
+
+# Bump when the on-disk layout changes so old caches are rebuilt
+CACHE_VERSION = 2
+
+# Environment variable that overrides where caches are stored
+CACHE_DIR_ENV = "TWEETS_CACHE_DIR"
+
+# Rows are buffered and flushed to the column files in batches of this size
+FLUSH_ROWS = 65536
+
+# Column files: name -> array typecode
+COLUMNS = {
+    "days": "i",  # int32 packed YYYYMMDD day key (see days.day_key), -1 when missing
+    "users": "i",  # int32 index into the username dictionary, -1 when missing
+    "content_offsets": "q",  # int64 offsets into content.bin, one per row + 1
+    "username_offsets": "q",  # int64 offsets into usernames.bin, one per user + 1
+}
+
+
+def _fingerprint(file_path: str) -> Dict[str, object]:
+    stat = os.stat(file_path)
+    return {
+        "source": os.path.abspath(os.fsdecode(file_path)),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def cache_path(file_path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Return the directory holding the columnar cache of a tweet file.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param cache_dir: Root directory for caches (default is $TWEETS_CACHE_DIR,
+        or a `.tweets_cache` directory next to the source file).
+    :return: The cache directory for this source file.
+    """
+    source = os.path.abspath(os.fsdecode(file_path))
+    if cache_dir is None:
+        cache_dir = os.environ.get(CACHE_DIR_ENV) or os.path.join(
+            os.path.dirname(source), ".tweets_cache"
+        )
+    digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{os.path.basename(source)}-{digest}.columns")
+
+
+def build_cache(file_path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Convert a JSON lines tweet file into a columnar cache.
+
+    The cache stores dictionary-encoded usernames, dates as int32 day keys
+    (the same keys as the scans, see days.day_key) and the tweet content as an offsets column plus a UTF-8 blob. It is
+    written to a temporary directory and moved into place once complete.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param cache_dir: Root directory for caches (see `cache_path`).
+    :return: The path of the cache directory.
+    """
+    fingerprint = _fingerprint(file_path)
+    target = cache_path(file_path, cache_dir)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    workdir = tempfile.mkdtemp(prefix=".building-", dir=os.path.dirname(target))
+
+    extractor = FieldExtractor(("date", "user.username", "content"))
+    user_ids: Dict[str, int] = {}
+    rows = 0
+    content_size = 0
+
+    try:
+        files = {
+            name: open(os.path.join(workdir, f"{name}.bin"), "wb")
+            for name in ("days", "users", "content_offsets", "content")
+        }
+        days = array(COLUMNS["days"])
+        users = array(COLUMNS["users"])
+        content_offsets = array(COLUMNS["content_offsets"], [0])
+        content_chunks = []
+
+        def flush():
+            days.tofile(files["days"])
+            users.tofile(files["users"])
+            content_offsets.tofile(files["content_offsets"])
+            files["content"].write(b"".join(content_chunks))
+            del days[:], users[:], content_offsets[:], content_chunks[:]
+
+        with LineReader(file_path) as reader:
+            for buffer, start, end in reader:
+                try:
+                    tweet = extractor.extract(buffer, start, end)
+                except ValueError:
+                    # Skip lines that are not valid JSON
+                    continue
+                if tweet is None:
+                    continue
+
+                day = day_key(tweet["date"])
+                if day is None:
+                    day = -1
+
+                username = tweet["user.username"]
+                user = -1
+                if isinstance(username, str) and username:
+                    user = user_ids.setdefault(username, len(user_ids))
+
+                content = tweet["content"]
+                if isinstance(content, str) and content:
+                    encoded = content.encode("utf-8", "surrogatepass")
+                    content_chunks.append(encoded)
+                    content_size += len(encoded)
+
+                days.append(day)
+                users.append(user)
+                content_offsets.append(content_size)
+                rows += 1
+                if len(days) >= FLUSH_ROWS:
+                    flush()
+
+        flush()
+        for file in files.values():
+            file.close()
+
+        # Username dictionary: offsets column plus a UTF-8 blob
+        username_offsets = array(COLUMNS["username_offsets"], [0])
+        with open(os.path.join(workdir, "usernames.bin"), "wb") as file:
+            size = 0
+            for username in user_ids:
+                encoded = username.encode("utf-8", "surrogatepass")
+                file.write(encoded)
+                size += len(encoded)
+                username_offsets.append(size)
+        with open(os.path.join(workdir, "username_offsets.bin"), "wb") as file:
+            username_offsets.tofile(file)
+
+        meta = dict(
+            fingerprint,
+            version=CACHE_VERSION,
+            byteorder=sys.byteorder,
+            rows=rows,
+            users=len(user_ids),
+        )
+        with open(os.path.join(workdir, "meta.json"), "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(workdir, target)
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+    return target
+
+
+class ColumnarCache:
+    """
+    Read-only view of a columnar cache, backed by memory-mapped column files.
+
+    Use `open_cache` to obtain an instance; close it (or use it as a context
+    manager) to release the mappings.
+    """
+
+    def __init__(self, directory: str, meta: dict):
+        self.directory = directory
+        self.meta = meta
+        self.rows = meta["rows"]
+        self._maps = []
+        self._views = []
+
+        self.days = self._column("days")
+        self.users = self._column("users")
+        self.content_offsets = self._column("content_offsets")
+        self.content = self._blob("content")
+        self._username_offsets = self._column("username_offsets")
+        self._usernames = self._blob("usernames")
+
+    def _blob(self, name: str) -> memoryview:
+        with open(os.path.join(self.directory, f"{name}.bin"), "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return memoryview(b"")
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        view = memoryview(mapped)
+        self._views.append(view)
+        return view
+
+    def _column(self, name: str) -> memoryview:
+        blob = self._blob(name)
+        typecode = COLUMNS[name]
+        if not blob:
+            return memoryview(array(typecode))
+        view = blob.cast(typecode)
+        self._views.append(view)
+        return view
+
+    def close(self) -> None:
+        self.days = self.users = self.content_offsets = self.content = None
+        self._username_offsets = self._usernames = None
+        try:
+            for view in reversed(self._views):
+                view.release()
+            for mapped in self._maps:
+                mapped.close()
+        except BufferError:
+            # A caller still holds a slice; the mapping is freed with it
+            pass
+        self._views = []
+        self._maps = []
+
+    def __enter__(self) -> "ColumnarCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def username(self, user: int) -> str:
+        """Decode a username from its dictionary index."""
+        start = self._username_offsets[user]
+        end = self._username_offsets[user + 1]
+        return str(self._usernames[start:end], "utf-8", "surrogatepass")
+
+    @staticmethod
+    def date(day: int) -> datetime.date:
+        """Convert a stored day key back into a date."""
+        return key_date(day)
+
+    def date_user_pairs(self) -> Iterator[Tuple[int, int]]:
+        """
+        Iterate over the (day key, user index) of every tweet that has both.
+        """
+        return (
+            (day, user)
+            for day, user in zip(self.days, self.users)
+            if day >= 0 and user >= 0
+        )
+
+    def iter_content(self) -> Iterator[str]:
+        """
+        Iterate over the content of every tweet (an empty string when missing).
+        """
+        content = self.content
+        offsets = self.content_offsets
+        for i in range(self.rows):
+            yield str(content[offsets[i] : offsets[i + 1]], "utf-8", "surrogatepass")
+
+
+def open_cache(
+    file_path: str, cache_dir: Optional[str] = None
+) -> Optional[ColumnarCache]:
+    """
+    Open the columnar cache of a tweet file if one exists and is still valid.
+
+    A cache is valid when it was built from a file with the same path, size
+    and modification time, with the current layout version and byte order.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param cache_dir: Root directory for caches (see `cache_path`).
+    :return: The opened cache, or None if there is no valid cache.
+    """
+    directory = cache_path(file_path, cache_dir)
+    try:
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        fingerprint = _fingerprint(file_path)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        meta.get("version") != CACHE_VERSION
+        or meta.get("byteorder") != sys.byteorder
+        or any(meta.get(key) != value for key, value in fingerprint.items())
+    ):
+        return None
+
+    try:
+        return ColumnarCache(directory, meta)
+    except (OSError, ValueError, KeyError):
+        return None
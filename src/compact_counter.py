@@ -0,0 +1,235 @@
+import heapq
+from array import array
+from typing import Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+# Distinct keys counted in a plain dict before they are moved to the arena;
+# repeated keys (the common case with skewed data) are then counted at dict
+# speed, and the dict stays small
+BUFFER_SIZE = 1 << 14
+
+# Buffer size for many counters side by side (e.g. one per date): their
+# buffers add up, and with BUFFER_SIZE most of them would never flush
+GROUP_BUFFER_SIZE = 1 << 8
+
+# Number of hash table slots allocated by the first flush (a power of two)
+INITIAL_SLOTS = 1 << 10
+
+EMPTY = -1
+
+# Low bits of the key hashes kept per key, so growing the table does not
+# rehash the keys (and limiting the table to 2**32 slots)
+HASH_MASK = 0xFFFFFFFF
+
+
+class CompactCounter:
+    """
+    Counter of string keys with a small memory footprint per distinct key.
+
+    Keys are interned into a byte arena (UTF-8, addressed by an offsets
+    array) and found through an open-addressing hash table of integer ids;
+    counts live in an array. A distinct key costs its encoded length plus
+    about 30 bytes, against about 100 bytes for a key of a `Counter` (str
+    object, dict entry and int object).
+
+    Exposes the parts of the `Counter` API used by the queries: `update`,
+    `add`, item lookup, `len`, `items` and `most_common`. As with `Counter`,
+    keys are kept in order of first appearance and `most_common` breaks ties
+    by that order.
+
+    :param iterable: Keys to count, or a mapping of keys to counts.
+    :param buffer_size: Distinct keys buffered before moving to the arena.
+    """
+
+    def __init__(
+        self,
+        iterable: Optional[Union[Iterable[str], Mapping[str, int]]] = None,
+        buffer_size: int = BUFFER_SIZE,
+    ):
+        self.buffer_size = buffer_size
+        self._buffer = {}
+        self._arena = bytearray()
+        self._offsets = array("Q", [0])
+        self._counts = array("q")
+        self._hashes = array("I")
+        # Allocated by the first flush, so counters that never flush only
+        # cost their buffer
+        self._table = array("i")
+        if iterable is not None:
+            self.update(iterable)
+
+    def add(self, key: str, count: int = 1) -> None:
+        buffer = self._buffer
+        buffer[key] = buffer.get(key, 0) + count
+        if len(buffer) >= self.buffer_size:
+            self._flush()
+
+    def update(self, iterable: Union[Iterable[str], Mapping[str, int]]) -> None:
+        """Count the keys of an iterable, or add the counts of a mapping."""
+        buffer = self._buffer
+        get = buffer.get
+        if hasattr(iterable, "items"):
+            for key, count in iterable.items():
+                buffer[key] = get(key, 0) + count
+        else:
+            for key in iterable:
+                buffer[key] = get(key, 0) + 1
+        if len(buffer) >= self.buffer_size:
+            self._flush()
+
+    def __getitem__(self, key: str) -> int:
+        slot = self._find(key.encode("utf-8"))
+        count = self._counts[slot] if slot != EMPTY else 0
+        return count + self._buffer.get(key, 0)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._buffer or self._find(key.encode("utf-8")) != EMPTY
+
+    def __len__(self) -> int:
+        self._flush()
+        return len(self._counts)
+
+    def __iter__(self) -> Iterator[str]:
+        self._flush()
+        for key_id in range(len(self._counts)):
+            yield self._key(key_id)
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        self._flush()
+        counts = self._counts
+        for key_id in range(len(counts)):
+            yield self._key(key_id), counts[key_id]
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Return the n most common keys and their counts, most common first
+        (all keys if n is None). Only the returned keys are decoded.
+        """
+        self._flush()
+        counts = self._counts
+        if n is None:
+            # sorted() is stable with reverse=True as well
+            ids = sorted(range(len(counts)), key=counts.__getitem__, reverse=True)
+        else:
+            ids = heapq.nlargest(n, range(len(counts)), key=counts.__getitem__)
+        return [(self._key(key_id), counts[key_id]) for key_id in ids]
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the arena, arrays and buffer, in bytes."""
+        return (
+            len(self._arena)
+            + self._offsets.itemsize * len(self._offsets)
+            + self._counts.itemsize * len(self._counts)
+            + self._hashes.itemsize * len(self._hashes)
+            + self._table.itemsize * len(self._table)
+            + 100 * len(self._buffer)
+        )
+
+    def _key(self, key_id: int) -> str:
+        offsets = self._offsets
+        return self._arena[offsets[key_id] : offsets[key_id + 1]].decode("utf-8")
+
+    def _find(self, data: bytes) -> int:
+        """Return the id of an encoded key in the arena, or EMPTY."""
+        table, hashes = self._table, self._hashes
+        if not table:
+            return EMPTY
+        arena, offsets = self._arena, self._offsets
+        digest = hash(data) & HASH_MASK
+        mask = len(table) - 1
+        index = digest & mask
+        while True:
+            key_id = table[index]
+            if key_id == EMPTY or (
+                hashes[key_id] == digest
+                and arena[offsets[key_id] : offsets[key_id + 1]] == data
+            ):
+                return key_id
+            index = (index + 1) & mask
+
+    def _flush(self) -> None:
+        """Move the buffered counts into the arena, in first-appearance order."""
+        buffer = self._buffer
+        if not buffer:
+            return
+        counts, hashes = self._counts, self._hashes
+        arena, offsets = self._arena, self._offsets
+
+        # Grow the table once for the worst case (all keys new), keeping the
+        # load factor at most 1/2
+        slots = len(self._table) or INITIAL_SLOTS
+        while 2 * (len(counts) + len(buffer)) > slots:
+            slots *= 2
+        if slots != len(self._table):
+            self._rehash(slots)
+        table = self._table
+        mask = slots - 1
+
+        size = len(arena)
+        key_id = len(counts)
+        for key, count in buffer.items():
+            data = key.encode("utf-8")
+            digest = hash(data) & HASH_MASK
+            index = digest & mask
+            while True:
+                slot = table[index]
+                if slot == EMPTY:
+                    table[index] = key_id
+                    key_id += 1
+                    arena += data
+                    size += len(data)
+                    offsets.append(size)
+                    counts.append(count)
+                    hashes.append(digest)
+                    break
+                if (
+                    hashes[slot] == digest
+                    and arena[offsets[slot] : offsets[slot + 1]] == data
+                ):
+                    counts[slot] += count
+                    break
+                index = (index + 1) & mask
+        buffer.clear()
+
+    def _rehash(self, slots: int) -> None:
+        table = array("i", [EMPTY]) * slots
+        mask = slots - 1
+        for key_id, digest in enumerate(self._hashes):
+            index = digest & mask
+            while table[index] != EMPTY:
+                index = (index + 1) & mask
+            table[index] = key_id
+        self._table = table
+
+    def __getstate__(self) -> dict:
+        # String hashes differ between processes, so the table is rebuilt
+        self._flush()
+        return {
+            "buffer_size": self.buffer_size,
+            "arena": bytes(self._arena),
+            "offsets": self._offsets,
+            "counts": self._counts,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.buffer_size = state["buffer_size"]
+        self._buffer = {}
+        self._arena = bytearray(state["arena"])
+        self._offsets = state["offsets"]
+        self._counts = state["counts"]
+        arena, offsets = self._arena, self._offsets
+        self._hashes = array(
+            "I",
+            (
+                hash(bytes(arena[offsets[key_id] : offsets[key_id + 1]])) & HASH_MASK
+                for key_id in range(len(self._counts))
+            ),
+        )
+        self._table = array("i")
+        if self._counts:
+            slots = INITIAL_SLOTS
+            while 2 * len(self._counts) > slots:
+                slots *= 2
+            self._rehash(slots)
+
+    def __repr__(self) -> str:
+        return f"CompactCounter({len(self)} keys)"
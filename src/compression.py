@@ -0,0 +1,215 @@
+import io
+import bz2
+import gzip
+import zlib
+import queue
+import struct
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterator, Optional
+
+# Magic numbers of the supported formats
+MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+# Size of the decompressed chunks handed to the line splitter
+CHUNK_SIZE = 1024 * 1024
+
+# Number of decompressed chunks buffered ahead of the consumer
+PREFETCH_CHUNKS = 8
+
+# BGZF (blocked gzip, as written by bgzip): every member carries its own
+# compressed size in a "BC" extra subfield, so members can be located without
+# decompressing and inflated independently
+BGZF_HEADER = struct.Struct("<4BI2BH")
+BGZF_SUBFIELD = struct.Struct("<2sHH")
+BGZF_THREADS = 4
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """
+    Detect the compression format of a file from its magic number.
+
+    :param file_path: Path to the file.
+    :return: "gzip", "bz2" or "zstd", or None for an uncompressed file.
+    """
+    with open(file_path, "rb") as file:
+        head = file.read(4)
+    for magic, name in MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_decompressed(file_path: str, compression: Optional[str] = None) -> BinaryIO:
+    """
+    Open a possibly compressed file as a stream of decompressed bytes.
+
+    :param file_path: Path to the file.
+    :param compression: Format of the file (default is to detect it).
+    :return: A binary file object.
+    """
+    compression = compression or detect_compression(file_path)
+    if compression == "gzip":
+        return gzip.open(file_path, "rb")
+    if compression == "bz2":
+        return bz2.open(file_path, "rb")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "Reading .zst files requires the zstandard package "
+                "(pip install zstandard)"
+            ) from None
+        file = open(file_path, "rb")
+        return zstandard.ZstdDecompressor().stream_reader(
+            file, read_across_frames=True, closefd=True
+        )
+    return open(file_path, "rb")
+
+
+def open_text(file_path: str, encoding: str = "utf-8") -> io.TextIOBase:
+    """
+    Open a possibly compressed file in text mode.
+    """
+    return io.TextIOWrapper(open_decompressed(file_path), encoding=encoding)
+
+
+def _bgzf_members(file: BinaryIO) -> Iterator[bytes]:
+    """
+    Yield the raw BGZF members of a file from its current position. Every
+    member's header is checked: iteration stops at the end of the file, or
+    at the first member that is not a complete BGZF block, with the file
+    positioned at the start of that member.
+    """
+    while True:
+        offset = file.tell()
+        header = file.read(BGZF_HEADER.size)
+        if len(header) < BGZF_HEADER.size:
+            file.seek(offset)
+            return
+        id1, id2, method, flags, _, _, _, extra_size = BGZF_HEADER.unpack(header)
+        block_size = None
+        if (id1, id2, method) == (0x1F, 0x8B, 8) and flags & 4:
+            extra = file.read(extra_size)
+            position = 0
+            while position + BGZF_SUBFIELD.size <= len(extra):
+                tag, length, value = BGZF_SUBFIELD.unpack_from(extra, position)
+                if tag == b"BC" and length == 2:
+                    block_size = value + 1
+                position += 4 + length
+        if block_size is None:
+            file.seek(offset)
+            return
+        rest = file.read(block_size - BGZF_HEADER.size - extra_size)
+        if len(rest) < block_size - BGZF_HEADER.size - extra_size:
+            file.seek(offset)
+            return
+        yield header + extra + rest
+
+
+def _inflate_member(member: bytes) -> bytes:
+    extra_size = BGZF_HEADER.unpack_from(member)[-1]
+    # Raw deflate data between the header and the CRC32/ISIZE trailer
+    return zlib.decompress(member[BGZF_HEADER.size + extra_size : -8], -15)
+
+
+def _is_bgzf(file_path: str) -> bool:
+    with open(file_path, "rb") as file:
+        return next(_bgzf_members(file), None) is not None
+
+
+def _bgzf_chunks(file_path: str) -> Iterator[bytes]:
+    # zlib releases the GIL, so members are inflated on several threads;
+    # results are consumed in file order
+    with open(file_path, "rb") as file, ThreadPoolExecutor(BGZF_THREADS) as pool:
+        pending = deque()
+        for member in _bgzf_members(file):
+            pending.append(pool.submit(_inflate_member, member))
+            if len(pending) >= BGZF_THREADS * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+        # A member that is not a BGZF block (e.g. plain gzip data appended
+        # to a BGZF file): the rest of the file is inflated as a stream
+        if file.read(1):
+            file.seek(-1, io.SEEK_CUR)
+            with gzip.GzipFile(fileobj=file, mode="rb") as stream:
+                yield from _read_chunks(stream)
+
+
+def _read_chunks(stream: BinaryIO) -> Iterator[bytes]:
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _stream_chunks(file_path: str, compression: str) -> Iterator[bytes]:
+    with open_decompressed(file_path, compression) as stream:
+        yield from _read_chunks(stream)
+
+
+def iter_decompressed(
+    file_path: str, compression: Optional[str] = None
+) -> Iterator[bytes]:
+    """
+    Decompress a file on a background thread and yield its contents in
+    chunks, so decompression overlaps with whatever consumes the chunks.
+
+    BGZF files (gzip written by bgzip) are inflated block-parallel, up to the
+    first member that is not a BGZF block, from which the rest of the file
+    is inflated as a stream.
+
+    :param file_path: Path to the compressed file.
+    :param compression: Format of the file (default is to detect it).
+    :return: An iterator of decompressed chunks of arbitrary size.
+    """
+    compression = compression or detect_compression(file_path)
+    if compression == "gzip" and _is_bgzf(file_path):
+        source = _bgzf_chunks(file_path)
+    else:
+        source = _stream_chunks(file_path, compression)
+
+    chunks = queue.Queue(PREFETCH_CHUNKS)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for chunk in source:
+                if stop.is_set():
+                    break
+                chunks.put(chunk)
+            chunks.put(done)
+        except BaseException as error:
+            chunks.put(error)
+        finally:
+            source.close()
+
+    thread = threading.Thread(target=produce, name="decompress", daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is done:
+                return
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield chunk
+    finally:
+        # Unblock the producer if the consumer stopped early
+        stop.set()
+        while thread.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        thread.join()
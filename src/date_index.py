@@ -0,0 +1,291 @@
+import os
+import json
+import datetime
+import tempfile
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from columnar import _fingerprint, cache_path
+from compression import detect_compression
+from days import day_key
+from engine import RecordExtractor, required_fields, scan, scan_spans
+from fields import FieldExtractor
+from reader import LineReader
+
+# Bump when the on-disk layout changes so old indexes are rebuilt
+INDEX_VERSION = 1
+
+# Ranges of the same date closer than this many bytes are merged, which keeps
+# the index smaller on files that are not sorted by date; the lines in
+# between are read and filtered out
+MERGE_GAP = 4096
+
+DateLike = Union[datetime.date, str]
+
+
+def index_path(file_path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Return the location of the date index of a tweet file, next to its
+    columnar cache (see columnar.cache_path).
+    """
+    return os.path.splitext(cache_path(file_path, cache_dir))[0] + ".dateindex"
+
+
+def _merge_ranges(ranges: Iterable[Tuple[int, int]]) -> List[List[int]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class DateIndex:
+    """
+    Map from each date ("YYYY-MM-DD") to the byte ranges of the lines
+    holding tweets of that date.
+    """
+
+    def __init__(self, dates: Optional[Dict[str, List[List[int]]]] = None):
+        self.dates = dates if dates is not None else {}
+
+    def add(self, date: str, start: int, end: int) -> None:
+        """Record that the line [start, end) holds a tweet of `date`."""
+        ranges = self.dates.get(date)
+        if ranges is None:
+            self.dates[date] = [[start, end]]
+        elif start <= ranges[-1][1] + MERGE_GAP:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+
+    def ranges(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> List[List[int]]:
+        """
+        Return the sorted, non-overlapping byte ranges of the lines whose
+        date lies in [start_date, end_date] (both inclusive, either open).
+        """
+        return _merge_ranges(
+            (start, end)
+            for date, ranges in self.dates.items()
+            if (start_date is None or date >= start_date)
+            and (end_date is None or date <= end_date)
+            for start, end in ranges
+        )
+
+    def save(self, file_path: str, cache_dir: Optional[str] = None) -> str:
+        target = index_path(file_path, cache_dir)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        meta = dict(_fingerprint(file_path), version=INDEX_VERSION)
+        fd, temp_path = tempfile.mkstemp(
+            prefix=".dateindex-", dir=os.path.dirname(target)
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump({"meta": meta, "dates": self.dates}, file)
+            os.replace(temp_path, target)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        return target
+
+
+def open_index(
+    file_path: str, cache_dir: Optional[str] = None
+) -> Optional[DateIndex]:
+    """
+    Load the date index of a tweet file if one exists and is still valid
+    (same path, size and modification time as when it was built).
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param cache_dir: Root directory for caches (see columnar.cache_path).
+    :return: The index, or None if there is no valid index.
+    """
+    try:
+        with open(index_path(file_path, cache_dir), "r", encoding="utf-8") as file:
+            data = json.load(file)
+        fingerprint = _fingerprint(file_path)
+    except (OSError, ValueError):
+        return None
+
+    meta = data.get("meta", {}) if isinstance(data, dict) else {}
+    if meta.get("version") != INDEX_VERSION or any(
+        meta.get(key) != value for key, value in fingerprint.items()
+    ):
+        return None
+    return DateIndex(data.get("dates", {}))
+
+
+def build_index(file_path: str, cache_dir: Optional[str] = None) -> DateIndex:
+    """
+    Scan a tweet file and write its date index.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param cache_dir: Root directory for caches (see columnar.cache_path).
+    :return: The index.
+    """
+    index = DateIndex()
+    extractor = FieldExtractor(("date",))
+    with LineReader(file_path) as reader:
+        for buffer, start, end in reader:
+            try:
+                tweet = extractor.extract(buffer, start, end)
+            except ValueError:
+                continue
+            date = _date_key(tweet["date"]) if tweet else None
+            if date:
+                index.add(date, start, end)
+    index.save(file_path, cache_dir)
+    return index
+
+
+def _date_key(value) -> Optional[str]:
+    # The "YYYY-MM-DD" prefix of the timestamps days.day_key accepts
+    return value[:10] if day_key(value) is not None else None
+
+
+def _date_bound(value: Optional[DateLike]) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    # Validates the format; "YYYY-MM-DD" strings compare like dates
+    return datetime.date.fromisoformat(value).isoformat()
+
+
+class RecordFilter:
+    """
+    Aggregator wrapper that only forwards the tweets posted between two dates
+    (inclusive) and/or by a set of users.
+    """
+
+    def __init__(
+        self,
+        aggregators: Sequence,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+        users: Optional[Iterable[str]] = None,
+    ):
+        self.aggregators = aggregators
+        self.start_date = _date_bound(start_date)
+        self.end_date = _date_bound(end_date)
+        self.users = frozenset(users) if users is not None else None
+        self.fields = tuple(
+            dict.fromkeys(required_fields(aggregators) + ("date", "user.username"))
+        )
+        self._updates = [aggregator.update for aggregator in aggregators]
+
+    @property
+    def by_date(self) -> bool:
+        return self.start_date is not None or self.end_date is not None
+
+    def accepts(self, record: dict) -> bool:
+        if self.users is not None and record["user.username"] not in self.users:
+            return False
+        if self.by_date:
+            date = _date_key(record["date"])
+            if date is None:
+                return False
+            if self.start_date is not None and date < self.start_date:
+                return False
+            if self.end_date is not None and date > self.end_date:
+                return False
+        return True
+
+    def update(self, record: dict) -> None:
+        if self.accepts(record):
+            for update in self._updates:
+                update(record)
+
+
+def filtered_scan(
+    file_path: str,
+    aggregators: Sequence,
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    users: Optional[Iterable[str]] = None,
+    cache_dir: Optional[str] = None,
+) -> Sequence:
+    """
+    Feed the aggregators with the tweets posted between two dates (inclusive)
+    and/or by a set of users.
+
+    With a date bound, only the byte ranges of the matching dates are read,
+    using the date index of the file. If there is no valid index it is built
+    during this scan, so later queries are fast.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param aggregators: Objects exposing `fields` and `update(record)`.
+    :param start_date: First date to include (date or "YYYY-MM-DD").
+    :param end_date: Last date to include (date or "YYYY-MM-DD").
+    :param users: Only include tweets by these usernames.
+    :param cache_dir: Root directory for caches (see columnar.cache_path).
+    :return: The same aggregators, updated in place.
+    """
+    record_filter = RecordFilter(aggregators, start_date, end_date, users)
+
+    if not record_filter.by_date or detect_compression(file_path) is not None:
+        # Nothing to skip by date, or no byte ranges to skip to
+        scan(file_path, [record_filter])
+        return aggregators
+
+    index = open_index(file_path, cache_dir)
+    if index is not None:
+        ranges = index.ranges(record_filter.start_date, record_filter.end_date)
+        with LineReader(file_path) as reader:
+            scan_spans(reader.iter_ranges(ranges), [record_filter])
+        return aggregators
+
+    # First scan: answer the query and build the index at the same time
+    index = DateIndex()
+    extractor = RecordExtractor(record_filter.fields)
+    with LineReader(file_path) as reader:
+        for buffer, start, end in reader:
+            try:
+                record = extractor.extract(buffer, start, end)
+            except ValueError:
+                continue
+            if record is None:
+                continue
+            date = _date_key(record["date"])
+            if date:
+                index.add(date, start, end)
+            extractor.derive(record)
+            record_filter.update(record)
+    try:
+        index.save(file_path, cache_dir)
+    except OSError:
+        # The index is an optimization; queries still work without it
+        pass
+    return aggregators
+
+
+def filtered_query(
+    file_path: str,
+    aggregator_type: Type,
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    users: Optional[Iterable[str]] = None,
+    k: int = 10,
+) -> list:
+    """
+    Answer one question over the tweets selected by the filters (see
+    `filtered_scan`), with the same error handling as the query functions.
+
+    :param k: Number of results, passed to the aggregator.
+    :return: The aggregator's result, or an empty list if the file cannot be read.
+    """
+    aggregator = aggregator_type(k=k)
+    try:
+        filtered_scan(file_path, [aggregator], start_date, end_date, users)
+    except FileNotFoundError:
+        print(f"Error: File not found - {file_path}")
+        return []
+    except IOError as e:
+        print(f"Error reading file {file_path}: {e}")
+        return []
+    return aggregator.result()
@@ -0,0 +1,135 @@
+import re
+import datetime
+from typing import Optional, Union
+
+# Bound of the day caches (date prefixes, and local days per DayBucketer)
+DAY_CACHE_SIZE = 1 << 16
+
+FIXED_OFFSET = re.compile(r"([+-])(\d{2}):?(\d{2})")
+
+TimezoneLike = Union[datetime.tzinfo, str]
+
+
+# Day keys by date prefix ("YYYY-MM-DD"); there are only a few distinct days
+_DAY_KEYS = {}
+
+
+def _parse_day(prefix: str) -> Optional[int]:
+    if prefix[4:5] != "-" or prefix[7:8] != "-":
+        return None
+    digits = prefix[:4] + prefix[5:7] + prefix[8:10]
+    return int(digits) if len(digits) == 8 and digits.isdecimal() else None
+
+
+def day_key(timestamp) -> Optional[int]:
+    """
+    Derive the day of an ISO 8601 timestamp ("YYYY-MM-DDTHH:MM:SS...") as a
+    packed YYYYMMDD integer, from its first 10 characters and without
+    parsing it: the prefix is looked up in a small cache, so each tweet
+    costs one slice and one dictionary lookup.
+
+    Accepts the same timestamps as the "(\\d{4}-\\d{2}-\\d{2})T" pattern
+    used by the other q1 variants.
+
+    :param timestamp: The timestamp; other types are rejected.
+    :return: The day key, or None if the value is not such a timestamp.
+    """
+    try:
+        prefix = timestamp[:10]
+        key = _DAY_KEYS.get(prefix)
+    except TypeError:
+        return None
+    if key is None:
+        if not isinstance(prefix, str):
+            return None
+        key = _parse_day(prefix)
+        if key is None:
+            return None
+        if len(_DAY_KEYS) >= DAY_CACHE_SIZE:
+            _DAY_KEYS.clear()
+        _DAY_KEYS[prefix] = key
+    return key if timestamp[10:11] == "T" else None
+
+
+def key_date(key: int) -> datetime.date:
+    """Convert a day key back into a date."""
+    return datetime.date(key // 10000, key // 100 % 100, key % 100)
+
+
+def date_key(date: datetime.date) -> int:
+    """Convert a date into its day key."""
+    return date.year * 10000 + date.month * 100 + date.day
+
+
+def resolve_timezone(timezone: Optional[TimezoneLike]) -> Optional[datetime.tzinfo]:
+    """
+    Resolve a `timezone` option: a tzinfo, "UTC", a fixed offset such as
+    "-03:00", or an IANA name such as "America/Santiago" (via zoneinfo).
+
+    :raises ValueError: If the time zone is unknown.
+    """
+    if timezone is None or isinstance(timezone, datetime.tzinfo):
+        return timezone
+    if timezone.upper() in ("UTC", "Z"):
+        return datetime.timezone.utc
+    offset_match = FIXED_OFFSET.fullmatch(timezone)
+    if offset_match:
+        sign, hours, minutes = offset_match.groups()
+        offset = datetime.timedelta(hours=int(hours), minutes=int(minutes))
+        return datetime.timezone(-offset if sign == "-" else offset)
+
+    import zoneinfo
+
+    try:
+        return zoneinfo.ZoneInfo(timezone)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Unknown time zone {timezone!r}") from e
+
+
+class DayBucketer:
+    """
+    Map timestamps to day keys, either as written (the date part of the
+    timestamp, in whatever offset it was recorded) or as the local day in a
+    given time zone.
+
+    Converting to a time zone needs the full timestamp, so the local day is
+    cached per timestamp minute and UTC offset; tweets of the same minute
+    only pay for the first conversion. Timestamps without an offset are
+    taken as UTC.
+
+    :param timezone: Time zone of the days (see resolve_timezone), or None
+        to use the dates as written.
+    """
+
+    def __init__(self, timezone: Optional[TimezoneLike] = None):
+        self.timezone = resolve_timezone(timezone)
+        self._local = {}
+
+    def __call__(self, timestamp) -> Optional[int]:
+        if self.timezone is None:
+            return day_key(timestamp)
+
+        # The local day does not depend on the seconds
+        try:
+            minute = timestamp[:16] + timestamp[19:]
+            local = self._local.get(minute)
+        except TypeError:
+            return None
+        if local is None:
+            if day_key(timestamp) is None:
+                return None
+            try:
+                instant = datetime.datetime.fromisoformat(timestamp)
+            except ValueError:
+                return None
+            if instant.tzinfo is None:
+                instant = instant.replace(tzinfo=datetime.timezone.utc)
+            local = date_key(instant.astimezone(self.timezone).date())
+            if len(self._local) >= DAY_CACHE_SIZE:
+                self._local.clear()
+            self._local[minute] = local
+        return local
+
+    def __getstate__(self) -> dict:
+        # The cache is not worth shipping to and from worker processes
+        return {"timezone": self.timezone, "_local": {}}
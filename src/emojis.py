@@ -0,0 +1,111 @@
+import re
+from typing import List
+
+import emoji_data as data
+
+
+def _char_class(ranges) -> str:
+    return "".join(
+        re.escape(chr(start)) + ("-" + re.escape(chr(end)) if end > start else "")
+        for start, end in ranges
+    )
+
+
+def _subtract(ranges, removed):
+    """Code point ranges of `ranges` that are not in `removed` (both sorted)."""
+    result = []
+    for start, end in ranges:
+        for removed_start, removed_end in removed:
+            if removed_end < start or removed_start > end:
+                continue
+            if removed_start > start:
+                result.append((start, removed_start - 1))
+            start = removed_end + 1
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def _build_sequence_pattern(keycaps: bool) -> "re.Pattern":
+    """
+    Compile the emoji sequence grammar of UTS #51 over the bundled code point
+    data into a single automaton.
+
+    The pattern starts with a coarse class (the BMP emoji code points as a
+    bitmap plus one supplementary range) so the regex engine can skip plain
+    text with its fast prefix scan; the exact classes are then checked with
+    lookbehinds on the candidates only.
+    """
+    emoji = "[" + _char_class(data.EMOJI_PRESENTATION_RANGES) + "]"
+    text_emoji = "[" + _char_class(
+        _subtract(data.EMOJI_RANGES, data.EMOJI_PRESENTATION_RANGES)
+    ) + "]"
+    any_emoji = "[" + _char_class(data.EMOJI_RANGES) + "]"
+    vs15 = re.escape(chr(data.VARIATION_SELECTOR_15))
+    vs16 = re.escape(chr(data.VARIATION_SELECTOR_16))
+    modifier = "[" + _char_class([data.MODIFIER_RANGE]) + "]"
+    regional = "[" + _char_class([data.REGIONAL_INDICATOR_RANGE]) + "]"
+    tags = "[" + _char_class([data.TAG_RANGE]) + "]+" + re.escape(chr(data.CANCEL_TAG))
+    zwj = re.escape(chr(data.ZERO_WIDTH_JOINER))
+    keycap_bases = "[" + re.escape(data.KEYCAP_BASES) + "]"
+    keycap_end = vs16 + "?" + re.escape(chr(data.COMBINING_ENCLOSING_KEYCAP))
+
+    first = "[" + _char_class(r for r in data.EMOJI_RANGES if r[1] <= 0xFFFF)
+    first += _char_class([data.SUPPLEMENTARY_EMOJI_BLOCK])
+    if keycaps:
+        first += re.escape(data.KEYCAP_BASES)
+    first += "]"
+
+    # Any emoji code point may follow a ZWJ, with an optional skin tone or
+    # emoji variation selector; so may tags (subdivision flags)
+    rest = f"(?:{tags})?(?:{zwj}{any_emoji}(?:{modifier}|{vs16})?)*"
+
+    branches = [
+        # Flags: a pair of regional indicators
+        f"(?<={regional}){regional}",
+        # Emoji presentation by default, unless the text variation selector
+        # follows
+        f"(?<={emoji})(?!{vs15})(?:{modifier}|{vs16})?{rest}",
+        # Text presentation by default: needs the emoji variation selector
+        # or a skin tone
+        f"(?<={text_emoji})(?:{vs16}{modifier}?|{modifier}){rest}",
+    ]
+    if keycaps:
+        # Keycaps: 0-9, # or * followed by the enclosing keycap
+        branches.insert(0, f"(?<={keycap_bases}){keycap_end}")
+
+    return re.compile(first + "(?:" + "|".join(branches) + ")")
+
+
+# Single-pass emoji sequence matchers built from the bundled Unicode data.
+# Keycaps start with an ASCII digit, so the pattern that recognises them is
+# only used on texts that contain the enclosing keycap character.
+EMOJI_SEQUENCE_PATTERN = _build_sequence_pattern(keycaps=False)
+KEYCAP_SEQUENCE_PATTERN = _build_sequence_pattern(keycaps=True)
+KEYCAP = chr(data.COMBINING_ENCLOSING_KEYCAP)
+VS16 = chr(data.VARIATION_SELECTOR_16)
+
+
+def extract_emojis(text: str) -> List[str]:
+    """
+    Split the emojis out of a text, one entry per emoji.
+
+    Keycaps, flags, skin tone modifiers, subdivision flags and ZWJ sequences
+    are kept whole, and repeated emojis ("🙏🙏🙏") are returned separately.
+    Symbols displayed as text by default ("❤") only count when followed by
+    the emoji variation selector ("❤️"), and emojis followed by the text one
+    ("😀︎") do not count. The emoji variation selectors are dropped, so
+    "😀" and "😀️" are returned as the same emoji.
+
+    :param text: The input text from which to extract emojis.
+    :return: A list of emojis found in the text, in order of appearance.
+    """
+    if text.isascii():  # No emoji is pure ASCII
+        return []
+    if KEYCAP in text:
+        emojis = KEYCAP_SEQUENCE_PATTERN.findall(text)
+    else:
+        emojis = EMOJI_SEQUENCE_PATTERN.findall(text)
+    if VS16 in text:
+        return [emoji.replace(VS16, "") for emoji in emojis]
+    return emojis
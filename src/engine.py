@@ -0,0 +1,452 @@
+import time
+import datetime
+import functools
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from days import DayBucketer, TimezoneLike, day_key, key_date
+from entities import PairCounter, extract_domains, extract_hashtags
+from fields import FieldExtractor
+from reader import LineReader
+from shards import is_multi, multi_scan
+from stats import ScanStats
+from topk import TIE_BREAKS, GroupTopK, TopK
+from validation import LineValidator, finish, resolve_validator
+from q2_time import extract_emojis
+from q3_time import extract_mentions
+
+def get_path(tweet: dict, path: str) -> Any:
+    """
+    Resolve a dotted field path (e.g. "user.username") against a parsed tweet.
+
+    :param tweet: The parsed tweet dictionary.
+    :param path: Dotted path of the field to extract.
+    :return: The field value, or None if any segment is missing.
+    """
+    value = tweet
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _is_timestamp(value: Any) -> bool:
+    return day_key(value) is not None
+
+
+def _is_username(value: Any) -> bool:
+    return bool(value)
+
+
+def _is_text(value: Any) -> bool:
+    # An empty content is valid: the tweet just has nothing to count
+    return isinstance(value, str)
+
+
+# The one definition of a well-formed field, shared by the aggregators and by
+# scan_spans: a record that none of the aggregators of a scan can use, because
+# a field one of them reads fails its check, is skipped as "missing_field" by
+# the stats and the validation alike. Fields without a check always pass.
+FIELD_CHECKS = {
+    "date": _is_timestamp,
+    "user.username": _is_username,
+    "content": _is_text,
+}
+
+
+class _DateUser:
+    """(day key, username) of a record, see days.day_key."""
+
+    def __init__(self, timezone: Optional[TimezoneLike] = None):
+        self.day = day_key if timezone is None else DayBucketer(timezone)
+
+    def __call__(self, record: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+        username = record["user.username"]
+        if not _is_username(username):
+            return None
+        day = self.day(record["date"])
+        return (day, username) if day is not None else None
+
+
+def _emojis(record: Dict[str, Any]) -> List[str]:
+    content = record["content"]
+    return extract_emojis(content) if content and isinstance(content, str) else []
+
+
+def _mentions(record: Dict[str, Any]) -> List[str]:
+    content = record["content"]
+    return extract_mentions(content) if content and isinstance(content, str) else []
+
+
+def _record_mentions(record: Dict[str, Any]) -> List[str]:
+    return record["mentions"]
+
+
+def _hashtags(record: Dict[str, Any]) -> List[str]:
+    content = record["content"]
+    return extract_hashtags(content) if content and isinstance(content, str) else []
+
+
+def _domains(record: Dict[str, Any]) -> List[str]:
+    content = record["content"]
+    return extract_domains(content) if content and isinstance(content, str) else []
+
+
+class DateUserAggregator(GroupTopK):
+    """
+    Count tweets per date and per user on each date (q1).
+
+    :param timezone: Count local days in this time zone instead of the dates
+        as written in the timestamps (see days.resolve_timezone).
+    :param counter: Factory of the per-date user counters (see GroupTopK).
+    """
+
+    def __init__(
+        self,
+        k: int = 10,
+        ties: str = "first",
+        timezone: Optional[TimezoneLike] = None,
+        counter: Callable[[], Any] = Counter,
+    ):
+        super().__init__(
+            _DateUser(timezone), ("date", "user.username"), k, 1, ties, counter
+        )
+
+    def result(self) -> List[Tuple[datetime.date, str]]:
+        # Ties are broken by first appearance in the file, like q1_baseline
+        return [(key_date(day), users[0][0]) for day, users in super().result()]
+
+
+class EmojiAggregator(TopK):
+    """
+    Count emojis found in the tweet content (q2).
+    """
+
+    def __init__(self, k: int = 10, ties: str = "first"):
+        super().__init__(_emojis, ("content",), k=k, ties=ties)
+
+
+class MentionAggregator(TopK):
+    """
+    Count @mentions found in the tweet content (q3).
+
+    :param counter: Factory of the counter (see TopK).
+    """
+
+    def __init__(
+        self, k: int = 10, ties: str = "first", counter: Callable[[], Any] = Counter
+    ):
+        super().__init__(
+            _record_mentions, ("mentions",), k=k, ties=ties, counter=counter
+        )
+
+
+class HashtagAggregator(TopK):
+    """
+    Count #hashtags found in the tweet content.
+    """
+
+    def __init__(self, k: int = 10, ties: str = "first"):
+        super().__init__(_hashtags, ("content",), k=k, ties=ties)
+
+
+class DomainAggregator(TopK):
+    """
+    Count the domains of the URLs found in the tweet content.
+    """
+
+    def __init__(self, k: int = 10, ties: str = "first"):
+        super().__init__(_domains, ("content",), k=k, ties=ties)
+
+
+class CoMentionAggregator:
+    """
+    Count the pairs of distinct users mentioned in the same tweet, with
+    integer pair keys (see entities.PairCounter). The mentions are a derived
+    field (see DERIVED_FIELDS), shared with a MentionAggregator scanning the
+    same records.
+    """
+
+    fields = ("mentions",)
+
+    def __init__(self, k: int = 10, ties: str = "first"):
+        if ties not in TIE_BREAKS:
+            raise ValueError(
+                f"Unknown tie-breaking rule {ties!r}, expected one of {TIE_BREAKS}"
+            )
+        self.k = k
+        self.ties = ties
+        self.pairs = PairCounter()
+
+    def update(self, record: Dict[str, Any]) -> None:
+        mentions = record["mentions"]
+        if len(mentions) > 1:
+            self.pairs.add(mentions)
+
+    def merge(self, other: "CoMentionAggregator") -> None:
+        self.pairs.merge(other.pairs)
+
+    def result(self) -> List[Tuple[Tuple[str, str], int]]:
+        return self.pairs.most_common(self.k, self.ties)
+
+
+# Analyses q_all can compute in its single scan, by name
+ANALYSES = {
+    "q1": DateUserAggregator,
+    "q2": EmojiAggregator,
+    "q3": MentionAggregator,
+    "hashtags": HashtagAggregator,
+    "domains": DomainAggregator,
+    "co_mentions": CoMentionAggregator,
+}
+
+
+# Fields computed from the parsed fields once per record and shared by every
+# aggregator listing them in its `fields`: name -> (source paths, function)
+DERIVED_FIELDS = {
+    "mentions": (("content",), _mentions),
+}
+
+
+class RecordExtractor:
+    """
+    Extract the fields of the engine records: dotted paths of the tweet, and
+    DERIVED_FIELDS, which `derive` adds to a record extracted by `extract`.
+
+    :param fields: Field names, as returned by required_fields.
+    """
+
+    def __init__(self, fields: Sequence[str]):
+        self.derived = []
+        for name in fields:
+            if name in DERIVED_FIELDS:
+                self.derived.append((name, DERIVED_FIELDS[name][1]))
+        self.extract = FieldExtractor(source_paths(fields)).extract
+
+    def derive(self, record: Dict[str, Any]) -> None:
+        for name, function in self.derived:
+            record[name] = function(record)
+
+
+def source_paths(fields: Sequence[str]) -> Tuple[str, ...]:
+    """
+    Replace the derived fields among `fields` with the paths they are
+    computed from (see DERIVED_FIELDS), preserving the order.
+    """
+    paths = {}
+    for name in fields:
+        if name in DERIVED_FIELDS:
+            paths.update(dict.fromkeys(DERIVED_FIELDS[name][0]))
+        else:
+            paths[name] = None
+    return tuple(paths)
+
+
+def _usable(aggregators: Sequence) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """
+    Build the check of whether at least one of the aggregators can use a
+    record (see FIELD_CHECKS), or return None when every record passes.
+    """
+    checks = []
+    for aggregator in aggregators:
+        fields = [
+            (path, FIELD_CHECKS[path])
+            for path in source_paths(aggregator.fields)
+            if path in FIELD_CHECKS
+        ]
+        if not fields:
+            return None
+        checks.append(fields)
+
+    if len(checks) == 1 and len(checks[0]) == 1:
+        # A single field to check (q2, q3): no loop
+        ((path, check),) = checks[0]
+        return lambda record: check(record[path])
+
+    def usable(record: Dict[str, Any]) -> bool:
+        for fields in checks:
+            for path, check in fields:
+                if not check(record[path]):
+                    break
+            else:
+                return True
+        return False
+
+    return usable
+
+
+def required_fields(aggregators: Sequence) -> Tuple[str, ...]:
+    """
+    Collect the union of field paths needed by a set of aggregators,
+    preserving the order in which they are first requested.
+
+    :param aggregators: The aggregators that will consume the records.
+    :return: A tuple of dotted field paths.
+    """
+    fields = {}
+    for aggregator in aggregators:
+        for path in aggregator.fields:
+            fields[path] = None
+    return tuple(fields)
+
+
+def scan_spans(
+    spans: Iterable[Tuple[bytes, int, int]],
+    aggregators: Sequence,
+    stats: Optional[ScanStats] = None,
+    validation: Optional[Union[str, LineValidator]] = None,
+) -> Sequence:
+    """
+    Parse every line once and feed the requested fields to every aggregator.
+
+    :param spans: `(buffer, start, end)` line spans, as yielded by LineReader.
+    :param aggregators: Objects exposing `fields` and `update(record)`.
+    :param stats: If given, filled in with counters and per-stage timings
+        (tokenization is counted in the aggregate stage).
+    :param validation: What to do with lines that cannot be used (see
+        validation.POLICIES): lines that are not JSON objects, and records
+        that no aggregator can use (see FIELD_CHECKS).
+    :return: The same aggregators, updated in place.
+    """
+    validator = resolve_validator(validation)
+    reject = validator.reject if validator is not None else None
+
+    extractor = RecordExtractor(required_fields(aggregators))
+    derive = extractor.derive if extractor.derived else None
+    usable = _usable(aggregators)
+    updates = [aggregator.update for aggregator in aggregators]
+
+    # Instrumentation only costs a boolean check per stage when disabled
+    timed = stats is not None
+    seconds = stats.seconds if timed else None
+    clock = time.perf_counter
+
+    mark = clock() if timed else 0.0
+    for buffer, line_start, line_end in spans:
+        if timed:
+            now = clock()
+            seconds["read"] += now - mark
+            stats.lines += 1
+            stats.bytes += line_end - line_start
+        try:
+            record = extractor.extract(buffer, line_start, line_end)
+        except ValueError:
+            # Skip lines that are not valid JSON
+            record = None
+            if timed:
+                stats.skip("invalid_json")
+            if reject is not None:
+                reject("invalid_json", buffer, line_start, line_end)
+        else:
+            if record is None:
+                if timed:
+                    stats.skip("not_an_object")
+                if reject is not None:
+                    reject("not_an_object", buffer, line_start, line_end)
+        if timed:
+            mark = clock()
+            seconds["parse"] += mark - now
+        if record is None:
+            continue
+        if usable is not None and not usable(record):
+            if timed:
+                stats.skip("missing_field")
+            if reject is not None:
+                reject("missing_field", buffer, line_start, line_end)
+            continue
+
+        if derive is not None:
+            derive(record)
+        for update in updates:
+            update(record)
+        if timed:
+            now = clock()
+            seconds["aggregate"] += now - mark
+            mark = now
+            stats.tweets += 1
+
+    finish(validator, validation)
+    return aggregators
+
+
+def scan(
+    file_path: str,
+    aggregators: Sequence,
+    start: int = 0,
+    end: Optional[int] = None,
+    stats: Optional[ScanStats] = None,
+    validation: Optional[Union[str, LineValidator]] = None,
+) -> Sequence:
+    """
+    Read the file once, parse every tweet once and feed the requested fields
+    to every aggregator.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param aggregators: Objects exposing `fields` and `update(record)`.
+    :param start: Byte offset of the first line to process; must be at the
+        start of a line.
+    :param end: Only lines starting before this byte offset are processed
+        (default is the end of the file).
+    :param stats: If given, filled in with counters and per-stage timings
+        (tokenization is counted in the aggregate stage).
+    :param validation: What to do with lines that cannot be used (see
+        scan_spans).
+    :return: The same aggregators, updated in place.
+    """
+    with LineReader(file_path, start, end) as reader:
+        return scan_spans(reader, aggregators, stats, validation)
+
+
+def q_all(
+    file_path: Union[str, Sequence[str]],
+    k: int = 10,
+    validation: Optional[Union[str, LineValidator]] = None,
+    analyses: Sequence[str] = ("q1", "q2", "q3"),
+) -> Dict[str, list]:
+    """
+    Answer q1, q2 and q3 (or other analyses, see ANALYSES) with a single
+    scan of the tweet file.
+
+    :param file_path: Path to the JSON lines file containing tweet data, or a
+        directory, glob pattern or list of shard files (see shards.multi_scan).
+    :param k: Number of results of each question.
+    :param validation: What to do with lines that cannot be used (see
+        scan_spans; single files only, ValueError otherwise).
+    :param analyses: Names of the analyses to compute: "q1", "q2", "q3",
+        "hashtags" (top hashtags), "domains" (top URL domains) and
+        "co_mentions" (top pairs of users mentioned together).
+    :return: A dictionary with the result of each analysis. The "q1", "q2"
+        and "q3" results have the same type as returned by q1_time, q2_time
+        and q3_time; "co_mentions" is a list of ((user, user), count).
+    :raises ValueError: If an analysis is unknown, or validation is given
+        for several files.
+    """
+    unknown = [name for name in analyses if name not in ANALYSES]
+    if unknown:
+        raise ValueError(f"Unknown analyses {unknown}, expected some of {tuple(ANALYSES)}")
+    multi = is_multi(file_path)
+    if multi and validation is not None:
+        raise ValueError("validation is only supported for single files")
+    aggregators = {name: ANALYSES[name](k) for name in analyses}
+
+    try:
+        if multi:
+            merged = multi_scan(
+                file_path,
+                [
+                    functools.partial(type(aggregator), k)
+                    for aggregator in aggregators.values()
+                ],
+            )
+            aggregators = dict(zip(aggregators, merged))
+        else:
+            scan(file_path, list(aggregators.values()), validation=validation)
+    except FileNotFoundError:
+        print(f"Error: File not found - {file_path}")
+        return {name: [] for name in aggregators}
+    except IOError as e:
+        print(f"Error reading file {file_path}: {e}")
+        return {name: [] for name in aggregators}
+
+    return {name: aggregator.result() for name, aggregator in aggregators.items()}
@@ -0,0 +1,132 @@
+import re
+import heapq
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from topk import TIE_BREAKS
+
+# Regular expression to find all #hashtags
+HASHTAG_PATTERN = re.compile(r"#(\w+)")
+
+# Host of every http(s) URL, up to the port, path, query or fragment
+URL_HOST_PATTERN = re.compile(r"https?://([^\s/?#:]+)", re.IGNORECASE)
+
+# Bits per item id in a pair key: a pair of ids (a, b) with a < b is counted
+# under the integer a << PAIR_SHIFT | b
+PAIR_SHIFT = 32
+PAIR_MASK = (1 << PAIR_SHIFT) - 1
+
+
+def extract_hashtags(text: str) -> List[str]:
+    """
+    Extract #hashtags from the given text, as written (without the "#").
+
+    :param text: The input text from which to extract hashtags.
+    :return: A list of hashtags found in the text.
+    """
+    if "#" not in text:
+        return []
+    return HASHTAG_PATTERN.findall(text)
+
+
+def extract_domains(text: str) -> List[str]:
+    """
+    Extract the domains of the http(s) URLs in the given text, lower-cased
+    and without a leading "www.".
+
+    :param text: The input text from which to extract domains.
+    :return: A list of domains, one per URL.
+    """
+    if "://" not in text:
+        return []
+    domains = []
+    for host in URL_HOST_PATTERN.findall(text):
+        host = host.lower().rstrip(".")
+        if host.startswith("www."):
+            host = host[4:]
+        if host:
+            domains.append(host)
+    return domains
+
+
+class PairCounter:
+    """
+    Counter of the unordered pairs of distinct items occurring together
+    (e.g. the users mentioned in the same tweet).
+
+    Items are interned as integer ids in order of first appearance and a
+    pair is counted under one integer key (see PAIR_SHIFT), so a pair costs
+    a small int and a dict slot rather than a tuple of two strings. Items
+    are only interned when they occur with another item. A group of n
+    distinct items still adds n * (n - 1) / 2 pairs; the content length
+    of a tweet keeps n small.
+
+    Pairs are kept in order of first appearance, like Counter keys; the
+    pairs of one group are ordered by the positions of their items in the
+    group, so merging per-shard counters in order gives the same order as
+    a sequential count.
+    """
+
+    def __init__(self):
+        self.ids: Dict[Hashable, int] = {}
+        self.items: List[Hashable] = []
+        self.counts = Counter()
+
+    def _intern(self, item: Hashable) -> int:
+        item_id = self.ids.get(item)
+        if item_id is None:
+            item_id = self.ids[item] = len(self.items)
+            self.items.append(item)
+        return item_id
+
+    def add(self, items: Iterable[Hashable]) -> None:
+        """Count every pair of distinct items of one group."""
+        distinct = dict.fromkeys(items)
+        if len(distinct) < 2:
+            return
+        ids = [self._intern(item) for item in distinct]
+        self.counts.update(
+            first << PAIR_SHIFT | second if first < second else second << PAIR_SHIFT | first
+            for index, first in enumerate(ids)
+            for second in ids[index + 1 :]
+        )
+
+    def pair(self, key: int) -> Tuple[Hashable, Hashable]:
+        """Decode a pair key into its items, in sorted order."""
+        first, second = self.items[key >> PAIR_SHIFT], self.items[key & PAIR_MASK]
+        return (first, second) if first <= second else (second, first)
+
+    def merge(self, other: "PairCounter") -> None:
+        """Add the counts of another PairCounter, whose ids may differ."""
+        counts = self.counts
+        for key, count in other.counts.items():
+            first = self._intern(other.items[key >> PAIR_SHIFT])
+            second = self._intern(other.items[key & PAIR_MASK])
+            if first > second:
+                first, second = second, first
+            counts[first << PAIR_SHIFT | second] += count
+
+    def most_common(
+        self, n: Optional[int] = None, ties: str = "first"
+    ) -> List[Tuple[Tuple[Hashable, Hashable], int]]:
+        """
+        Return the n most common pairs and their counts, most common first,
+        with ties broken as in topk.top_k ("key" compares the decoded pairs).
+        Only the returned pairs are decoded for the "first" rule.
+        """
+        if ties == "first":
+            selected = self.counts.most_common(n)
+        elif ties == "key":
+            rank = lambda item: (-item[1], self.pair(item[0]))
+            if n is None:
+                selected = sorted(self.counts.items(), key=rank)
+            else:
+                selected = heapq.nsmallest(n, self.counts.items(), key=rank)
+        else:
+            raise ValueError(
+                f"Unknown tie-breaking rule {ties!r}, expected one of {TIE_BREAKS}"
+            )
+        return [(self.pair(key), count) for key, count in selected]
+
+    def __len__(self) -> int:
+        return len(self.counts)
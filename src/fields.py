@@ -0,0 +1,53 @@
+import ujson as json
+from typing import Any, Dict, Optional, Sequence
+
+
+class FieldExtractor:
+    """
+    Extract a fixed set of dotted field paths from JSON lines.
+
+    Each line is parsed with `ujson.loads` and only the requested paths are
+    looked up, so every query defines the fields it reads in one place and
+    treats malformed lines the same way. (A regular-expression scanner that
+    located the keys without parsing the line was tried here and measured
+    slower than ujson on both short synthetic and ~2 KB real tweets.)
+    """
+
+    def __init__(self, paths: Sequence[str]):
+        self.paths = tuple(paths)
+        self._split_paths = [
+            (path, tuple(path.split("."))) for path in self.paths
+        ]
+
+    def extract(
+        self, line: bytes, start: int = 0, end: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Extract the configured fields from a single JSON line.
+
+        The line may be given as a span of a larger buffer (e.g. a memory
+        mapping), in which case only the span is copied.
+
+        :param line: The raw bytes of one line, or a buffer containing it.
+        :param start: Offset of the line in the buffer.
+        :param end: Offset just past the line (default is the buffer length).
+        :return: A dictionary mapping each path to its value (None when the
+            path is missing), or None if the line is not a JSON object.
+        :raises ValueError: If the line is not valid JSON.
+        """
+        if start or (end is not None and end != len(line)):
+            line = line[start:end]
+        tweet = json.loads(line)
+        if not isinstance(tweet, dict):
+            return None
+
+        record = {}
+        for path, keys in self._split_paths:
+            value = tweet
+            for key in keys:
+                if not isinstance(value, dict):
+                    value = None
+                    break
+                value = value.get(key)
+            record[path] = value
+        return record
@@ -0,0 +1,151 @@
+import os
+import pickle
+import hashlib
+import tempfile
+from typing import Dict, Optional
+
+from columnar import cache_path
+from engine import DateUserAggregator, EmojiAggregator, MentionAggregator, scan
+
+# Bump when the checkpoint layout or the aggregators change
+CHECKPOINT_VERSION = 4
+
+# Number of bytes before the checkpointed offset that are hashed to detect a
+# file that was rewritten rather than appended to
+SIGNATURE_BYTES = 4096
+EMPTY_SIGNATURE = hashlib.sha1(b"").hexdigest()
+
+
+def checkpoint_path(file_path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Return the default checkpoint location of a tweet file, next to its
+    columnar cache (see columnar.cache_path).
+    """
+    return os.path.splitext(cache_path(file_path, cache_dir))[0] + ".checkpoint"
+
+
+def _signature(file, offset: int) -> str:
+    start = max(0, offset - SIGNATURE_BYTES)
+    file.seek(start)
+    return hashlib.sha1(file.read(offset - start)).hexdigest()
+
+
+def _complete_end(file, start: int, size: int) -> int:
+    """
+    Return the offset just past the last newline in [start, size), so a line
+    that is still being written is left for the next update.
+    """
+    position = size
+    while position > start:
+        block = max(start, position - 65536)
+        file.seek(block)
+        newline = file.read(position - block).rfind(b"\n")
+        if newline >= 0:
+            return block + newline + 1
+        position = block
+    return start
+
+
+class IncrementalAnalyzer:
+    """
+    Keep q1, q2 and q3 up to date for a tweet file that is only appended to.
+
+    The aggregate state and the byte offset up to which the file has been
+    processed are persisted to a checkpoint, so each `update` only scans the
+    bytes appended since the previous one. A trailing line without a newline
+    is considered incomplete and left for the next update. If the file was
+    truncated or rewritten, the state is discarded and the file rescanned.
+
+    Usage:
+        analyzer = IncrementalAnalyzer("farmers-protest-tweets.json")
+        results = analyzer.update()  # {"q1": [...], "q2": [...], "q3": [...]}
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        checkpoint: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+    ):
+        self.file_path = file_path
+        self.checkpoint = checkpoint or checkpoint_path(file_path, cache_dir)
+        self._reset()
+        self._load()
+
+    def _reset(self) -> None:
+        self.offset = 0
+        self.signature = EMPTY_SIGNATURE
+        self.aggregators = {
+            "q1": DateUserAggregator(),
+            "q2": EmojiAggregator(),
+            "q3": MentionAggregator(),
+        }
+
+    def _load(self) -> None:
+        try:
+            with open(self.checkpoint, "rb") as file:
+                state = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return
+        if (
+            not isinstance(state, dict)
+            or state.get("version") != CHECKPOINT_VERSION
+            or state.get("source") != os.path.abspath(self.file_path)
+        ):
+            return
+        self.offset = state["offset"]
+        self.signature = state["signature"]
+        self.aggregators = state["aggregators"]
+
+    def save(self) -> None:
+        """Write the current state to the checkpoint file atomically."""
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "source": os.path.abspath(self.file_path),
+            "offset": self.offset,
+            "signature": self.signature,
+            "aggregators": self.aggregators,
+        }
+        directory = os.path.dirname(os.path.abspath(self.checkpoint))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.checkpoint)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def update(self, save: bool = True) -> Dict[str, list]:
+        """
+        Process the bytes appended since the last update and return the
+        current results.
+
+        :param save: Persist the new state to the checkpoint file.
+        :return: A dictionary with the "q1", "q2" and "q3" results, as
+            returned by engine.q_all.
+        """
+        with open(self.file_path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < self.offset or _signature(file, self.offset) != self.signature:
+                # Truncated or rewritten: start over
+                self._reset()
+            end = _complete_end(file, self.offset, size)
+            if end > self.offset:
+                scan(self.file_path, list(self.aggregators.values()), self.offset, end)
+                self.signature = _signature(file, end)
+                self.offset = end
+                if save:
+                    self.save()
+
+        return self.results()
+
+    def results(self) -> Dict[str, list]:
+        """Return the results for the data processed so far."""
+        return {
+            name: aggregator.result() for name, aggregator in self.aggregators.items()
+        }
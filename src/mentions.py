@@ -0,0 +1,70 @@
+import re
+from typing import List, Tuple
+
+from compact_counter import CompactCounter
+from fields import FieldExtractor
+from reader import LineReader
+
+# Twitter handle rules: 1 to 15 ASCII letters, digits or underscores. The "@"
+# must not follow a letter, digit or one of the characters Twitter treats as
+# part of a word (so e-mail addresses are skipped), and a longer run of handle
+# characters is not a mention at all.
+HANDLE_PATTERN = re.compile(
+    rb"(?<![A-Za-z0-9_!#$%&*@])@([A-Za-z0-9_]{1,15})(?![A-Za-z0-9_@])"
+)
+
+
+def extract_handles(content: bytes) -> List[bytes]:
+    """
+    Extract the mentioned handles from the UTF-8 bytes of a tweet's content.
+    Handles are lower-cased so different spellings of the same account are
+    merged.
+
+    :param content: The UTF-8 bytes of the content.
+    :return: A list of lower-cased handles, without the "@".
+    """
+    if b"@" not in content:
+        return []
+    return HANDLE_PATTERN.findall(content.lower())
+
+
+def q3_handles(file_path: str, k: int = 10) -> List[Tuple[str, int]]:
+    """
+    Analyze tweet data to find the top 10 most mentioned usernames, scanning
+    the UTF-8 bytes of each tweet's content and following Twitter's handle
+    rules (mentions of the same account with different casing are merged).
+
+    Lines without any "@" are skipped before their content is extracted.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param k: Number of results to return (default 10).
+    :return: A list of tuples, each containing a lower-cased username and its
+        mention count.
+    """
+    # Handles are interned into the counter's byte arena, as in q3_time
+    mention_counter = CompactCounter()
+    extractor = FieldExtractor(("content",))
+
+    try:
+        with LineReader(file_path) as reader:
+            for buffer, start, end in reader:
+                # Cheap pre-check: most tweets mention nobody
+                if buffer.find(b"@", start, end) < 0:
+                    continue
+                try:
+                    tweet = extractor.extract(buffer, start, end)
+                except ValueError:
+                    # Skip lines with JSON decode errors
+                    continue
+                content = tweet["content"] if tweet else None
+                if isinstance(content, str):
+                    for handle in extract_handles(content.encode("utf-8", "surrogatepass")):
+                        mention_counter.add(handle.decode("ascii"))
+    except FileNotFoundError:
+        print(f"Error: File not found - {file_path}")
+        return []
+    except IOError as e:
+        print(f"Error reading file {file_path}: {e}")
+        return []
+
+    return mention_counter.most_common(k)
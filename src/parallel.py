@@ -0,0 +1,149 @@
+import os
+import functools
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Type
+
+from compression import detect_compression
+from engine import DateUserAggregator, EmojiAggregator, MentionAggregator, scan
+
+
+def split_byte_ranges(file_path: str, parts: int) -> List[Tuple[int, int]]:
+    """
+    Split a file into contiguous byte ranges whose boundaries fall on the
+    start of a line.
+
+    :param file_path: Path to the JSON lines file.
+    :param parts: Desired number of ranges.
+    :return: A list of (start, end) byte offsets covering the whole file.
+    """
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return []
+
+    parts = max(1, min(parts, size))
+    boundaries = [0]
+    with open(file_path, "rb") as file:
+        for i in range(1, parts):
+            offset = size * i // parts
+            if offset <= boundaries[-1]:
+                continue
+            # Move the boundary forward to the start of the next line
+            file.seek(offset - 1)
+            file.readline()
+            offset = file.tell()
+            if offset >= size:
+                break
+            if offset > boundaries[-1]:
+                boundaries.append(offset)
+    boundaries.append(size)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _scan_range(
+    file_path: str, aggregator_types: Sequence[Type], start: int, end: int
+) -> list:
+    """
+    Worker entry point: scan one byte range into fresh partial aggregates.
+    """
+    return list(scan(file_path, [cls() for cls in aggregator_types], start, end))
+
+
+def parallel_scan(
+    file_path: str, aggregator_types: Sequence[Type], workers: Optional[int] = None
+) -> list:
+    """
+    Scan a file with a pool of worker processes, each handling one byte
+    range, and merge the partial aggregates.
+
+    Partial aggregates are merged in file order, so ties are broken exactly
+    as in a sequential scan.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param aggregator_types: Aggregator classes (or factories) to instantiate in every worker.
+    :param workers: Number of worker processes (default is the CPU count).
+    :return: One merged aggregator per entry of `aggregator_types`.
+    """
+    merged = [cls() for cls in aggregator_types]
+    if detect_compression(file_path) is not None:
+        # A compressed stream cannot be split into byte ranges
+        return list(scan(file_path, merged))
+
+    workers = workers or os.cpu_count() or 1
+    ranges = split_byte_ranges(file_path, workers)
+
+    if workers == 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            scan(file_path, merged, start, end)
+        return merged
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+        futures = [
+            executor.submit(_scan_range, file_path, aggregator_types, start, end)
+            for start, end in ranges
+        ]
+        for future in futures:
+            for aggregator, partial in zip(merged, future.result()):
+                aggregator.merge(partial)
+
+    return merged
+
+
+def _run(
+    file_path: str, aggregator_type: Type, workers: Optional[int], k: int
+) -> list:
+    try:
+        (aggregator,) = parallel_scan(
+            file_path, [functools.partial(aggregator_type, k=k)], workers
+        )
+    except FileNotFoundError:
+        print(f"Error: File not found - {file_path}")
+        return []
+    except IOError as e:
+        print(f"Error reading file {file_path}: {e}")
+        return []
+    return aggregator.result()
+
+
+def q1_parallel(
+    file_path: str, workers: Optional[int] = None, k: int = 10
+) -> List[Tuple[datetime.date, str]]:
+    """
+    Parallel version of q1: top 10 dates with the most tweets and the most
+    active user on each of them.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param workers: Number of worker processes (default is the CPU count).
+    :param k: Number of results to return (default 10).
+    :return: List of tuples, each containing a date and a username.
+    """
+    return _run(file_path, DateUserAggregator, workers, k)
+
+
+def q2_parallel(
+    file_path: str, workers: Optional[int] = None, k: int = 10
+) -> List[Tuple[str, int]]:
+    """
+    Parallel version of q2: top 10 most used emojis.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param workers: Number of worker processes (default is the CPU count).
+    :param k: Number of results to return (default 10).
+    :return: List of tuples, each containing an emoji and its count.
+    """
+    return _run(file_path, EmojiAggregator, workers, k)
+
+
+def q3_parallel(
+    file_path: str, workers: Optional[int] = None, k: int = 10
+) -> List[Tuple[str, int]]:
+    """
+    Parallel version of q3: top 10 most mentioned usernames.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param workers: Number of worker processes (default is the CPU count).
+    :param k: Number of results to return (default 10).
+    :return: List of tuples, each containing a username and its mention count.
+    """
+    return _run(file_path, MentionAggregator, workers, k)
@@ -0,0 +1,219 @@
+import os
+import queue
+import functools
+import datetime
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple, Type
+
+from compression import detect_compression
+from engine import DateUserAggregator, EmojiAggregator, MentionAggregator, scan, scan_spans
+from parallel import split_byte_ranges
+from reader import block_spans, iter_blocks
+
+# Size of the blocks handed from the reader stage to the parse workers
+BLOCK_SIZE = 8 * 1024 * 1024
+
+# Blocks buffered between the reader and the workers, per worker
+QUEUE_DEPTH = 2
+
+
+def _scan_block(block: bytes, aggregator_types: Sequence[Type]) -> list:
+    """
+    Worker entry point: parse one block into fresh partial aggregates.
+    """
+    return list(scan_spans(block_spans(block), [cls() for cls in aggregator_types]))
+
+
+def _scan_range(
+    file_path: str, aggregator_types: Sequence[Type], start: int, end: int
+) -> list:
+    """
+    Worker entry point: map the file and scan one byte range into fresh
+    partial aggregates.
+    """
+    return list(scan(file_path, [cls() for cls in aggregator_types], start, end))
+
+
+def _pool_context():
+    """
+    Start method of the worker processes. Workers are started lazily, while
+    the reader thread may already be running, and forking a process that
+    has other threads can deadlock (a lock held by the thread stays locked
+    in the child), so they are forked from a fork server where available.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+def _read_ahead(file_path: str, block_size: int, depth: int) -> Iterator[bytes]:
+    """
+    Reader stage: read (and decompress) blocks on a background thread into a
+    bounded queue, so I/O overlaps with parsing and stalls when the
+    consumers fall behind.
+    """
+    blocks = queue.Queue(depth)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for block in iter_blocks(file_path, block_size):
+                if stop.is_set():
+                    break
+                blocks.put(block)
+            blocks.put(done)
+        except BaseException as error:
+            blocks.put(error)
+
+    thread = threading.Thread(target=produce, name="pipeline-reader", daemon=True)
+    thread.start()
+    try:
+        while True:
+            block = blocks.get()
+            if block is done:
+                return
+            if isinstance(block, BaseException):
+                raise block
+            yield block
+    finally:
+        # Unblock the reader if the consumer stopped early
+        stop.set()
+        while thread.is_alive():
+            try:
+                blocks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        thread.join()
+
+
+def pipeline_scan(
+    file_path: str,
+    aggregator_types: Sequence[Type],
+    workers: Optional[int] = None,
+    block_size: int = BLOCK_SIZE,
+) -> list:
+    """
+    Scan a file as a pipeline of three stages connected by bounded queues:
+    a reader producing blocks of whole lines, a pool of worker processes
+    parsing them into partial aggregates, and this thread merging the
+    partial aggregates in file order (so ties are broken exactly as in a
+    sequential scan).
+
+    A plain file is cut into byte ranges of about `block_size` bytes and
+    only the offsets are sent to the workers, which map the file and read
+    their range themselves (as in parallel.parallel_scan). A compressed
+    stream can only be read sequentially, so a reader thread decompresses
+    it and the blocks themselves are sent to the workers: unlike
+    parallel.parallel_scan, compressed input is parallelized too.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param aggregator_types: Aggregator classes (or factories) to instantiate for every block.
+    :param workers: Number of worker processes (default is the CPU count). With
+        a single worker, blocks are parsed on this thread (while the reader
+        thread reads ahead, for compressed input).
+    :param block_size: Approximate size of each block in bytes.
+    :return: One merged aggregator per entry of `aggregator_types`.
+    """
+    workers = workers or os.cpu_count() or 1
+    merged = [cls() for cls in aggregator_types]
+    compressed = detect_compression(file_path) is not None
+
+    if workers == 1:
+        if compressed:
+            for block in _read_ahead(file_path, block_size, QUEUE_DEPTH):
+                scan_spans(block_spans(block), merged)
+        else:
+            scan(file_path, merged)
+        return merged
+
+    # The pool is created before the reader thread is started (the blocks
+    # generator starts it on first use)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as executor:
+        if compressed:
+            blocks = _read_ahead(file_path, block_size, QUEUE_DEPTH * workers)
+            tasks = ((_scan_block, block, aggregator_types) for block in blocks)
+        else:
+            size = os.path.getsize(file_path)
+            ranges = split_byte_ranges(file_path, -(-size // block_size))
+            tasks = (
+                (_scan_range, file_path, aggregator_types, start, end)
+                for start, end in ranges
+            )
+        pending = deque()
+
+        def merge_oldest():
+            for aggregator, partial in zip(merged, pending.popleft().result()):
+                aggregator.merge(partial)
+
+        for function, *args in tasks:
+            pending.append(executor.submit(function, *args))
+            # Backpressure: at most a few blocks in flight per worker
+            if len(pending) >= QUEUE_DEPTH * workers:
+                merge_oldest()
+        while pending:
+            merge_oldest()
+
+    return merged
+
+
+def _run(
+    file_path: str, aggregator_type: Type, workers: Optional[int], k: int
+) -> list:
+    try:
+        (aggregator,) = pipeline_scan(
+            file_path, [functools.partial(aggregator_type, k=k)], workers
+        )
+    except FileNotFoundError:
+        print(f"Error: File not found - {file_path}")
+        return []
+    except IOError as e:
+        print(f"Error reading file {file_path}: {e}")
+        return []
+    return aggregator.result()
+
+
+def q1_pipeline(
+    file_path: str, workers: Optional[int] = None, k: int = 10
+) -> List[Tuple[datetime.date, str]]:
+    """
+    Pipelined version of q1: top 10 dates with the most tweets and the most
+    active user on each of them.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param workers: Number of worker processes (default is the CPU count).
+    :param k: Number of results to return (default 10).
+    :return: List of tuples, each containing a date and a username.
+    """
+    return _run(file_path, DateUserAggregator, workers, k)
+
+
+def q2_pipeline(
+    file_path: str, workers: Optional[int] = None, k: int = 10
+) -> List[Tuple[str, int]]:
+    """
+    Pipelined version of q2: top 10 most used emojis.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param workers: Number of worker processes (default is the CPU count).
+    :param k: Number of results to return (default 10).
+    :return: List of tuples, each containing an emoji and its count.
+    """
+    return _run(file_path, EmojiAggregator, workers, k)
+
+
+def q3_pipeline(
+    file_path: str, workers: Optional[int] = None, k: int = 10
+) -> List[Tuple[str, int]]:
+    """
+    Pipelined version of q3: top 10 most mentioned usernames.
+
+    :param file_path: Path to the JSON lines file containing tweet data.
+    :param workers: Number of worker processes (default is the CPU count).
+    :param k: Number of results to return (default 10).
+    :return: List of tuples, each containing a username and its mention count.
+    """
+    return _run(file_path, MentionAggregator, workers, k)
@@ -3,6 +3,8 @@ from datetime import datetime, date
 from collections import defaultdict, Counter
 from typing import List, Tuple
 
+from compression import open_text
+
 
 def load_json_lines(file_path: str):
     """
@@ -14,7 +16,7 @@ def load_json_lines(file_path: str):
     :return: List of parsed JSON objects
     """
     data = []
-    with open(file_path, "r", encoding="utf-8") as file:
+    with open_text(file_path, encoding="utf-8") as file:
         for line in file:
             try:
                 data.append(json.loads(line))
@@ -1,17 +1,39 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Union
 import datetime
-import json
-from heapq import heappush, heappushpop
-from collections import defaultdict
 
-
-def q1_memory(file_path: str) -> List[Tuple[datetime.date, str]]:
+from days import DayBucketer, TimezoneLike, day_key, key_date
+from fields import FieldExtractor
+from reader import LineReader
+from spill import SpillingCounter, entries_for_budget
+from topk import top_k
+from validation import LineValidator, MalformedLineError, finish, resolve_validator
+
+
+def q1_memory(
+    file_path: str,
+    max_memory_mb: float = 64,
+    k: int = 10,
+    timezone: Optional[TimezoneLike] = None,
+    validation: Optional[Union[str, LineValidator]] = None,
+) -> List[Tuple[datetime.date, str]]:
     """
     This function processes a JSON file containing tweet data and determines the top 10 dates with the most tweets.
     For each of these dates, it identifies the user with the most tweets.
 
+    The file is read once. Tweet counts per (date, user) pair are kept in a
+    counter that spills sorted runs to temporary files when it outgrows
+    `max_memory_mb`, and the runs are merged at the end. Ties are broken like
+    q1_baseline: dates by first appearance, users by their first tweet on
+    that date.
+
     Parameters:
     file_path (str): The path to the JSON file containing tweet data.
+    max_memory_mb (float): Approximate memory budget for the per-user counts.
+    k (int): Number of dates to return (default 10).
+    timezone (tzinfo or str, optional): Count local days in this time zone instead of the
+        dates as written in the timestamps (see days.DayBucketer).
+    validation (str or LineValidator, optional): What to do with lines that cannot be used
+        ("skip", "count", "fail" or a LineValidator, see validation.resolve_validator).
 
     Returns:
     List[Tuple[datetime.date, str]]: A list of tuples where each tuple contains:
@@ -19,95 +41,73 @@ def q1_memory(file_path: str) -> List[Tuple[datetime.date, str]]:
         - The username (str) with the most tweets on that date.
     """
 
-    # Dictionary to store the total number of tweets per date
+    # Packed day key of each timestamp (see days.day_key)
+    day_of = day_key if timezone is None else DayBucketer(timezone)
+
+    # Total number of tweets per date, in order of first appearance
     date_total_tweets = {}
 
-    # Min-heap to keep track of the top 10 dates with the most tweets
-    top_10_heap = []
+    # Tweets per (date, username), spilled to disk beyond the memory budget
+    date_user_tweets = SpillingCounter(entries_for_budget(max_memory_mb))
 
-    # Size of the chunk to process in each iteration (1 million tweets)
-    chunk_size = 1000000
+    # Only the date and the username are decoded from each line
+    extractor = FieldExtractor(("date", "user.username"))
+
+    validator = resolve_validator(validation)
+    reject = validator.reject if validator is not None else None
 
     try:
-        # Open the JSON file
-        with open(file_path, "r", encoding="utf-8") as file:
-            while True:
-                # Dictionary to store tweet counts per user per date in the current chunk
-                chunk = defaultdict(lambda: defaultdict(int))
-
-                # Process a chunk of tweets
-                for _ in range(chunk_size):
-                    line = file.readline()
-                    if not line:  # Break if end of file is reached
-                        break
-
-                    try:
-                        tweet = json.loads(line)  # Parse the tweet
-                        date_str = tweet.get("date")  # Extract the tweet date
-                        username = tweet.get("user", {}).get(
-                            "username"
-                        )  # Extract the username
-
-                        if date_str and username:
-                            # Convert the date string to a date object
-                            date = datetime.datetime.strptime(
-                                date_str, "%Y-%m-%dT%H:%M:%S%z"
-                            ).date()
-                            # Increment the user's tweet count for the date
-                            chunk[date][username] += 1
-                    except (json.JSONDecodeError, ValueError):
-                        # Ignore malformed lines or invalid data
-                        continue
-
-                # Update the top 10 dates with the most tweets and their counts
-                for date, user_counts in chunk.items():
-                    total_tweets = sum(user_counts.values())
-                    date_total_tweets[date] = (
-                        date_total_tweets.get(date, 0) + total_tweets
-                    )
-
-                    if len(top_10_heap) < 10:
-                        # Push the date onto the heap if there are fewer than 10 dates
-                        heappush(top_10_heap, (date_total_tweets[date], date))
-                    elif date_total_tweets[date] > top_10_heap[0][0]:
-                        # Replace the smallest element if the current date has more tweets
-                        heappushpop(top_10_heap, (date_total_tweets[date], date))
-
-                # Clear the chunk to free memory before processing the next chunk
-                chunk.clear()
-
-                if not line:  # End of file check
-                    break
-
-        if not top_10_heap:
+        # Map the JSON file; lines are read in place from the mapping
+        with LineReader(file_path) as reader:
+            for buffer, start, end in reader:
+                try:
+                    tweet = extractor.extract(buffer, start, end)  # Parse the tweet
+                except ValueError:
+                    # Ignore malformed lines
+                    if reject is not None:
+                        reject("invalid_json", buffer, start, end)
+                    continue
+                if tweet is None:
+                    if reject is not None:
+                        reject("not_an_object", buffer, start, end)
+                    continue
+
+                day = day_of(tweet["date"])
+                username = tweet["user.username"]  # Extract the username
+                if day is not None and username:
+                    date_total_tweets[day] = date_total_tweets.get(day, 0) + 1
+                    date_user_tweets.add((day, username))
+                elif reject is not None:
+                    reject("missing_field", buffer, start, end)
+
+        if not date_total_tweets:
             print("No valid data found in the file.")
             return []
 
-        # Find the most active user on each of the top 10 dates
-        result = []
-        for _, date in sorted(top_10_heap, reverse=True):
-            with open(file_path, "r", encoding="utf-8") as file:
-                user_counts = defaultdict(int)
-                for line in file:
-                    try:
-                        tweet = json.loads(line)
-                        tweet_date = datetime.datetime.strptime(
-                            tweet["date"], "%Y-%m-%dT%H:%M:%S%z"
-                        ).date()
-                        if tweet_date == date:
-                            user_counts[tweet["user"]["username"]] += 1
-                    except (json.JSONDecodeError, KeyError, ValueError):
-                        continue
-                top_user = max(user_counts, key=user_counts.get)
-                result.append((date, top_user))
-
-        return result
+        # Top k dates; earlier dates win ties
+        top_dates = [date for date, _ in top_k(date_total_tweets, k)]
+
+        # Merge the sorted runs, keeping the most active user of each top date
+        top_users = dict.fromkeys(top_dates)
+        for (date, username), count, first in date_user_tweets.items():
+            if date not in top_users:
+                continue
+            best = top_users[date]
+            if best is None or count > best[0] or (count == best[0] and first < best[1]):
+                top_users[date] = (count, first, username)
+
+        return [(key_date(date), top_users[date][2]) for date in top_dates]
 
     except FileNotFoundError:
         print(f"File not found: {file_path}")
     except IOError as e:
         print(f"Error reading file {file_path}: {e}")
+    except MalformedLineError:
+        raise
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+    finally:
+        date_user_tweets.close()
+        finish(validator, validation)
 
     return []
@@ -0,0 +1,136 @@
+from typing import List, Tuple
+import datetime
+
+import numpy as np
+
+from columnar import open_cache
+from days import day_key, key_date
+from fields import FieldExtractor
+from reader import LineReader
+
+
+def top_dates_vectorized(
+    days: np.ndarray, users: np.ndarray, k: int = 10
+) -> List[Tuple[int, int]]:
+    """
+    Find the top k days by number of tweets and the most active user on each,
+    using vectorized operations over integer-encoded rows.
+
+    Ties are broken like q1_baseline: dates by first appearance in the input,
+    and users by their first tweet on that date.
+
+    :param days: One integer day key per tweet.
+    :param users: One integer user id per tweet.
+    :param k: Number of dates to return.
+    :return: List of (day key, user id) pairs, most active date first.
+    """
+    if len(days) == 0:
+        return []
+
+    # Dense day ids with the row of their first appearance
+    day_keys, day_first, day_ids = np.unique(
+        days, return_index=True, return_inverse=True
+    )
+    day_ids = day_ids.reshape(-1)
+    day_counts = np.bincount(day_ids)
+    top_days = np.lexsort((day_first, -day_counts))[:k]
+
+    # Count every (day, user) pair on the selected days only
+    selected = np.isin(day_ids, top_days)
+    n_users = int(users.max()) + 1
+    pairs = day_ids[selected].astype(np.int64) * n_users + users[selected]
+    rows = np.flatnonzero(selected)
+    pair_keys, pair_first, pair_counts = np.unique(
+        pairs, return_index=True, return_counts=True
+    )
+    pair_days = pair_keys // n_users
+    pair_users = pair_keys % n_users
+    pair_first = rows[pair_first]
+
+    # Per day: highest count first, then earliest first tweet
+    order = np.lexsort((pair_first, -pair_counts, pair_days))
+    is_first = np.ones(len(order), dtype=bool)
+    is_first[1:] = pair_days[order][1:] != pair_days[order][:-1]
+    best = order[is_first]
+    top_user = dict(zip(pair_days[best].tolist(), pair_users[best].tolist()))
+
+    return [(int(day_keys[day]), top_user[int(day)]) for day in top_days]
+
+
+def q1_numpy(file_path: str, k: int = 10) -> List[Tuple[datetime.date, str]]:
+    """
+    This function processes a JSON file containing tweet data and determines the top 10 dates with the most tweets.
+    For each of these dates, it identifies the user with the most tweets.
+
+    Days are packed integer keys (see days.day_key) and usernames are interned
+    into integer ids while scanning; the rows are collected with np.fromiter
+    and the aggregation is done with NumPy. When a valid columnar cache of the
+    file exists (see columnar.build_cache) its columns are used directly.
+
+    Parameters:
+    file_path (str): The path to the JSON file containing tweet data.
+    k (int): Number of dates to return (default 10).
+
+    Returns:
+    List[Tuple[datetime.date, str]]: A list of tuples where each tuple contains:
+        - The date (datetime.date) with a significant number of tweets.
+        - The username (str) with the most tweets on that date.
+    """
+
+    cache = open_cache(file_path)
+    if cache is not None:
+        with cache:
+            days = np.frombuffer(cache.days, dtype=np.int32)
+            users = np.frombuffer(cache.users, dtype=np.int32)
+            valid = (days >= 0) & (users >= 0)
+            result = [
+                (cache.date(day), cache.username(user))
+                for day, user in top_dates_vectorized(days[valid], users[valid], k)
+            ]
+            del days, users, valid
+        return result
+
+    # Only the date and the username are extracted from each line
+    extract = FieldExtractor(("date", "user.username")).extract
+
+    # Interned usernames, in order of first appearance
+    user_ids = {}
+
+    def values(reader):
+        # The day key and user id of each tweet, flattened for np.fromiter
+        for buffer, start, end in reader:
+            try:
+                tweet = extract(buffer, start, end)
+            except ValueError:
+                # If a tweet is malformed, skip it
+                continue
+            if tweet is None:
+                continue
+            day = day_key(tweet["date"])
+            username = tweet["user.username"]
+            if day is None or not username:
+                # If a tweet lacks the necessary data, skip it
+                continue
+            user = user_ids.get(username)
+            if user is None:
+                user = user_ids[username] = len(user_ids)
+            yield day
+            yield user
+
+    try:
+        with LineReader(file_path) as reader:
+            rows = np.fromiter(values(reader), dtype=np.int32).reshape(-1, 2)
+    except FileNotFoundError:
+        print(f"Error: File not found - {file_path}")
+        return []
+    except IOError as e:
+        print(f"Error reading file {file_path}: {e}")
+        return []
+
+    if not len(rows):
+        print("No valid tweet data found.")
+        return []
+
+    usernames = list(user_ids)
+    top = top_dates_vectorized(rows[:, 0], rows[:, 1], k)
+    return [(key_date(day), usernames[user]) for day, user in top]
@@ -1,18 +1,109 @@
-from typing import List, Tuple
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Tuple, Union
+from collections import Counter
 import datetime
-import ujson as json
-import re
-from heapq import heappush, heappushpop
-from collections import defaultdict
+import functools
+import time
+from columnar import open_cache
+from compact_counter import GROUP_BUFFER_SIZE, CompactCounter
+from days import TimezoneLike
+from q1_memory import q1_memory
+from shards import Source, is_multi, multi_query
+from stats import ScanStats
+from topk import GroupTopK
+from validation import LineValidator, MalformedLineError, finish, resolve_validator
+
+# Factory of the per-date user counters: there is one per date, so each
+# buffers few keys before moving them to its arena
+DATE_COUNTER = functools.partial(CompactCounter, buffer_size=GROUP_BUFFER_SIZE)
+
+
+def top_dates(
+    date_users: Iterable[Tuple[Hashable, Hashable]],
+    stats: Optional[ScanStats] = None,
+    k: int = 10,
+    counter: Callable[[], Any] = Counter,
+) -> List[Tuple[Hashable, Hashable]]:
+    """
+    Determine the top k dates with the most tweets and the user with the most
+    tweets on each of them.
+
+    Ties are broken like q1_baseline: dates by first appearance, and users by
+    their first tweet on that date.
 
+    Parameters:
+    date_users (Iterable[Tuple[Hashable, Hashable]]): One (date, user) pair per tweet.
+    stats (ScanStats, optional): If given, receives the result stage timing and structure sizes.
+    k (int): Number of dates to return.
+    counter (callable): Factory of the per-date user counters; CompactCounter for string users.
 
-def q1_time(file_path: str) -> List[Tuple[datetime.date, str]]:
+    Returns:
+    List[Tuple[Hashable, Hashable]]: The (date, user) pairs of the result, as given in the input.
+    """
+
+    # Tweet counts per date and per user on each date
+    date_user_count = GroupTopK(None, (), k, counter=counter)
+    add = date_user_count.add
+
+    for date, username in date_users:
+        add(date, username)
+
+    if stats is not None:
+        result_start = time.perf_counter()
+
+    # Select the top dates and the most active user on each of them
+    result = [(date, users[0][0]) for date, users in date_user_count.result()]
+
+    if stats is not None:
+        stats.seconds["result"] += time.perf_counter() - result_start
+        stats.sizes["dates"] = len(date_user_count.totals)
+        stats.sizes["date_users"] = sum(
+            len(users) for users in date_user_count.groups.values()
+        )
+
+    return result
+
+
+def q1_time(
+    file_path: Source,
+    stats: Optional[ScanStats] = None,
+    start_date: Optional[Union[datetime.date, str]] = None,
+    end_date: Optional[Union[datetime.date, str]] = None,
+    users: Optional[Iterable[str]] = None,
+    k: int = 10,
+    timezone: Optional[TimezoneLike] = None,
+    validation: Optional[Union[str, LineValidator]] = None,
+    max_memory_mb: Optional[float] = None,
+) -> List[Tuple[datetime.date, str]]:
     """
     This function processes a JSON file containing tweet data and determines the top 10 dates with the most tweets.
-    For each of these dates, it identifies the user with the most tweets.
+    For each of these dates, it identifies the user with the most tweets. Ties are broken like q1_baseline.
+
+    Days are derived from the first 10 characters of each timestamp as packed integers
+    (see days.day_key) and only the returned dates are converted to datetime.date.
+
+    When a valid columnar cache of the file exists (see columnar.build_cache) it is
+    used instead of parsing the JSON.
 
     Parameters:
-    file_path (str): The path to the JSON file containing tweet data.
+    file_path (str or list of str): The path to the JSON file containing tweet data, or a
+        directory, glob pattern or list of shard files, scanned concurrently (see shards.multi_scan).
+    stats (ScanStats, optional): If given, filled in with counters and per-stage timings
+        (single files without filters, ValueError otherwise).
+    start_date, end_date (date or str, optional): Only count tweets posted between these dates
+        (inclusive); only the matching byte ranges are read, using the date index of the file.
+    users (Iterable[str], optional): Only count tweets posted by these users.
+    k (int): Number of dates to return (default 10).
+    timezone (tzinfo or str, optional): Count local days in this time zone ("UTC", "-03:00",
+        "America/Santiago", ...) instead of the dates as written in the timestamps. Date
+        filters still apply to the dates as written.
+    validation (str or LineValidator, optional): What to do with lines that cannot be used
+        ("skip", "count", "fail" or a LineValidator, see validation.resolve_validator); lines are
+        then read from the file rather than the columnar cache (single files without
+        filters, ValueError otherwise).
+    max_memory_mb (float, optional): Bound the memory used by the counts: the file is then
+        scanned by q1_memory, which spills partial counts to sorted runs on disk beyond the
+        budget and merges them at the end (single files without filters; stats are not
+        collected).
 
     Returns:
     List[Tuple[datetime.date, str]]: A list of tuples where each tuple contains:
@@ -20,69 +111,86 @@ def q1_time(file_path: str) -> List[Tuple[datetime.date, str]]:
         - The username (str) with the most tweets on that date.
     """
 
-    # Regular expression to extract the date part from the timestamp
-    date_pattern = re.compile(r"(\d{4}-\d{2}-\d{2})T")
-
-    # Dictionary to track the tweet count for each user on each date
-    date_user_count = defaultdict(lambda: defaultdict(int))
-
-    # Dictionary to track the total number of tweets for each date
-    date_total_tweets = defaultdict(int)
-
-    # Min-heap to keep track of the top 10 dates with the most tweets
-    top_10_heap = []
-
+    filtered = start_date is not None or end_date is not None or users is not None
+    multi = is_multi(file_path)
+    if (filtered or multi) and (stats is not None or validation is not None):
+        raise ValueError("stats and validation are only supported for single files without filters")
+    if max_memory_mb is not None:
+        if filtered or multi:
+            raise ValueError("max_memory_mb is only supported for single files without filters")
+        return q1_memory(file_path, max_memory_mb, k, timezone, validation)
+
+    if multi:
+        # Imported here: the engine depends on this module
+        from engine import DateUserAggregator
+
+        return multi_query(
+            file_path,
+            functools.partial(DateUserAggregator, timezone=timezone),
+            start_date,
+            end_date,
+            users,
+            k,
+        )
+
+    if filtered:
+        # Imported here: the engine depends on this module
+        from date_index import filtered_query
+        from engine import DateUserAggregator
+
+        return filtered_query(
+            file_path,
+            functools.partial(DateUserAggregator, timezone=timezone),
+            start_date,
+            end_date,
+            users,
+            k,
+        )
+
+    validator = resolve_validator(validation)
+
+    # The cache only holds the dates as written, and only the valid lines
+    cache = open_cache(file_path) if timezone is None and validator is None else None
+    if cache is not None:
+        with cache:
+            if stats is not None:
+                stats.source = "cache"
+            return [
+                (cache.date(day), cache.username(user))
+                for day, user in top_dates(cache.date_user_pairs(), k=k)
+            ]
+
+    # Imported here: the engine depends on this module
+    from engine import DateUserAggregator, scan
+
+    # Only the date and the username are extracted from each line, and days
+    # are packed day keys in the requested time zone
+    aggregator = DateUserAggregator(k, timezone=timezone, counter=DATE_COUNTER)
     try:
         # Open the JSON file for reading
-        with open(file_path, "r", encoding="utf-8") as file:
-            # Process each line (tweet) in the file
-            for line in file:
-                if line.strip():  # Skip empty lines
-                    try:
-                        # Parse the JSON line into a dictionary
-                        tweet = json.loads(line)
-
-                        # Extract the date from the tweet's timestamp
-                        date_match = date_pattern.match(tweet["date"])
-                        username = tweet["user"]["username"]
-
-                        if date_match and username:
-                            date = date_match.group(
-                                1
-                            )  # Extract the date string (YYYY-MM-DD)
-                            user_count = date_user_count[date]
-
-                            # Increment the tweet count for this user on the given date
-                            user_count[username] += 1
-                            date_total_tweets[date] += 1
-                            total_tweets = date_total_tweets[date]
-
-                            # Maintain the top 10 dates with the most tweets using a heap
-                            if len(top_10_heap) < 10:
-                                heappush(top_10_heap, (total_tweets, date))
-                            elif total_tweets > top_10_heap[0][0]:
-                                heappushpop(top_10_heap, (total_tweets, date))
-                    except (KeyError, AttributeError):
-                        # If a tweet is malformed or lacks the necessary data, skip it
-                        continue
+        scan(file_path, [aggregator], stats=stats, validation=validator)
     except FileNotFoundError:
         print(f"Error: File not found - {file_path}")
         return []
+    except MalformedLineError:
+        raise
     except Exception as ex:
         print(f"An unexpected error occurred: {ex}")
         return []
-
-    if not top_10_heap:
+    finally:
+        finish(validator, validation)
+
+    # Select the top dates and the most active user on each of them
+    if stats is not None:
+        with stats.stage("result"):
+            result = aggregator.result()
+        stats.sizes["dates"] = len(aggregator.totals)
+        stats.sizes["date_users"] = sum(len(users) for users in aggregator.groups.values())
+    else:
+        result = aggregator.result()
+
+    if not result:
         print("No valid tweet data found.")
         return []
 
-    # Sort the heap to find the top 10 dates and their respective top users
-    result = []
-    for _, date in sorted(top_10_heap, reverse=True):
-        user_counts = date_user_count[date]
-
-        # Find the user with the most tweets on this date
-        top_user = max(user_counts, key=user_counts.get)
-        result.append((datetime.date.fromisoformat(date), top_user))
-
     return result
@@ -1,66 +1,81 @@
-import re
-import ujson as json
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Union
 from collections import Counter  
 
-# Compile emoji pattern to match various emoji ranges
-EMOJI_PATTERN = re.compile(
-    "["  
-        "\U0001F600-\U0001F64F"  # Emoticons
-        "\U0001F300-\U0001F5FF"  # Symbols & Pictographs
-        "\U0001F680-\U0001F6FF"  # Transport & Map Symbols
-        "\U0001F700-\U0001F77F"  # Alchemical Symbols
-        "\U0001F780-\U0001F7FF"  # Geometric Shapes Extended
-        "\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
-        "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-        "\U0001FA00-\U0001FA6F"  # Chess Symbols, etc.
-        "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-        "\U00002702-\U000027B0"  # Dingbats
-        "\U000024C2-\U0001F251"  # Enclosed Characters
-    "]+", 
-    flags=re.UNICODE
-)
+from emojis import extract_emojis
+from fields import FieldExtractor
+from reader import LineReader
+from sketches import Estimate, HeavyHitters
+from spill import SpillingCounter, entries_for_budget
+from validation import LineValidator, MalformedLineError, finish, resolve_validator
 
-def extract_emojis(text: str) -> List[str]:
-    """
-    Extract emojis from the given text using the compiled regex pattern.
-    
-    :param text: The input text from which to extract emojis.
-    :return: A list of emojis found in the text.
-    """
-    return EMOJI_PATTERN.findall(text)
-
-def q2_memory(file_path: str) -> List[Tuple[str, int]]:
+def q2_memory(
+    file_path: str,
+    approximate: bool = False,
+    capacity: int = 1000,
+    epsilon: float = 1e-4,
+    delta: float = 1e-3,
+    k: int = 10,
+    validation: Optional[Union[str, LineValidator]] = None,
+    max_memory_mb: Optional[float] = None,
+) -> Union[List[Tuple[str, int]], List[Estimate]]:
     """
     Analyze tweet data to find the top 10 most used emojis.
+
+    With `approximate`, counts are kept in a fixed amount of memory instead
+    of one counter per distinct item: a Space-Saving summary of the most
+    frequent items plus a Count-Min sketch (see sketches.HeavyHitters).
     
     :param file_path: Path to the JSON lines file containing tweet data.
+    :param approximate: Use bounded-memory approximate counting.
+    :param capacity: Number of items monitored in approximate mode.
+    :param epsilon: Count-Min error bound, as a fraction of all occurrences.
+    :param delta: Probability that the Count-Min error bound does not hold.
+    :param k: Number of results to return (default 10).
+    :param validation: What to do with lines that cannot be used ("skip",
+        "count", "fail" or a LineValidator, see validation.resolve_validator).
+    :param max_memory_mb: Approximate memory budget for the exact counts:
+        beyond it, counts are spilled to sorted runs on disk and merged at the
+        end (see spill.SpillingCounter). Unbounded by default.
     :return: List of tuples, each containing an emoji and its count.
+        In approximate mode, a list of sketches.Estimate (item, count, lower,
+        upper) where the true count lies in [lower, upper].
     """
     emoji_counter = Counter()  # Counter to store emoji counts
+    if approximate:
+        emoji_counter = HeavyHitters(capacity, epsilon, delta)
+    elif max_memory_mb is not None:
+        # Exact counts within a memory budget, spilled to disk beyond it
+        emoji_counter = SpillingCounter(entries_for_budget(max_memory_mb))
 
-    try:
-        # Open the file and process it line by line
-        with open(file_path, 'r', encoding='utf-8') as file:
-            for line in file:
-                if not line.strip():  # Skip empty lines
-                    continue
+    validator = resolve_validator(validation)
+    reject = validator.reject if validator is not None else None
 
+    try:
+        # Map the file and process it line by line: lines are read in place
+        # from the mapping and only the content is decoded
+        extractor = FieldExtractor(('content',))
+        with LineReader(file_path) as reader:
+            for buffer, start, end in reader:
                 try:
-                    tweet = json.loads(line)
-                    content = tweet.get('content', '')
-
-                    if content:  # Only process if content is not empty
-                        emojis = extract_emojis(content)  # Extract emojis from content
-                        emoji_counter.update(emojis)  # Update emoji counts
-
-                except json.JSONDecodeError:
-                    # Silently skip lines with JSON decode errors
+                    tweet = extractor.extract(buffer, start, end)
+                except ValueError:
+                    # Skip lines with JSON decode errors
+                    if reject is not None:
+                        reject("invalid_json", buffer, start, end)
                     continue
+                content = tweet['content'] if tweet else None
 
-        # Get the top 10 most used emojis
-        top_10_emojis = emoji_counter.most_common(10)
-        return top_10_emojis
+                if content and isinstance(content, str):  # Only process if content is not empty
+                    emojis = extract_emojis(content)  # Extract emojis from content
+                    emoji_counter.update(emojis)  # Update emoji counts
+                elif reject is not None and not isinstance(content, str):
+                    # An empty content is valid, a missing one is not
+                    reason = "missing_field" if tweet is not None else "not_an_object"
+                    reject(reason, buffer, start, end)
+
+        # Get the top k most used emojis
+        top_emojis = emoji_counter.most_common(k)
+        return top_emojis
 
     except FileNotFoundError:
         # Handle file not found error
@@ -68,8 +83,14 @@ def q2_memory(file_path: str) -> List[Tuple[str, int]]:
     except IOError as e:
         # Handle other I/O errors
         print(f"Error reading file {file_path}: {e}")
+    except MalformedLineError:
+        raise
     except Exception as ex:
         # Handle any other unexpected errors
         print(f"An unexpected error occurred: {ex}")
-    
+    finally:
+        if isinstance(emoji_counter, SpillingCounter):
+            emoji_counter.close()
+        finish(validator, validation)
+
     return []
\ No newline at end of file
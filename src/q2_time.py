@@ -1,74 +1,95 @@
-import re
-import ujson as json
-from typing import List, Tuple
+import datetime
+from typing import Iterable, List, Optional, Tuple, Union
 from collections import Counter
 
-# Compile emoji pattern to match various emoji ranges
-EMOJI_PATTERN = re.compile(
-    "["  
-        "\U0001F600-\U0001F64F"  # Emoticons
-        "\U0001F300-\U0001F5FF"  # Symbols & Pictographs
-        "\U0001F680-\U0001F6FF"  # Transport & Map Symbols
-        "\U0001F700-\U0001F77F"  # Alchemical Symbols
-        "\U0001F780-\U0001F7FF"  # Geometric Shapes Extended
-        "\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
-        "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-        "\U0001FA00-\U0001FA6F"  # Chess Symbols, etc.
-        "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-        "\U00002702-\U000027B0"  # Dingbats
-        "\U000024C2-\U0001F251"  # Enclosed Characters
-    "]+", 
-    flags=re.UNICODE
-)
+from columnar import open_cache
+from emojis import extract_emojis
+from q2_memory import q2_memory
+from shards import Source, is_multi, multi_query
+from stats import ScanStats
+from topk import top_k
+from validation import LineValidator, MalformedLineError, finish, resolve_validator
 
-def extract_emojis(text: str) -> List[str]:
-    """
-    Extract emojis from the given text using the compiled regex pattern.
-    
-    :param text: The input text from which to extract emojis.
-    :return: A list of emojis found in the text.
-    """
-    return EMOJI_PATTERN.findall(text)
-
-def q2_time(file_path: str) -> List[Tuple[str, int]]:
+def q2_time(
+    file_path: Source,
+    stats: Optional[ScanStats] = None,
+    start_date: Optional[Union[datetime.date, str]] = None,
+    end_date: Optional[Union[datetime.date, str]] = None,
+    users: Optional[Iterable[str]] = None,
+    k: int = 10,
+    validation: Optional[Union[str, LineValidator]] = None,
+    max_memory_mb: Optional[float] = None,
+) -> List[Tuple[str, int]]:
     """
     Analyze tweet data to find the top 10 most used emojis.
+
+    When a valid columnar cache of the file exists (see columnar.build_cache)
+    the content is read from it instead of parsing the JSON.
     
-    :param file_path: Path to the JSON lines file containing tweet data.
+    :param file_path: Path to the JSON lines file containing tweet data, or a
+        directory, glob pattern or list of shard files, scanned concurrently
+        (see shards.multi_scan).
+    :param stats: If given, filled in with counters and per-stage timings
+        (single files without filters, ValueError otherwise).
+    :param start_date: Only count tweets posted on or after this date; only
+        the matching byte ranges are read, using the date index of the file.
+    :param end_date: Only count tweets posted on or before this date.
+    :param users: Only count tweets posted by these users.
+    :param k: Number of results to return (default 10).
+    :param validation: What to do with lines that cannot be used ("skip",
+        "count", "fail" or a LineValidator, see validation.resolve_validator); lines
+        are then read from the file rather than the columnar cache (single
+        files without filters, ValueError otherwise).
+    :param max_memory_mb: Bound the memory used by the counts: the file is
+        then scanned by q2_memory, which spills partial counts to sorted runs
+        on disk beyond the budget and merges them at the end (single files
+        without filters; stats are not collected).
     :return: List of tuples, each containing an emoji and its count.
     """
+    filtered = start_date is not None or end_date is not None or users is not None
+    multi = is_multi(file_path)
+    if (filtered or multi) and (stats is not None or validation is not None):
+        raise ValueError("stats and validation are only supported for single files without filters")
+    if max_memory_mb is not None:
+        if filtered or multi:
+            raise ValueError("max_memory_mb is only supported for single files without filters")
+        return q2_memory(file_path, k=k, validation=validation, max_memory_mb=max_memory_mb)
+
+    if multi:
+        # Imported here: the engine depends on this module
+        from engine import EmojiAggregator
+
+        return multi_query(file_path, EmojiAggregator, start_date, end_date, users, k)
+
+    if filtered:
+        # Imported here: the engine depends on this module
+        from date_index import filtered_query
+        from engine import EmojiAggregator
+
+        return filtered_query(file_path, EmojiAggregator, start_date, end_date, users, k)
+
     emoji_counter = Counter()
-    processed_tweets = 0
 
-    try:
-        # Open the file and process it line by line
-        with open(file_path, 'r', encoding='utf-8') as file:
-            for line in file:
-                if not line.strip():  # Skip empty lines
-                    continue
-                
-                try:
-                    # Attempt to parse the JSON line
-                    tweet = json.loads(line)
-                    content = tweet.get('content', '')  # Get the tweet content
-                    
-                    if content:  # Process only if content is not empty
-                        emojis = extract_emojis(content)  # Extract emojis from content
-                        emoji_counter.update(emojis)  # Update the emoji counts
-                        processed_tweets += 1
+    validator = resolve_validator(validation)
+
+    # The cache only holds the valid lines
+    cache = open_cache(file_path) if validator is None else None
+    if cache is not None:
+        with cache:
+            if stats is not None:
+                stats.source = "cache"
+            for content in cache.iter_content():
+                if content:
+                    emoji_counter.update(extract_emojis(content))
+        return top_k(emoji_counter, k)
 
-                        # Print progress every 100,000 tweets
-                        if processed_tweets % 100000 == 0:
-                            print(f"Processed {processed_tweets} tweets")
-                
-                except json.JSONDecodeError:
-                    # Silently skip lines with JSON decode errors
-                    continue
-                except KeyError as e:
-                    # Handle missing keys in the tweet JSON
-                    print(f"Missing key: {e}, skipping line.")
-                    continue
+    # Imported here: the engine depends on this module
+    from engine import EmojiAggregator, scan
 
+    aggregator = EmojiAggregator(k)
+    try:
+        # Map the file and process it line by line (empty lines are skipped)
+        scan(file_path, [aggregator], stats=stats, validation=validator)
     except FileNotFoundError:
         # Handle file not found error
         print(f"Error: File not found - {file_path}")
@@ -77,15 +98,21 @@ def q2_time(file_path: str) -> List[Tuple[str, int]]:
         # Handle any other I/O errors
         print(f"Error reading file {file_path}: {e}")
         return []
+    except MalformedLineError:
+        raise
     except Exception as ex:
         # Handle any other unexpected errors
         print(f"An unexpected error occurred: {ex}")
         return []
+    finally:
+        finish(validator, validation)
 
     # Get the top 10 most used emojis
-    top_10_emojis = emoji_counter.most_common(10)
-    
-    # Output the total number of processed tweets
-    print(f"Total processed tweets: {processed_tweets}")
-    
-    return top_10_emojis
\ No newline at end of file
+    if stats is not None:
+        with stats.stage("result"):
+            top_emojis = aggregator.result()
+        stats.sizes["emojis"] = len(aggregator.counts)
+    else:
+        top_emojis = aggregator.result()
+
+    return top_emojis
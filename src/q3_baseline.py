@@ -3,10 +3,12 @@ from collections import Counter
 import re
 from typing import List, Tuple
 
+from compression import open_text
+
 # Helper function to load JSON lines 
 def load_json_lines(file_path: str):
     data = []
-    with open(file_path, 'r', encoding='utf-8') as file:
+    with open_text(file_path, encoding='utf-8') as file:
         for line in file:
             try:
                 data.append(json.loads(line))
@@ -1,7 +1,15 @@
 import re
-import ujson as json
-from typing import List, Tuple
-from collections import Counter
+from typing import List, Optional, Tuple, Union
+
+from compact_counter import CompactCounter
+from fields import FieldExtractor
+from reader import LineReader
+from sketches import Estimate, HeavyHitters
+from spill import SpillingCounter, entries_for_budget
+from validation import LineValidator, MalformedLineError, finish, resolve_validator
+
+# Regular expression to find all @mentions
+MENTION_PATTERN = re.compile(r"@(\w+)")
 
 def extract_mentions(text: str) -> List[str]:
     """
@@ -10,45 +18,77 @@ def extract_mentions(text: str) -> List[str]:
     :param text: The input text from which to extract mentions.
     :return: A list of mentions found in the text.
     """
-    # Regular expression to find all @mentions
-    mention_pattern = re.compile(r"@(\w+)")
-    return mention_pattern.findall(text)
+    return MENTION_PATTERN.findall(text)
 
-def q3_memory(file_path: str) -> List[Tuple[str, int]]:
+def q3_memory(
+    file_path: str,
+    approximate: bool = False,
+    capacity: int = 1000,
+    epsilon: float = 1e-4,
+    delta: float = 1e-3,
+    k: int = 10,
+    validation: Optional[Union[str, LineValidator]] = None,
+    max_memory_mb: Optional[float] = None,
+) -> Union[List[Tuple[str, int]], List[Estimate]]:
     """
     Analyze tweet data to find the top 10 most mentioned usernames.
+
+    With `approximate`, counts are kept in a fixed amount of memory instead
+    of one counter per distinct item: a Space-Saving summary of the most
+    frequent items plus a Count-Min sketch (see sketches.HeavyHitters).
     
     :param file_path: Path to the JSON lines file containing tweet data.
+    :param approximate: Use bounded-memory approximate counting.
+    :param capacity: Number of items monitored in approximate mode.
+    :param epsilon: Count-Min error bound, as a fraction of all occurrences.
+    :param delta: Probability that the Count-Min error bound does not hold.
+    :param k: Number of results to return (default 10).
+    :param validation: What to do with lines that cannot be used ("skip",
+        "count", "fail" or a LineValidator, see validation.resolve_validator).
+    :param max_memory_mb: Approximate memory budget for the exact counts:
+        beyond it, counts are spilled to sorted runs on disk and merged at the
+        end (see spill.SpillingCounter). Unbounded by default.
     :return: A list of tuples, each containing a username and its mention count.
+        In approximate mode, a list of sketches.Estimate (item, count, lower,
+        upper) where the true count lies in [lower, upper].
     """
-    mention_counter = Counter()  # Counter to store mention counts
+    # Mention counts, interned in a compact arena (see compact_counter)
+    mention_counter = CompactCounter()
+    if approximate:
+        mention_counter = HeavyHitters(capacity, epsilon, delta)
+    elif max_memory_mb is not None:
+        # Exact counts within a memory budget, spilled to disk beyond it
+        mention_counter = SpillingCounter(entries_for_budget(max_memory_mb))
+
+    validator = resolve_validator(validation)
+    reject = validator.reject if validator is not None else None
 
     try:
-        # Open the file and process it line by line for better memory efficiency
-        with open(file_path, 'r', encoding='utf-8') as file:
-            for line in file:
-                if line.strip():  # Skip empty lines
-                    try:
-                        tweet = json.loads(line)
-                        content = tweet.get('content', '')
-
-                        if content:  # Only process if content is not empty
-                            mentions = extract_mentions(content)  # Extract mentions from content
-                            mention_counter.update(mentions)  # Update mention counts
-
-                    except json.JSONDecodeError as e:
-                        # Handle JSON decode errors gracefully
-                        print(f"Skipping line due to JSON decode error: {e}")
-                    except KeyError as e:
-                        # Handle missing keys in the JSON structure
-                        print(f"Skipping line due to missing key: {e}")
-                    except Exception as e:
-                        # Handle any other unexpected errors
-                        print(f"An unexpected error occurred: {e}")
-
-        # Get the top 10 most mentioned usernames
-        top_10_mentions = mention_counter.most_common(10)
-        return top_10_mentions
+        # Map the file and process it line by line: lines are read in place
+        # from the mapping and only the content is decoded
+        extractor = FieldExtractor(('content',))
+        with LineReader(file_path) as reader:
+            for buffer, start, end in reader:
+                try:
+                    tweet = extractor.extract(buffer, start, end)
+                except ValueError:
+                    # Skip lines with JSON decode errors
+                    if reject is not None:
+                        reject("invalid_json", buffer, start, end)
+                    continue
+                content = tweet['content'] if tweet else None
+
+                if content and isinstance(content, str):  # Only process if content is not empty
+                    mentions = extract_mentions(content)  # Extract mentions from content
+                    mention_counter.update(mentions)  # Update mention counts
+                elif reject is not None and not isinstance(content, str):
+                    # An empty content is valid, a missing one is not
+                    reason = "missing_field" if tweet is not None else "not_an_object"
+                    reject(reason, buffer, start, end)
+
+        # Get the top k most mentioned usernames
+        top_mentions = mention_counter.most_common(k)
+        return top_mentions
 
     except FileNotFoundError:
         # Handle file not found error
@@ -56,8 +96,14 @@ def q3_memory(file_path: str) -> List[Tuple[str, int]]:
     except IOError as e:
         # Handle other I/O errors
         print(f"Error reading file {file_path}: {e}")
+    except MalformedLineError:
+        raise
     except Exception as ex:
         # Handle any other unexpected errors
         print(f"An unexpected error occurred: {ex}")
-    
+    finally:
+        if isinstance(mention_counter, SpillingCounter):
+            mention_counter.close()
+        finish(validator, validation)
+
     return []
\ No newline at end of file
@@ -1,7 +1,17 @@
 import re
-import ujson as json
-from typing import List, Tuple
-from collections import Counter
+import datetime
+from typing import Iterable, List, Optional, Tuple, Union
+
+from columnar import open_cache
+from compact_counter import CompactCounter
+from q3_memory import q3_memory
+from shards import Source, is_multi, multi_query
+from stats import ScanStats
+from topk import top_k
+from validation import LineValidator, MalformedLineError, finish, resolve_validator
+
+# Regular expression to find all @mentions
+MENTION_PATTERN = re.compile(r"@(\w+)")
 
 def extract_mentions(text: str) -> List[str]:
     """
@@ -10,45 +20,98 @@ def extract_mentions(text: str) -> List[str]:
     :param text: The input text from which to extract mentions.
     :return: A list of mentions found in the text.
     """
-    # Regular expression to find all @mentions
-    mention_pattern = re.compile(r"@(\w+)")
-    return mention_pattern.findall(text)
+    return MENTION_PATTERN.findall(text)
 
-def q3_time(file_path: str) -> List[Tuple[str, int]]:
+def q3_time(
+    file_path: Source,
+    stats: Optional[ScanStats] = None,
+    start_date: Optional[Union[datetime.date, str]] = None,
+    end_date: Optional[Union[datetime.date, str]] = None,
+    users: Optional[Iterable[str]] = None,
+    k: int = 10,
+    validation: Optional[Union[str, LineValidator]] = None,
+    max_memory_mb: Optional[float] = None,
+) -> List[Tuple[str, int]]:
     """
     Analyze tweet data to find the top 10 most mentioned usernames.
+
+    When a valid columnar cache of the file exists (see columnar.build_cache)
+    the content is read from it instead of parsing the JSON.
     
-    :param file_path: Path to the JSON lines file containing tweet data.
+    :param file_path: Path to the JSON lines file containing tweet data, or a
+        directory, glob pattern or list of shard files, scanned concurrently
+        (see shards.multi_scan).
+    :param stats: If given, filled in with counters and per-stage timings
+        (single files without filters, ValueError otherwise).
+    :param start_date: Only count tweets posted on or after this date; only
+        the matching byte ranges are read, using the date index of the file.
+    :param end_date: Only count tweets posted on or before this date.
+    :param users: Only count tweets posted by these users.
+    :param k: Number of results to return (default 10).
+    :param validation: What to do with lines that cannot be used ("skip",
+        "count", "fail" or a LineValidator, see validation.resolve_validator); lines
+        are then read from the file rather than the columnar cache (single
+        files without filters, ValueError otherwise).
+    :param max_memory_mb: Bound the memory used by the counts: the file is
+        then scanned by q3_memory, which spills partial counts to sorted runs
+        on disk beyond the budget and merges them at the end (single files
+        without filters; stats are not collected).
     :return: A list of tuples, each containing a username and its mention count.
     """
-    mention_counter = Counter()  # Counter to store mention counts
+    filtered = start_date is not None or end_date is not None or users is not None
+    multi = is_multi(file_path)
+    if (filtered or multi) and (stats is not None or validation is not None):
+        raise ValueError("stats and validation are only supported for single files without filters")
+    if max_memory_mb is not None:
+        if filtered or multi:
+            raise ValueError("max_memory_mb is only supported for single files without filters")
+        return q3_memory(file_path, k=k, validation=validation, max_memory_mb=max_memory_mb)
+
+    if multi:
+        # Imported here: the engine depends on this module
+        from engine import MentionAggregator
+
+        return multi_query(file_path, MentionAggregator, start_date, end_date, users, k)
+
+    if filtered:
+        # Imported here: the engine depends on this module
+        from date_index import filtered_query
+        from engine import MentionAggregator
+
+        return filtered_query(file_path, MentionAggregator, start_date, end_date, users, k)
 
+    # Mention counts, interned in a compact arena (see compact_counter)
+    mention_counter = CompactCounter()
+
+    validator = resolve_validator(validation)
+
+    # The cache only holds the valid lines
+    cache = open_cache(file_path) if validator is None else None
+    if cache is not None:
+        with cache:
+            if stats is not None:
+                stats.source = "cache"
+            for content in cache.iter_content():
+                if content:
+                    mention_counter.update(extract_mentions(content))
+        return top_k(mention_counter, k)
+
+    # Imported here: the engine depends on this module
+    from engine import MentionAggregator, scan
+
+    aggregator = MentionAggregator(k, counter=CompactCounter)
     try:
-        # Open the file and process it line by line for better memory efficiency
-        with open(file_path, 'r', encoding='utf-8') as file:
-            for line in file:
-                if line.strip():  # Skip empty lines
-                    try:
-                        tweet = json.loads(line)
-                        content = tweet.get('content', '')
-
-                        if content:  # Only process if content is not empty
-                            mentions = extract_mentions(content)  # Extract mentions from content
-                            mention_counter.update(mentions)  # Update mention counts
-
-                    except json.JSONDecodeError as e:
-                        # Handle JSON decode errors gracefully
-                        print(f"Skipping line due to JSON decode error: {e}")
-                    except KeyError as e:
-                        # Handle missing keys in the JSON structure
-                        print(f"Skipping line due to missing key: {e}")
-                    except Exception as e:
-                        # Handle any other unexpected errors
-                        print(f"An unexpected error occurred: {e}")
+        # Map the file and process it line by line (empty lines are skipped)
+        scan(file_path, [aggregator], stats=stats, validation=validator)
 
         # Get the top 10 most mentioned usernames
-        top_10_mentions = mention_counter.most_common(10)
-        return top_10_mentions
+        if stats is not None:
+            with stats.stage("result"):
+                top_mentions = aggregator.result()
+            stats.sizes["mentions"] = len(aggregator.counts)
+        else:
+            top_mentions = aggregator.result()
+        return top_mentions
 
     except FileNotFoundError:
         # Handle file not found error
@@ -56,8 +119,12 @@ def q3_time(file_path: str) -> List[Tuple[str, int]]:
     except IOError as e:
         # Handle other I/O errors
         print(f"Error reading file {file_path}: {e}")
+    except MalformedLineError:
+        raise
     except Exception as ex:
         # Handle any other unexpected errors
         print(f"An unexpected error occurred: {ex}")
-    
+    finally:
+        finish(validator, validation)
+
     return []
\ No newline at end of file
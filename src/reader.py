@@ -0,0 +1,251 @@
+import os
+import mmap
+from typing import Iterable, Iterator, Optional, Tuple
+
+from compression import detect_compression, iter_decompressed
+from validation import MalformedLineError
+
+# Pages already consumed are released from the process every this many bytes,
+# so scanning a large mapping does not inflate the resident set size
+RELEASE_WINDOW = 4 * 1024 * 1024
+
+Span = Tuple[bytes, int, int]
+
+
+class LineReader:
+    """
+    Memory-mapped reader that yields the lines of a file as spans of the
+    mapping, without decoding or copying them.
+
+    Iterating yields `(buffer, start, end)` tuples where `buffer[start:end]`
+    is one non-empty line without its trailing newline. Consumers that can
+    work on offsets (regular expressions, `FieldExtractor.extract`) read the
+    mapping in place; others copy a line with `buffer[start:end]`.
+
+    Only lines starting in the byte range [start, end) are produced.
+
+    Compressed files (gzip, bz2, zstd) are detected from their magic number
+    and decompressed on a background thread; their lines are yielded as spans
+    of the decompressed chunks. Byte ranges are not supported for them, and a
+    MalformedLineError raised while reading them reports the line number
+    instead of an offset into a chunk.
+    """
+
+    def __init__(self, file_path: str, start: int = 0, end: Optional[int] = None):
+        self.file_path = file_path
+        self.start = start
+        self.end = end
+        self._file = None
+        self.buffer = b""
+        self.compression = None
+        # Decompressed buffer of the last span yielded, and the line breaks
+        # before it in the file
+        self._span_buffer = b""
+        self._span_lines = 0
+
+    def open(self) -> "LineReader":
+        self.compression = detect_compression(self.file_path)
+        if self.compression is not None:
+            if self.start or self.end is not None:
+                raise ValueError(
+                    f"Byte ranges are not supported for {self.compression} input"
+                )
+            # Opened for the benefit of callers checking that the file exists
+            self._file = open(self.file_path, "rb")
+            return self
+
+        self._file = open(self.file_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size:
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self.buffer, "madvise"):
+                self.buffer.madvise(mmap.MADV_SEQUENTIAL)
+        return self
+
+    def close(self) -> None:
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.buffer = b""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "LineReader":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if isinstance(exc, MalformedLineError) and self.compression is not None:
+            # The lines are consumed as they are yielded, so the bad line is
+            # in the last buffer
+            exc.line_number = self.line_number(exc.offset)
+            exc.offset = None
+        self.close()
+
+    def line_number(self, start: int) -> int:
+        """
+        Return the 1-based line number of the span starting at `start` in the
+        buffer of the last span yielded from compressed input.
+        """
+        return self._span_lines + self._span_buffer.count(b"\n", 0, start) + 1
+
+    def _release(self, start: int, end: int) -> None:
+        # Drop the consumed pages from this process; they stay in the page cache
+        start -= start % mmap.PAGESIZE
+        if end > start and hasattr(self.buffer, "madvise"):
+            self.buffer.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def _iter_decompressed(self) -> Iterator[Span]:
+        # A line split across two chunks is joined into its own buffer
+        pending = b""
+        lines = 0  # Line breaks before the current chunk
+        for chunk in iter_decompressed(self.file_path, self.compression):
+            position = 0
+            find = chunk.find
+            if pending:
+                newline = find(b"\n")
+                if newline < 0:
+                    pending += chunk
+                    continue
+                line = pending + chunk[:newline]
+                pending = b""
+                self._span_buffer, self._span_lines = line, lines
+                yield line, 0, len(line)
+                position = newline + 1
+            self._span_buffer, self._span_lines = chunk, lines
+            lines += chunk.count(b"\n")
+            while True:
+                newline = find(b"\n", position)
+                if newline < 0:
+                    break
+                if newline > position:
+                    yield chunk, position, newline
+                position = newline + 1
+            pending = chunk[position:]
+        if pending:
+            self._span_buffer, self._span_lines = pending, lines
+            yield pending, 0, len(pending)
+
+    def __iter__(self) -> Iterator[Span]:
+        if self._file is None:
+            self.open()
+        if self.compression is not None:
+            yield from self._iter_decompressed()
+            return
+        yield from self._iter_range(self.start, self.end)
+
+    def iter_ranges(self, ranges: Iterable[Tuple[int, int]]) -> Iterator[Span]:
+        """
+        Iterate over the lines starting in each of several byte ranges of the
+        file, in the given order, through a single mapping.
+
+        :param ranges: (start, end) byte offsets; each start must be at the
+            start of a line.
+        """
+        if self._file is None:
+            self.open()
+        if self.compression is not None:
+            raise ValueError(
+                f"Byte ranges are not supported for {self.compression} input"
+            )
+        for start, end in ranges:
+            yield from self._iter_range(start, end)
+
+    def _iter_range(self, start: int, end: Optional[int]) -> Iterator[Span]:
+        buffer = self.buffer
+        size = len(buffer)
+        stop = size if end is None else min(end, size)
+        find = buffer.find
+        position = start
+        released = position
+        release_at = position + RELEASE_WINDOW
+        mapped = isinstance(buffer, mmap.mmap)
+
+        while position < stop:
+            newline = find(b"\n", position)
+            if newline < 0:
+                newline = size
+            if newline > position:
+                yield buffer, position, newline
+            position = newline + 1
+
+            if mapped and position >= release_at:
+                self._release(released, position)
+                released = position - position % mmap.PAGESIZE
+                release_at = position + RELEASE_WINDOW
+
+def iter_lines(
+    file_path: str, start: int = 0, end: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Iterate over the non-empty lines of a file as bytes, read through a
+    memory mapping instead of text-mode file iteration.
+
+    :param file_path: Path to the file.
+    :param start: Byte offset of the first line to read; must be at the
+        start of a line.
+    :param end: Only lines starting before this byte offset are read.
+    :return: An iterator of lines without their trailing newline.
+    """
+    with LineReader(file_path, start, end) as reader:
+        for buffer, line_start, line_end in reader:
+            yield buffer[line_start:line_end]
+
+
+def iter_blocks(file_path: str, block_size: int = 8 * 1024 * 1024) -> Iterator[bytes]:
+    """
+    Read a file (decompressing it if needed) in blocks of whole lines.
+
+    :param file_path: Path to the file.
+    :param block_size: Approximate size of each block in bytes; a block is
+        extended to the end of its last line.
+    :return: An iterator of blocks, each ending with a newline except
+        possibly the last one.
+    """
+    compression = detect_compression(file_path)
+    if compression is not None:
+        chunks = iter_decompressed(file_path, compression)
+    else:
+        def read_chunks():
+            with open(file_path, "rb") as file:
+                while True:
+                    chunk = file.read(block_size)
+                    if not chunk:
+                        return
+                    yield chunk
+
+        chunks = read_chunks()
+
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size < block_size:
+            continue
+        newline = chunk.rfind(b"\n")
+        if newline < 0:
+            continue
+        pending[-1] = chunk[: newline + 1]
+        yield b"".join(pending)
+        rest = chunk[newline + 1 :]
+        pending = [rest]
+        pending_size = len(rest)
+    if pending_size:
+        yield b"".join(pending)
+
+
+def block_spans(block: bytes) -> Iterator[Span]:
+    """
+    Iterate over the non-empty lines of a block as `(buffer, start, end)`
+    spans, like LineReader.
+    """
+    find = block.find
+    size = len(block)
+    position = 0
+    while position < size:
+        newline = find(b"\n", position)
+        if newline < 0:
+            newline = size
+        if newline > position:
+            yield block, position, newline
+        position = newline + 1
@@ -0,0 +1,284 @@
+import os
+import glob
+import json
+import pickle
+import hashlib
+import inspect
+import datetime
+import functools
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from columnar import CACHE_DIR_ENV, _fingerprint, cache_path
+from shards import Source, as_path, is_multi, resolve_shards
+
+# Bump when the entry layout or the results change so old entries are ignored
+RESULTS_VERSION = 2
+
+# Bytes hashed at the start and at the end of every file, so a rewrite that
+# keeps the size and modification time is still detected
+HASH_BLOCK = 64 * 1024
+
+# Default size bound of the result store, per cache root
+MAX_BYTES = 64 * 1024 * 1024
+
+# Parameters that make a call bypass the cache unless they have one of the
+# given values: outputs (stats), and validation policies, which count,
+# quarantine or fail at the lines they read
+CACHED_VALUES = {
+    "stats": (None,),
+    "validation": (None, "skip"),
+}
+
+
+def content_fingerprint(file_path: str) -> Dict[str, object]:
+    """
+    Fingerprint a file by path, size, modification time and a hash of its
+    first and last HASH_BLOCK bytes.
+    """
+    fingerprint = _fingerprint(file_path)
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as file:
+        digest.update(file.read(HASH_BLOCK))
+        if fingerprint["size"] > HASH_BLOCK:
+            file.seek(max(HASH_BLOCK, fingerprint["size"] - HASH_BLOCK))
+            digest.update(file.read(HASH_BLOCK))
+    fingerprint["sample_sha1"] = digest.hexdigest()
+    return fingerprint
+
+
+def results_path(source: Source, cache_dir: Optional[str] = None) -> str:
+    """
+    Return the directory holding the cached results of a query input, next
+    to its columnar cache (see columnar.cache_path). Globs and lists of
+    shards are stored next to the cache of their first shard.
+    """
+    path = as_path(source)
+    if path is not None and (os.path.isdir(path) or not is_multi(path)):
+        return os.path.splitext(cache_path(path, cache_dir))[0] + ".results"
+    paths = resolve_shards(source)
+    if not paths:
+        raise FileNotFoundError(f"No files match {source!r}")
+    digest = hashlib.sha1("\n".join(map(os.path.abspath, paths)).encode("utf-8"))
+    root = os.path.dirname(cache_path(paths[0], cache_dir))
+    return os.path.join(root, f"shards-{digest.hexdigest()[:12]}.results")
+
+
+def _source_fingerprint(source: Source) -> List[Dict[str, object]]:
+    if is_multi(source):
+        paths = resolve_shards(source)
+        if not paths:
+            raise FileNotFoundError(f"No files match {source!r}")
+        return [content_fingerprint(path) for path in paths]
+    return [content_fingerprint(as_path(source))]
+
+
+def _key_json(value: Any) -> str:
+    return json.dumps(value, default=_jsonable, sort_keys=True)
+
+
+def _jsonable(value: Any) -> Any:
+    # Only types with a canonical JSON form: anything else makes the call
+    # bypass the cache rather than risk two arguments sharing a key
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=_key_json)
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, datetime.tzinfo):
+        key = getattr(value, "key", None)  # zoneinfo.ZoneInfo
+        if key is not None:
+            return key
+        offset = value.utcoffset(None)  # Fixed offsets, e.g. datetime.timezone
+        if offset is not None:
+            return str(offset)
+    raise TypeError(f"{type(value).__name__} values cannot be part of a cache key")
+
+
+class ResultCache:
+    """
+    On-disk cache of query results, keyed by the query function, its
+    parameters and the fingerprint of its input files (see
+    `content_fingerprint`). A file that is appended to or rewritten gets a
+    new fingerprint, so stale results are never served; they are evicted
+    with the least recently used entries once the store outgrows
+    `max_bytes`.
+
+    Usage:
+        cache = ResultCache()
+        cache.call(q1_time, "tweets.json")  # Scans the file
+        cache.call(q1_time, "tweets.json")  # Served from the cache
+
+    Empty results are not cached, since the query functions also return an
+    empty list when the input cannot be read.
+
+    :param cache_dir: Root directory for caches (see columnar.cache_path).
+    :param max_bytes: Size bound of the result store under each cache root.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def call(self, function: Callable, source: Source, *args, **kwargs) -> Any:
+        """
+        Return `function(source, *args, **kwargs)`, from the cache when an
+        entry for the same function, parameters and file contents exists.
+        """
+        bound = inspect.signature(function).bind(source, *args, **kwargs)
+        bound.apply_defaults()
+        names = list(bound.arguments)
+        params = {}
+        for name in names[1:]:
+            value = bound.arguments[name]
+            if hasattr(value, "__next__"):
+                # Iterators would be consumed by the key: materialize them
+                value = bound.arguments[name] = tuple(value)
+            params[name] = value
+
+        if any(
+            name in params and params[name] not in values
+            for name, values in CACHED_VALUES.items()
+        ):
+            return function(*bound.args, **bound.kwargs)
+
+        try:
+            directory = results_path(source, self.cache_dir)
+            material = {
+                "version": RESULTS_VERSION,
+                "function": f"{function.__module__}.{function.__qualname__}",
+                "params": params,
+                "files": _source_fingerprint(source),
+            }
+            key = _key_json(material)
+        except OSError:
+            # Unreadable input: let the query function report the error
+            return function(*bound.args, **bound.kwargs)
+        except TypeError:
+            # A parameter without a canonical key (see _jsonable)
+            return function(*bound.args, **bound.kwargs)
+
+        entry = os.path.join(
+            directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".pickle"
+        )
+        found, result = self._load(entry, key)
+        if found:
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = function(*bound.args, **bound.kwargs)
+        if result:
+            try:
+                self._store(entry, key, result)
+                self.evict(os.path.dirname(directory))
+            except OSError:
+                # The cache is an optimization; the result is still returned
+                pass
+        return result
+
+    def _load(self, entry: str, key: str) -> Tuple[bool, Any]:
+        try:
+            with open(entry, "rb") as file:
+                stored_key, result = pickle.load(file)
+        except FileNotFoundError:
+            return False, None
+        except Exception:
+            # Unreadable or truncated entry
+            self._remove(entry)
+            return False, None
+        if stored_key != key:
+            return False, None
+        try:
+            # The modification time records the last use, for LRU eviction
+            os.utime(entry)
+        except OSError:
+            pass
+        return True, result
+
+    def _store(self, entry: str, key: str, result: Any) -> None:
+        directory = os.path.dirname(entry)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".result-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump((key, result), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry)
+        except BaseException:
+            self._remove(temp_path)
+            raise
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def evict(self, root: str) -> int:
+        """
+        Delete the least recently used entries under a cache root until the
+        store fits in `max_bytes`.
+
+        :return: The number of entries deleted.
+        """
+        entries = []
+        for path in glob.glob(os.path.join(root, "*.results", "*.pickle")):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def invalidate(self, source: Optional[Source] = None) -> None:
+        """
+        Delete the cached results of a query input, or every cached result
+        under the cache root when no input is given (this needs `cache_dir`
+        or $TWEETS_CACHE_DIR).
+        """
+        if source is not None:
+            directories = [results_path(source, self.cache_dir)]
+        else:
+            root = self.cache_dir or os.environ.get(CACHE_DIR_ENV)
+            if root is None:
+                raise ValueError(
+                    "invalidate() without a source needs cache_dir or "
+                    f"${CACHE_DIR_ENV}"
+                )
+            directories = glob.glob(os.path.join(root, "*.results"))
+        for directory in directories:
+            for path in glob.glob(os.path.join(directory, "*.pickle")):
+                self._remove(path)
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+
+def cached(function: Callable, cache: Optional[ResultCache] = None) -> Callable:
+    """
+    Wrap a query function so that its results are served from a
+    ResultCache.
+
+    Usage:
+        q1 = cached(q1_time)
+        q1("tweets.json", k=20)
+    """
+    cache = cache if cache is not None else ResultCache()
+
+    @functools.wraps(function)
+    def wrapper(source: Source, *args, **kwargs) -> Any:
+        return cache.call(function, source, *args, **kwargs)
+
+    wrapper.cache = cache
+    return wrapper
@@ -0,0 +1,253 @@
+import os
+import errno
+import glob
+import datetime
+import functools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Type, Union
+
+# Input of the multi-file queries: a directory, a glob pattern, or a list of
+# paths (each of which may itself be a directory or a glob)
+PathLike = Union[str, bytes, os.PathLike]
+Source = Union[PathLike, Sequence[PathLike]]
+
+# Shards smaller than this are grouped into one task, so inputs made of many
+# small files are not dominated by per-task scheduling and setup costs
+BATCH_BYTES = 64 * 1024 * 1024
+
+# Tasks in flight per worker
+TASKS_PER_WORKER = 2
+
+DateLike = Union[datetime.date, str]
+
+# Error messages of the inputs naming no shard at all
+NO_MATCH = "No files match"
+NO_DIRECTORY = "Directory not found"
+
+
+def as_path(source: Source) -> Optional[str]:
+    """
+    Return a query input naming one path (str, bytes or os.PathLike) as a
+    str, or None for a list or tuple of paths.
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        return os.fsdecode(source)
+    return None
+
+
+def is_multi(source: Source) -> bool:
+    """
+    Return whether a query input names several shards (a directory, a glob
+    pattern or a list or tuple of paths) rather than a single file. A path
+    ending with a separator names a directory, even a missing one (which
+    `resolve_shards` reports).
+    """
+    path = as_path(source)
+    if path is None:
+        return isinstance(source, (list, tuple))
+    if os.path.isdir(path) or _names_directory(path):
+        return True
+    return glob.has_magic(path) and not os.path.exists(path)
+
+
+def _names_directory(path: str) -> bool:
+    return path.endswith(os.sep) or bool(os.altsep and path.endswith(os.altsep))
+
+
+def resolve_shards(source: Source) -> List[str]:
+    """
+    Expand a query input into the list of shard files it names.
+
+    Directories contribute their regular files (hidden files and the cache
+    directory excluded) and glob patterns their matches, both in sorted
+    order; a list keeps the order of its entries. Sorted daily shards are
+    thus scanned in chronological order, which the tie-breaking relies on.
+
+    :param source: A file, directory, glob pattern, or a list or tuple of
+        them (each a str, bytes or os.PathLike).
+    :return: The shard paths, without duplicates.
+    :raises FileNotFoundError: If an entry ending with a separator is not a
+        directory.
+    """
+    path = as_path(source)
+    entries = [path] if path is not None else [os.fsdecode(entry) for entry in source]
+    paths = []
+    for entry in entries:
+        if os.path.isdir(entry):
+            paths.extend(
+                os.path.join(entry, name)
+                for name in sorted(os.listdir(entry))
+                if not name.startswith(".")
+                and os.path.isfile(os.path.join(entry, name))
+            )
+        elif _names_directory(entry):
+            raise FileNotFoundError(errno.ENOENT, NO_DIRECTORY, entry)
+        elif glob.has_magic(entry) and not os.path.exists(entry):
+            paths.extend(path for path in sorted(glob.glob(entry)) if os.path.isfile(path))
+        else:
+            paths.append(entry)
+    return list(dict.fromkeys(paths))
+
+
+def plan_batches(
+    paths: Sequence[str], sizes: Sequence[int], workers: int
+) -> List[List[str]]:
+    """
+    Group consecutive shards into batches of roughly equal size.
+
+    The target size is BATCH_BYTES, lowered so that there are at least a few
+    batches per worker when the input is small; a shard larger than the
+    target is a batch of its own. Batches keep the input order.
+    """
+    total = sum(sizes)
+    target = max(1, min(BATCH_BYTES, total // (TASKS_PER_WORKER * workers) or 1))
+    batches = []
+    batch, batch_size = [], 0
+    for path, size in zip(paths, sizes):
+        if batch and batch_size + size > target:
+            batches.append(batch)
+            batch, batch_size = [], 0
+        batch.append(path)
+        batch_size += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _scan_batch(
+    paths: Sequence[str],
+    aggregator_types: Sequence[Type],
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    users: Optional[Iterable[str]] = None,
+) -> list:
+    """
+    Worker entry point: scan a batch of shards, in order, into one set of
+    fresh partial aggregates.
+    """
+    # Imported here: the engine depends on the query modules, which use this one
+    from date_index import filtered_scan
+    from engine import scan
+
+    aggregators = [cls() for cls in aggregator_types]
+    filtered = start_date is not None or end_date is not None or users is not None
+    for path in paths:
+        if filtered:
+            filtered_scan(path, aggregators, start_date, end_date, users)
+        else:
+            scan(path, aggregators)
+    return aggregators
+
+
+def _scan_shards(
+    paths: Sequence[str],
+    aggregator_types: Sequence[Type],
+    workers: int,
+    filters: tuple,
+) -> list:
+    # Stat the shards concurrently; on network file systems this dominates
+    # the setup of inputs made of many files
+    with ThreadPoolExecutor() as executor:
+        sizes = list(executor.map(os.path.getsize, paths))
+    batches = plan_batches(paths, sizes, workers)
+    merged = [cls() for cls in aggregator_types]
+
+    if workers == 1 or len(batches) == 1:
+        for batch in batches:
+            for aggregator, partial in zip(
+                merged, _scan_batch(batch, aggregator_types, *filters)
+            ):
+                aggregator.merge(partial)
+        return merged
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as executor:
+        # Bounded window of tasks in flight, merged in input order so ties
+        # are broken exactly as in a sequential scan of the shards
+        limit = TASKS_PER_WORKER * workers
+        pending = deque()
+
+        def merge_oldest():
+            for aggregator, partial in zip(merged, pending.popleft().result()):
+                aggregator.merge(partial)
+
+        for batch in batches:
+            pending.append(
+                executor.submit(_scan_batch, batch, aggregator_types, *filters)
+            )
+            if len(pending) >= limit:
+                merge_oldest()
+        while pending:
+            merge_oldest()
+
+    return merged
+
+
+def multi_scan(
+    source: Source,
+    aggregator_types: Sequence[Type],
+    workers: Optional[int] = None,
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    users: Optional[Iterable[str]] = None,
+) -> list:
+    """
+    Scan several shard files with a pool of worker processes, and merge the
+    per-shard aggregates.
+
+    Shards are expanded with `resolve_shards`, grouped into batches by size
+    (see `plan_batches`) and scanned with the same filters as
+    date_index.filtered_scan. Compressed shards are supported.
+
+    :param source: A directory, glob pattern, or list of paths.
+    :param aggregator_types: Aggregator classes (or factories) to instantiate
+        for every batch.
+    :param workers: Number of worker processes (default is the CPU count).
+    :param start_date: First date to include (date or "YYYY-MM-DD").
+    :param end_date: Last date to include (date or "YYYY-MM-DD").
+    :param users: Only include tweets by these usernames.
+    :return: One merged aggregator per entry of `aggregator_types`.
+    """
+    paths = resolve_shards(source)
+    if not paths:
+        raise FileNotFoundError(errno.ENOENT, NO_MATCH, str(source))
+    workers = workers or os.cpu_count() or 1
+    return _scan_shards(
+        paths, aggregator_types, workers, (start_date, end_date, users)
+    )
+
+
+def multi_query(
+    source: Source,
+    aggregator_type: Type,
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    users: Optional[Iterable[str]] = None,
+    k: int = 10,
+    workers: Optional[int] = None,
+) -> list:
+    """
+    Answer one question over several shard files (see `multi_scan`), with
+    the same error handling as the query functions.
+
+    :return: The aggregator's result, or an empty list if a shard cannot be read.
+    """
+    try:
+        (aggregator,) = multi_scan(
+            source,
+            [functools.partial(aggregator_type, k=k)],
+            workers,
+            start_date,
+            end_date,
+            users,
+        )
+    except FileNotFoundError as e:
+        # A missing directory or a pattern matching nothing says so; a
+        # missing shard is reported like a missing file in the query functions
+        reason = e.strerror if e.strerror in (NO_MATCH, NO_DIRECTORY) else "File not found"
+        print(f"Error: {reason} - {e.filename}")
+        return []
+    except IOError as e:
+        print(f"Error reading files {source}: {e}")
+        return []
+    return aggregator.result()
@@ -0,0 +1,245 @@
+import math
+import zlib
+import heapq
+from array import array
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional
+
+
+class Estimate(NamedTuple):
+    """
+    An approximate count with the interval the true count is guaranteed to
+    lie in (lower <= true count <= upper).
+    """
+
+    item: Hashable
+    count: int
+    lower: int
+    upper: int
+
+
+# Multiplier spreading a 32-bit hash over 64 bits (2**64 / golden ratio)
+FIBONACCI_MULTIPLIER = 0x9E3779B97F4A7C15
+MASK_64 = (1 << 64) - 1
+
+
+def _hash64(item: Hashable) -> int:
+    # Stable across processes (unlike hash() on str), so sketches can be
+    # merged. A CRC-32 scrambled by a Fibonacci multiplication and a shift
+    # costs about half of a blake2b digest, and measured as good as it for
+    # the Count-Min error on usernames and random strings
+    if isinstance(item, str):
+        item = item.encode("utf-8", "surrogatepass")
+    elif not isinstance(item, bytes):
+        item = repr(item).encode("utf-8")
+    value = zlib.crc32(item) * FIBONACCI_MULTIPLIER & MASK_64
+    return value ^ value >> 29
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch: a depth x width table of counters that never
+    underestimates a count, and overestimates it by more than
+    `epsilon * total` with probability at most `delta`.
+
+    Each item is hashed once: the two halves h1, h2 of its 64-bit hash give
+    the column of row i as (h1 + i * h2) % width (Kirsch-Mitzenmacher
+    double hashing).
+    """
+
+    def __init__(self, epsilon: float = 1e-4, delta: float = 1e-3):
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.table = array("q", bytes(8 * self.width * self.depth))
+        # Offset of each row in the table
+        self.rows = range(0, self.width * self.depth, self.width)
+        self.total = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.itemsize * len(self.table)
+
+    def add(self, item: Hashable, count: int = 1) -> int:
+        """Add occurrences of an item and return its new estimate."""
+        value = _hash64(item)
+        column, step = value & 0xFFFFFFFF, value >> 32 | 1
+        table = self.table
+        width = self.width
+        estimate = None
+        for row in self.rows:
+            cell = row + column % width
+            cell_count = table[cell] + count
+            table[cell] = cell_count
+            if estimate is None or cell_count < estimate:
+                estimate = cell_count
+            column += step
+        self.total += count
+        return estimate
+
+    def estimate(self, item: Hashable) -> int:
+        """Return an upper bound of the number of occurrences of an item."""
+        value = _hash64(item)
+        column, step = value & 0xFFFFFFFF, value >> 32 | 1
+        table = self.table
+        width = self.width
+        estimate = None
+        for row in self.rows:
+            cell_count = table[row + column % width]
+            if estimate is None or cell_count < estimate:
+                estimate = cell_count
+            column += step
+        return estimate
+
+    def merge(self, other: "CountMinSketch") -> None:
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge Count-Min sketches of different sizes")
+        table = self.table
+        for i, value in enumerate(other.table):
+            if value:
+                table[i] += value
+        self.total += other.total
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters summary monitoring at most `capacity` items.
+
+    Every item occurring more than `total / capacity` times is monitored, and
+    a monitored item's true count lies in [count - error, count].
+    """
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        # Min-heap of (count, order, item); entries may lag behind `counts`
+        # since increments are not pushed, and are refreshed on eviction
+        self._heap = []
+        self._order = 0
+        self.total = 0
+
+    def _push(self, item: Hashable) -> None:
+        self._order += 1
+        heapq.heappush(self._heap, (self.counts[item], self._order, item))
+
+    def _pop_min(self) -> Hashable:
+        heap = self._heap
+        while True:
+            count, _, item = heapq.heappop(heap)
+            if self.counts[item] == count:
+                return item
+            # Stale entry: the count grew since it was pushed
+            self._push(item)
+
+    def add(self, item: Hashable, count: int = 1) -> None:
+        self.total += count
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+            return
+        error = 0
+        if len(counts) >= self.capacity:
+            # Replace the least frequent item, inheriting its count as error
+            evicted = self._pop_min()
+            error = counts.pop(evicted)
+            del self.errors[evicted]
+        counts[item] = error + count
+        self.errors[item] = error
+        self._push(item)
+
+    def update(self, items: Iterable[Hashable]) -> None:
+        for item in items:
+            self.add(item)
+
+    def merge(self, other: "SpaceSaving") -> None:
+        """
+        Merge another summary into this one: items missing from one summary
+        are assumed to occur up to that summary's minimum count there.
+        """
+        own_min = min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+        other_min = (
+            min(other.counts.values()) if len(other.counts) >= other.capacity else 0
+        )
+        counts = {}
+        errors = {}
+        for item in self.counts.keys() | other.counts.keys():
+            counts[item] = self.counts.get(item, own_min) + other.counts.get(
+                item, other_min
+            )
+            errors[item] = self.errors.get(item, own_min) + other.errors.get(
+                item, other_min
+            )
+        kept = heapq.nlargest(self.capacity, counts, key=counts.get)
+        self.counts = {item: counts[item] for item in kept}
+        self.errors = {item: errors[item] for item in kept}
+        self.total += other.total
+        self._heap = []
+        for item in self.counts:
+            self._push(item)
+
+    def top(self, k: int = 10) -> List[Estimate]:
+        items = heapq.nlargest(k, self.counts, key=self.counts.get)
+        return [
+            Estimate(item, count, count - self.errors[item], count)
+            for item, count in ((item, self.counts[item]) for item in items)
+        ]
+
+
+class HeavyHitters:
+    """
+    Bounded-memory approximate counter for top-k queries.
+
+    Space-Saving tracks the candidate heavy hitters and a Count-Min sketch
+    tightens the upper bound of each reported count. Memory is fixed by
+    `capacity` (monitored items) and `epsilon`/`delta` (sketch size),
+    regardless of how many distinct items the stream contains.
+
+    :param capacity: Number of items monitored by Space-Saving.
+    :param epsilon: Count-Min overestimation bound, as a fraction of the
+        total number of occurrences.
+    :param delta: Probability that the Count-Min bound does not hold.
+    """
+
+    def __init__(
+        self, capacity: int = 1000, epsilon: float = 1e-4, delta: float = 1e-3
+    ):
+        self.summary = SpaceSaving(capacity)
+        self.sketch: Optional[CountMinSketch] = (
+            CountMinSketch(epsilon, delta) if epsilon else None
+        )
+
+    def update(self, items: Iterable[Hashable]) -> None:
+        add = self.summary.add
+        if self.sketch is None:
+            for item in items:
+                add(item)
+            return
+        sketch_add = self.sketch.add
+        for item in items:
+            add(item)
+            sketch_add(item)
+
+    def merge(self, other: "HeavyHitters") -> None:
+        self.summary.merge(other.summary)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        else:
+            self.sketch = None
+
+    def most_common(self, k: int = 10) -> List[Estimate]:
+        """
+        Return the k items with the highest estimated counts, most frequent
+        first, each with its guaranteed error interval.
+        """
+        estimates = self.summary.top(self.summary.capacity)
+        if self.sketch is not None:
+            estimate_of = self.sketch.estimate
+            estimates = [
+                Estimate(item, upper, lower, upper)
+                for item, lower, upper in (
+                    (item, lower, min(upper, estimate_of(item)))
+                    for item, _, lower, upper in estimates
+                )
+            ]
+        return heapq.nlargest(k, estimates, key=lambda estimate: estimate.count)
@@ -0,0 +1,187 @@
+import heapq
+import pickle
+import tempfile
+from itertools import islice
+from typing import Any, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+# Approximate size in bytes of one counted key kept in memory (slots of the
+# count and first-position dictionaries, the position and the key object),
+# used to turn a memory budget into a number of entries. Measured with
+# tracemalloc: about 170 bytes for username keys and 280 for the
+# (day, username) keys of q1_memory
+ENTRY_BYTES = 256
+
+# Items are written to and read from run files in batches of this size
+BATCH_SIZE = 4096
+
+
+def entries_for_budget(max_memory_mb: float, entry_bytes: int = ENTRY_BYTES) -> int:
+    """
+    Convert a memory budget in megabytes into a number of in-memory entries.
+    The budget is approximate: the real size of an entry depends on its key
+    (see ENTRY_BYTES).
+    """
+    return max(1, int(max_memory_mb * 1024 * 1024) // entry_bytes)
+
+
+def _write_run(items: Iterable[Tuple[Any, int, int]]):
+    run = tempfile.TemporaryFile(prefix="tweets-spill-")
+    items = iter(items)
+    while True:
+        batch = list(islice(items, BATCH_SIZE))
+        if not batch:
+            break
+        pickle.dump(batch, run, protocol=pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run) -> Iterator[Tuple[Any, int, int]]:
+    try:
+        while True:
+            yield from pickle.load(run)
+    except EOFError:
+        pass
+    finally:
+        run.close()
+
+
+def _merge_runs(
+    runs: List[Iterable[Tuple[Any, int, int]]],
+) -> Iterator[Tuple[Any, int, int]]:
+    """
+    Merge sorted runs of (key, count, first position), adding up the counts
+    and keeping the earliest position of every key.
+    """
+    merged = heapq.merge(*runs, key=lambda item: item[0])
+    current = None
+    for key, count, position in merged:
+        if current is not None and current[0] == key:
+            current[1] += count
+            current[2] = min(current[2], position)
+            continue
+        if current is not None:
+            yield tuple(current)
+        current = [key, count, position]
+    if current is not None:
+        yield tuple(current)
+
+
+class SpillingCounter:
+    """
+    Counter that keeps at most `max_entries` keys in memory, spilling them to
+    temporary files as sorted runs when the limit is reached.
+
+    Besides its count, the position of each key's first occurrence is kept,
+    so ties can be broken by first appearance as with `Counter.most_common`.
+    Keys must be orderable; `items` merges the runs and yields every key once,
+    in sorted order.
+
+    Merging buffers one batch of every run, so the number of runs merged at
+    once is bounded as well, by `max_runs = max_entries // BATCH_SIZE` (at
+    least 2). Runs are merged by tiers: each run has a level, and once
+    `max_runs` runs share a level they are merged into one run of the next
+    level, so every item is rewritten about log(spills) / log(max_runs)
+    times. Memory use thus stays within about `max_entries` entries for any
+    input. Runs are written to the temporary directory ($TMPDIR), which
+    should not be a memory-backed file system when the budget matters.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_runs = max(2, max_entries // BATCH_SIZE) if max_entries else None
+        self.counts = {}
+        self.first = {}
+        # (level, run file), levels in decreasing order
+        self.runs = []
+        self._position = 0
+
+    def add(self, key: Hashable, count: int = 1) -> None:
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+        else:
+            counts[key] = count
+            self.first[key] = self._position
+            if self.max_entries is not None and len(counts) >= self.max_entries:
+                self.spill()
+        self._position += 1
+
+    def update(self, keys) -> None:
+        for key in keys:
+            self.add(key)
+
+    def spill(self) -> None:
+        """Write the in-memory counts to a sorted run and clear them."""
+        if not self.counts:
+            return
+        first = self.first
+        self.runs.append(
+            (0, _write_run((key, count, first[key]) for key, count in sorted(self.counts.items())))
+        )
+        self.counts = {}
+        self.first = {}
+        if self.max_runs is None:
+            return
+        runs = self.runs
+        while True:
+            level = runs[-1][0]
+            tier = len(runs)
+            while tier > 0 and runs[tier - 1][0] == level:
+                tier -= 1
+            if len(runs) - tier < self.max_runs:
+                break
+            self._merge_last(len(runs) - tier, level + 1)
+
+    def _merge_last(self, count: int, level: int) -> None:
+        """Merge the last `count` runs into one run of the given level."""
+        merged = [_read_run(run) for _, run in self.runs[-count:]]
+        del self.runs[-count:]
+        self.runs.append((level, _write_run(_merge_runs(merged))))
+
+    @property
+    def spilled(self) -> bool:
+        """Whether some counts are held in run files."""
+        return bool(self.runs)
+
+    def items(self) -> Iterator[Tuple[Any, int, int]]:
+        """
+        Yield (key, count, first position) for every key, in key order.
+
+        This consumes the spilled runs; the counter is empty afterwards.
+        """
+        first = self.first
+        in_memory = [
+            (key, count, first[key]) for key, count in sorted(self.counts.items())
+        ]
+        self.counts = {}
+        self.first = {}
+        if self.max_runs is not None:
+            # Bound the fan-in of the final merge, merging the smallest runs
+            while len(self.runs) > self.max_runs:
+                count = min(len(self.runs) - self.max_runs + 1, self.max_runs)
+                self._merge_last(count, self.runs[-count][0])
+        runs = [_read_run(run) for _, run in self.runs]
+        self.runs = []
+        return _merge_runs([in_memory, *runs])
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Any, int]]:
+        """
+        Return the n most common keys and their counts, most common first
+        (all keys if n is None), breaking ties by first appearance as
+        `Counter.most_common` does. Only n entries are kept while the runs
+        are merged; like `items`, this empties the counter.
+        """
+        rank = lambda item: (item[1], -item[2])
+        if n is None:
+            ranked = sorted(self.items(), key=rank, reverse=True)
+        else:
+            ranked = heapq.nlargest(n, self.items(), key=rank)
+        return [(key, count) for key, count, _ in ranked]
+
+    def close(self) -> None:
+        for _, run in self.runs:
+            run.close()
+        self.runs = []
+        self.counts = {}
+        self.first = {}
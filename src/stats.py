@@ -0,0 +1,122 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+# Stages of a scan, in pipeline order
+STAGES = ("read", "parse", "extract", "aggregate", "result")
+
+
+class ScanStats:
+    """
+    Counters and per-stage timings of one scan of a tweet file.
+
+    Pass an instance as the `stats` argument of q1_time, q2_time, q3_time or
+    engine.scan to have it filled in; when no instance is given the hot loops
+    only pay for a boolean check per stage. All of them scan the file with
+    engine.scan_spans, which does not separate the extract stage from
+    aggregation (the aggregators tokenize the records they are fed).
+
+    Stages:
+        read: waiting for the next line (I/O, decompression)
+        parse: extracting the fields from the JSON line
+        extract: date regex, emoji or mention tokenization
+        aggregate: counter and heap updates
+        result: computing the top 10 once the file has been read
+    """
+
+    def __init__(self):
+        self.lines = 0  # Non-empty lines read
+        self.bytes = 0  # Bytes of those lines, newlines excluded
+        self.tweets = 0  # Lines that contributed to the result
+        self.skipped = Counter()  # Lines skipped, by reason
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.sizes: Dict[str, int] = {}  # Entries in the aggregation structures
+        self.source = "file"  # "file" or "cache"
+
+    def skip(self, reason: str) -> None:
+        self.skipped[reason] += 1
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block of code as part of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + (
+                time.perf_counter() - start
+            )
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "lines": self.lines,
+            "bytes": self.bytes,
+            "tweets": self.tweets,
+            "skipped": dict(self.skipped),
+            "seconds": dict(self.seconds),
+            "sizes": dict(self.sizes),
+        }
+
+    def to_prometheus(self, prefix: str = "tweets") -> str:
+        """
+        Render the statistics in the Prometheus text exposition format.
+
+        :param prefix: Prefix of every metric name.
+        :return: The metrics, one sample per line.
+        """
+        out = []
+
+        def family(name, kind, help_text, samples):
+            out.append(f"# HELP {prefix}_{name} {help_text}")
+            out.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                out.append(f"{prefix}_{name}{labels} {value}")
+
+        family("lines_total", "counter", "Non-empty lines read.", [("", self.lines)])
+        family("bytes_total", "counter", "Bytes of the lines read.", [("", self.bytes)])
+        family(
+            "tweets_total",
+            "counter",
+            "Tweets that contributed to the result.",
+            [("", self.tweets)],
+        )
+        family(
+            "lines_skipped_total",
+            "counter",
+            "Lines skipped, by reason.",
+            [
+                (f'{{reason="{reason}"}}', count)
+                for reason, count in sorted(self.skipped.items())
+            ],
+        )
+        family(
+            "stage_seconds_total",
+            "counter",
+            "Time spent in each stage of the scan.",
+            [
+                (f'{{stage="{stage}"}}', f"{seconds:.6f}")
+                for stage, seconds in self.seconds.items()
+            ],
+        )
+        family(
+            "aggregate_entries",
+            "gauge",
+            "Entries in the aggregation structures.",
+            [
+                (f'{{structure="{name}"}}', size)
+                for name, size in sorted(self.sizes.items())
+            ],
+        )
+        return "\n".join(out) + "\n"
+
+    def __repr__(self) -> str:
+        timings = ", ".join(
+            f"{stage}={seconds:.3f}s" for stage, seconds in self.seconds.items()
+        )
+        return (
+            f"ScanStats(source={self.source}, lines={self.lines}, bytes={self.bytes}, "
+            f"tweets={self.tweets}, skipped={dict(self.skipped)}, {timings}, "
+            f"sizes={self.sizes})"
+        )
@@ -0,0 +1,149 @@
+import json
+import random
+import datetime
+from typing import Iterator, List, TextIO
+
+# Emojis drawn for synthetic tweets: single code points, text-style symbols
+# with a variation selector, skin tones, flags, keycaps and ZWJ sequences
+EMOJIS = (
+    "\U0001F64F", "\U0001F602", "\U0001F69C", "\U0001F33E", "\u270A",
+    "\U0001F621", "\u2764\uFE0F", "\U0001F44D\U0001F3FD", "\U0001F1EE\U0001F1F3",
+    "\U0001F468\u200D\U0001F469\u200D\U0001F467", "1\uFE0F\u20E3", "\U0001F525",
+)
+
+WORDS = (
+    "farmers", "protest", "support", "delhi", "government", "laws", "we",
+    "stand", "with", "the", "niño", "\"quoted\"", "{braces}", "a,b", "line\nbreak",
+)
+
+
+class TweetGenerator:
+    """
+    Seeded generator of synthetic tweets in the layout of the challenge
+    dataset, with tunable skew and density so benchmarks can be reproduced.
+
+    :param seed: Random seed; the same parameters and seed always produce the
+        same file.
+    :param days: Number of distinct dates.
+    :param users: Number of distinct users.
+    :param date_skew: Zipf exponent of the date distribution (0 is uniform).
+    :param user_skew: Zipf exponent of the user distribution (0 is uniform).
+    :param emoji_density: Mean number of emojis per tweet.
+    :param mention_density: Mean number of @mentions per tweet.
+    :param malformed_rate: Fraction of lines that are truncated or empty.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        days: int = 60,
+        users: int = 10000,
+        date_skew: float = 1.0,
+        user_skew: float = 1.1,
+        emoji_density: float = 0.5,
+        mention_density: float = 0.3,
+        malformed_rate: float = 0.001,
+        start_date: datetime.date = datetime.date(2021, 2, 1),
+    ):
+        self.random = random.Random(seed)
+        self.dates = [
+            (start_date + datetime.timedelta(days=i)).isoformat() for i in range(days)
+        ]
+        self.usernames = [f"user_{i}" for i in range(users)]
+        self.date_weights = self._zipf_weights(days, date_skew)
+        self.user_weights = self._zipf_weights(users, user_skew)
+        self.emoji_density = emoji_density
+        self.mention_density = mention_density
+        self.malformed_rate = malformed_rate
+        # Shuffle ranks so the most frequent date is not always the first
+        self.random.shuffle(self.dates)
+
+    @staticmethod
+    def _zipf_weights(n: int, exponent: float) -> List[float]:
+        weights = [1 / (rank ** exponent) for rank in range(1, n + 1)]
+        total = 0.0
+        cumulative = []
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        return cumulative
+
+    def _poisson(self, mean: float) -> int:
+        # Knuth's method; means are small
+        limit = pow(2.718281828459045, -mean)
+        count = 0
+        product = self.random.random()
+        while product > limit:
+            count += 1
+            product *= self.random.random()
+        return count
+
+    def tweet(self, tweet_id: int) -> dict:
+        rand = self.random
+        users = range(len(self.usernames))
+        user = rand.choices(users, cum_weights=self.user_weights)[0]
+        username = self.usernames[user]
+        date = rand.choices(self.dates, cum_weights=self.date_weights)[0]
+        timestamp = (
+            f"{date}T{rand.randrange(24):02d}:{rand.randrange(60):02d}:"
+            f"{rand.randrange(60):02d}+00:00"
+        )
+
+        parts = rand.choices(WORDS, k=rand.randint(3, 20))
+        for _ in range(self._poisson(self.emoji_density)):
+            parts.insert(rand.randrange(len(parts) + 1), rand.choice(EMOJIS))
+        for _ in range(self._poisson(self.mention_density)):
+            mentioned = rand.choices(self.usernames, cum_weights=self.user_weights)[0]
+            parts.insert(rand.randrange(len(parts) + 1), "@" + mentioned)
+        content = " ".join(parts)
+
+        return {
+            "url": f"https://twitter.com/{username}/status/{tweet_id}",
+            "date": timestamp,
+            "content": content,
+            "renderedContent": content,
+            "id": tweet_id,
+            "user": {
+                "username": username,
+                "displayname": username.replace("_", " ").title(),
+                "id": 1000000 + user,
+                "description": "Farmer life, {fields}: \"quoted\"",
+                "verified": False,
+                "followersCount": rand.randrange(10000),
+                "location": "Punjab, India",
+            },
+            "replyCount": rand.randrange(10),
+            "retweetCount": rand.randrange(100),
+            "likeCount": rand.randrange(1000),
+            "lang": "en",
+            "source": "<a href=\"http://twitter.com/download/android\">Twitter for Android</a>",
+            "quotedTweet": None,
+        }
+
+    def lines(self, count: int) -> Iterator[str]:
+        """Yield `count` JSON lines, including malformed ones."""
+        for tweet_id in range(count):
+            line = json.dumps(self.tweet(tweet_id), ensure_ascii=False)
+            if self.random.random() < self.malformed_rate:
+                line = line[: self.random.randrange(len(line))]
+            yield line
+
+    def write(self, out: TextIO, count: int) -> None:
+        for line in self.lines(count):
+            out.write(line)
+            out.write("\n")
+
+
+def generate(file_path: str, tweets: int, seed: int = 0, **options) -> str:
+    """
+    Write a synthetic tweet file.
+
+    :param file_path: Destination path.
+    :param tweets: Number of lines to write.
+    :param seed: Random seed.
+    :param options: Other TweetGenerator parameters.
+    :return: The destination path.
+    """
+    with open(file_path, "w", encoding="utf-8") as out:
+        TweetGenerator(seed, **options).write(out, tweets)
+    return file_path
@@ -0,0 +1,189 @@
+import heapq
+from collections import Counter, defaultdict
+from operator import itemgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+# Tie-breaking rules between keys with the same value:
+#   "first": the key seen first in the input wins (like Counter.most_common)
+#   "key": the smallest key wins
+TIE_BREAKS = ("first", "key")
+
+
+def top_k(
+    counts: Mapping[Hashable, int], k: int = 10, ties: str = "first"
+) -> List[Tuple[Hashable, int]]:
+    """
+    Select the k keys with the highest values, highest first.
+
+    Selection uses a bounded heap, so it costs O(n log k) rather than a full
+    sort of the n keys.
+
+    :param counts: Values by key, in order of first appearance for "first".
+    :param k: Number of keys to return.
+    :param ties: Tie-breaking rule, see TIE_BREAKS.
+    :return: A list of (key, value) pairs.
+    """
+    if ties == "first":
+        most_common = getattr(counts, "most_common", None)
+        if most_common is not None:
+            # Counter and CompactCounter select the same way, and the latter
+            # only decodes the selected keys
+            return most_common(k)
+        # nlargest is stable: equal values keep their input order
+        return heapq.nlargest(k, counts.items(), key=itemgetter(1))
+    if ties == "key":
+        return heapq.nsmallest(k, counts.items(), key=lambda item: (-item[1], item[0]))
+    raise ValueError(f"Unknown tie-breaking rule {ties!r}, expected one of {TIE_BREAKS}")
+
+
+class TopK:
+    """
+    Top-k aggregator over the engine record protocol: group every record by
+    the keys it yields, sum a value per key and keep the k largest.
+
+    Usage (top 100 most retweeted users):
+        TopK(
+            keys=lambda record: [record["user.username"]],
+            fields=("user.username", "retweetCount"),
+            value=lambda record: record["retweetCount"] or 0,
+            k=100,
+        )
+
+    Aggregators are pickled when used with parallel workers or checkpoints,
+    so `keys` and `value` should then be module-level functions.
+
+    :param keys: Returns the keys a record counts towards (possibly none).
+    :param fields: Dotted field paths the callables read from each record.
+    :param value: Returns the amount a record adds to each of its keys
+        (default is 1, i.e. counting).
+    :param k: Number of keys in the result.
+    :param ties: Tie-breaking rule, see TIE_BREAKS.
+    :param counter: Factory of the counter: Counter, or
+        compact_counter.CompactCounter for string keys.
+    """
+
+    def __init__(
+        self,
+        keys: Callable[[Dict[str, Any]], Iterable[Hashable]],
+        fields: Sequence[str],
+        value: Optional[Callable[[Dict[str, Any]], int]] = None,
+        k: int = 10,
+        ties: str = "first",
+        counter: Callable[[], Any] = Counter,
+    ):
+        if ties not in TIE_BREAKS:
+            raise ValueError(
+                f"Unknown tie-breaking rule {ties!r}, expected one of {TIE_BREAKS}"
+            )
+        self.keys = keys
+        self.fields = tuple(fields)
+        self.value = value
+        self.k = k
+        self.ties = ties
+        self.counts = counter()
+
+    def update(self, record: Dict[str, Any]) -> None:
+        keys = self.keys(record)
+        if not keys:
+            return
+        if self.value is None:
+            self.counts.update(keys)
+            return
+        amount = self.value(record)
+        counts = self.counts
+        if isinstance(counts, Counter):
+            for key in keys:
+                counts[key] += amount
+        else:
+            for key in keys:
+                counts.add(key, amount)
+
+    def merge(self, other: "TopK") -> None:
+        self.counts.update(other.counts)
+
+    def result(self) -> List[Tuple[Hashable, int]]:
+        return top_k(self.counts, self.k, self.ties)
+
+
+class GroupTopK:
+    """
+    Two-level top-k aggregator: the k groups with the most records and, for
+    each of them, the items with the most records in that group.
+
+    :param group_item: Returns the (group, item) pair of a record, or None to
+        ignore it. May be None when pairs are only fed through `add`.
+    :param fields: Dotted field paths `group_item` reads from each record.
+    :param k: Number of groups in the result.
+    :param per_group: Number of items kept for each group.
+    :param ties: Tie-breaking rule for both groups and items, see TIE_BREAKS.
+    :param counter: Factory of the per-group item counters: Counter, or
+        compact_counter.CompactCounter for string items.
+    """
+
+    def __init__(
+        self,
+        group_item: Optional[
+            Callable[[Dict[str, Any]], Optional[Tuple[Hashable, Hashable]]]
+        ],
+        fields: Sequence[str],
+        k: int = 10,
+        per_group: int = 1,
+        ties: str = "first",
+        counter: Callable[[], Any] = Counter,
+    ):
+        if ties not in TIE_BREAKS:
+            raise ValueError(
+                f"Unknown tie-breaking rule {ties!r}, expected one of {TIE_BREAKS}"
+            )
+        self.group_item = group_item
+        self.fields = tuple(fields)
+        self.k = k
+        self.per_group = per_group
+        self.ties = ties
+        self.totals = Counter()
+        self.groups = defaultdict(counter)
+        # CompactCounter counts through add(), Counter through item assignment
+        # (checked on an instance, as the factory may be a functools.partial)
+        self._counter_add = hasattr(counter(), "add")
+
+    def add(self, group: Hashable, item: Hashable, count: int = 1) -> None:
+        self.totals[group] += count
+        if self._counter_add:
+            self.groups[group].add(item, count)
+        else:
+            self.groups[group][item] += count
+
+    def update(self, record: Dict[str, Any]) -> None:
+        pair = self.group_item(record)
+        if pair is not None:
+            group, item = pair
+            self.totals[group] += 1
+            if self._counter_add:
+                self.groups[group].add(item)
+            else:
+                self.groups[group][item] += 1
+
+    def merge(self, other: "GroupTopK") -> None:
+        self.totals.update(other.totals)
+        for group, items in other.groups.items():
+            self.groups[group].update(items)
+
+    def result(self) -> List[Tuple[Hashable, List[Tuple[Hashable, int]]]]:
+        """
+        Return (group, [(item, count), ...]) pairs, most frequent group first.
+        """
+        return [
+            (group, top_k(self.groups[group], self.per_group, self.ties))
+            for group, _ in top_k(self.totals, self.k, self.ties)
+        ]
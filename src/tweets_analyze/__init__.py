@@ -0,0 +1,29 @@
+import importlib
+
+from tweets_analyze.queries import QUESTIONS, VARIANTS, load, run
+
+# Public functions and classes of the query modules, by module. They are
+# imported on first use, so that importing the package (and starting the
+# command line tool) stays cheap.
+_EXPORTS = {
+    "q1_time": "q1_time",
+    "q2_time": "q2_time",
+    "q3_time": "q3_time",
+    "q1_memory": "q1_memory",
+    "q2_memory": "q2_memory",
+    "q3_memory": "q3_memory",
+    "q_all": "engine",
+    "scan": "engine",
+    "ScanStats": "stats",
+    "LineValidator": "validation",
+    "ResultCache": "result_cache",
+    "cached": "result_cache",
+}
+
+__all__ = ["QUESTIONS", "VARIANTS", "load", "run", *_EXPORTS]
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,5 @@
+import sys
+
+from tweets_analyze.cli import main
+
+sys.exit(main())
@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import argparse
+from typing import Any, Dict, List, Optional, Sequence
+
+from tweets_analyze.queries import ANALYSES, QUESTIONS, VARIANTS, run, to_jsonable
+from tweets_analyze.server import SOCKET_ENV, request, serve
+
+# Arguments forwarded to the query functions when given
+OPTIONS = ("k", "timezone", "validation", "max_memory_mb", "workers", "approximate")
+
+
+def _validation(value: str) -> str:
+    if value in ("skip", "count", "fail"):
+        return value
+    policy, _, path = value.partition(":")
+    if policy != "quarantine" or not path:
+        raise argparse.ArgumentTypeError(
+            f"expected skip, count, fail or quarantine:PATH, got {value!r}"
+        )
+    # Absolute, so that a server with another working directory writes it here
+    return f"quarantine:{os.path.abspath(path)}"
+
+
+def _query_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="tweets-analyze",
+        usage="%(prog)s [options] QUESTION... FILE...",
+        description=(
+            "Answer q1 (top dates and their most active user), q2 (top emojis) "
+            "and q3 (top mentioned users) about a JSON lines file of tweets, "
+            "as well as the top hashtags, URL domains and co-mentioned user "
+            "pairs (hashtags, domains, co_mentions). "
+            "Run `tweets-analyze serve` to keep a warm server that later "
+            "invocations send their queries to."
+        ),
+    )
+    parser.add_argument(
+        "arguments",
+        nargs="+",
+        metavar="QUESTION|FILE",
+        help="questions to answer (q1, q2, q3, hashtags, domains, co_mentions), "
+        "then the input files; several "
+        "files, a directory or a glob pattern are scanned as one input",
+    )
+    parser.add_argument(
+        "--variant",
+        choices=list(dict.fromkeys(variant for variants in VARIANTS.values() for variant in variants)),
+        default="time",
+    )
+    parser.add_argument("-k", type=int, default=None, help="number of results (default 10)")
+    parser.add_argument(
+        "--timezone",
+        help="count q1 days in this time zone (UTC, America/Santiago, or an "
+        "offset given as --timezone=-03:00)",
+    )
+    parser.add_argument(
+        "--validation",
+        type=_validation,
+        metavar="{skip,count,fail,quarantine:PATH}",
+        help="what to do with malformed lines (default skip); quarantine "
+        "appends them to PATH",
+    )
+    parser.add_argument("--max-memory-mb", type=float, help="approximate memory budget of the counts, in MB")
+    parser.add_argument("--workers", type=int, help="worker processes (parallel variants)")
+    parser.add_argument(
+        "--approximate",
+        action="store_true",
+        default=None,
+        help="bounded-memory approximate counts (memory variant of q2 and q3)",
+    )
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument(
+        "--socket",
+        default=os.environ.get(SOCKET_ENV),
+        help=f"socket of a running server (default ${SOCKET_ENV}); the query "
+        "runs in this process when no server is listening",
+    )
+    return parser
+
+
+def _serve_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="tweets-analyze serve",
+        description="Answer queries over a Unix socket, keeping the query "
+        "modules loaded between requests.",
+    )
+    parser.add_argument(
+        "--socket", default=os.environ.get(SOCKET_ENV), help=f"default ${SOCKET_ENV}"
+    )
+    parser.add_argument(
+        "--result-cache",
+        action="store_true",
+        help="serve repeated queries from the on-disk result cache",
+    )
+    parser.add_argument("--stop", action="store_true", help="stop the server listening on the socket")
+    return parser
+
+
+def _split_arguments(
+    parser: argparse.ArgumentParser, arguments: Sequence[str]
+) -> tuple:
+    questions = []
+    for argument in arguments:
+        if argument not in QUESTIONS and argument not in ANALYSES:
+            break
+        questions.append(argument)
+    files = list(arguments[len(questions) :])
+    if not questions:
+        parser.error("expected at least one question (e.g. q1, q2, q3) before the files")
+    if not files:
+        parser.error("expected at least one input file")
+    return questions, files
+
+
+def _print_results(results: Dict[str, list], as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    for question, rows in results.items():
+        print(question)
+        for row in rows:
+            # co_mentions rows start with a pair of users
+            print(
+                "  "
+                + "\t".join(
+                    " ".join(value) if isinstance(value, (list, tuple)) else str(value)
+                    for value in row
+                )
+            )
+
+
+def _run_local(
+    questions: List[str], source: Any, variant: str, options: Dict[str, Any]
+) -> Dict[str, list]:
+    results = run(questions, source, variant, **options)
+    return {question: to_jsonable(result) for question, result in results.items()}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    if argv[:1] == ["serve"]:
+        parser = _serve_parser()
+        args = parser.parse_args(argv[1:])
+        if args.socket is None:
+            parser.error(f"--socket or ${SOCKET_ENV} is required")
+        if args.stop:
+            try:
+                request(args.socket, {"command": "shutdown"})
+            except OSError as e:
+                print(f"No server listening on {args.socket}: {e}", file=sys.stderr)
+                return 1
+            return 0
+        try:
+            serve(args.socket, args.result_cache)
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    parser = _query_parser()
+    # Options may come between the questions and the files
+    args = parser.parse_intermixed_args(argv)
+    questions, files = _split_arguments(parser, args.arguments)
+
+    # Absolute paths, so that a server with another working directory finds them
+    files = [os.path.abspath(path) for path in files]
+    source = files[0] if len(files) == 1 else files
+    options = {name: getattr(args, name) for name in OPTIONS if getattr(args, name) is not None}
+
+    response = None
+    if args.socket:
+        payload = {
+            "questions": questions,
+            "source": source,
+            "variant": args.variant,
+            "options": options,
+        }
+        try:
+            response = request(args.socket, payload)
+        except OSError:
+            # No server listening: answer in this process
+            response = None
+
+    if response is None:
+        try:
+            results = _run_local(questions, source, args.variant, options)
+        except ValueError as e:
+            parser.error(str(e))
+        except OSError as e:
+            # The baselines let I/O errors propagate
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    elif "error" in response:
+        print(f"Error: {response['error']}", file=sys.stderr)
+        return 1
+    else:
+        sys.stdout.write(response["output"])
+        results = response["results"]
+
+    _print_results(results, args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import datetime
+import importlib
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+QUESTIONS = ("q1", "q2", "q3")
+
+# Further analyses, only answered by the time variant (see engine.ANALYSES)
+ANALYSES = ("hashtags", "domains", "co_mentions")
+
+# Implementations of each question, as "module:function". The modules are
+# only imported when needed, so the client side of the command line tool
+# starts quickly
+VARIANTS = {
+    "q1": {
+        "baseline": "q1_baseline:q1_baseline",
+        "time": "q1_time:q1_time",
+        "memory": "q1_memory:q1_memory",
+        "numpy": "q1_numpy:q1_numpy",
+        "parallel": "parallel:q1_parallel",
+        "pipeline": "pipeline:q1_pipeline",
+    },
+    "q2": {
+        "baseline": "q2_baseline:q2_baseline",
+        "time": "q2_time:q2_time",
+        "memory": "q2_memory:q2_memory",
+        "parallel": "parallel:q2_parallel",
+        "pipeline": "pipeline:q2_pipeline",
+    },
+    "q3": {
+        "baseline": "q3_baseline:q3_baseline",
+        "time": "q3_time:q3_time",
+        "memory": "q3_memory:q3_memory",
+        "parallel": "parallel:q3_parallel",
+        "pipeline": "pipeline:q3_pipeline",
+        "handles": "mentions:q3_handles",
+    },
+}
+
+# Options engine.q_all accepts, so several questions of the time variant can
+# be answered with a single scan
+Q_ALL_OPTIONS = ("k", "validation")
+
+
+def load(question: str, variant: str = "time") -> Callable:
+    """
+    Import and return the function answering a question with a variant.
+
+    :raises ValueError: If the question or the variant is unknown.
+    """
+    if question in ANALYSES:
+        raise ValueError(f"{question} is only answered by run() with the time variant")
+    if question not in VARIANTS:
+        raise ValueError(f"Unknown question {question!r}, expected one of {QUESTIONS}")
+    if variant not in VARIANTS[question]:
+        raise ValueError(
+            f"No {variant!r} variant of {question}, "
+            f"expected one of {tuple(VARIANTS[question])}"
+        )
+    module, function = VARIANTS[question][variant].split(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def warm_up() -> None:
+    """Import every variant, compiling their patterns and tables."""
+    for variants in VARIANTS.values():
+        for spec in variants.values():
+            module = spec.split(":")[0]
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                # Optional dependency (e.g. numpy) not installed
+                pass
+    importlib.import_module("engine")
+
+
+def run(
+    questions: Sequence[str],
+    source: Union[str, Sequence[str]],
+    variant: str = "time",
+    cache: Optional[Any] = None,
+    **options: Any,
+) -> Dict[str, list]:
+    """
+    Answer several questions about the same input.
+
+    Several questions of the "time" variant, and the ANALYSES, are answered
+    with a single scan (see engine.q_all) when only `Q_ALL_OPTIONS` are
+    given. Otherwise every
+    question is answered by its own function, which gets the options its
+    signature accepts (e.g. `timezone` only goes to q1).
+
+    :param questions: Questions to answer ("q1", "q2", "q3", or ANALYSES).
+    :param source: A file, or for the time variant also a directory, glob
+        pattern or list of shard files.
+    :param variant: Implementation to use (see VARIANTS).
+    :param cache: A result_cache.ResultCache to serve the results from.
+    :param options: Keyword arguments of the query functions.
+    :return: The result of each question, in the order requested.
+    :raises ValueError: If a question, variant or option is not supported.
+    """
+    # Imported here: inspect takes longer to import than a query to a server
+    import inspect
+
+    questions = list(dict.fromkeys(questions))
+    if any(question in ANALYSES for question in questions):
+        if variant != "time" or not set(options) <= set(Q_ALL_OPTIONS):
+            raise ValueError(
+                f"{', '.join(ANALYSES)} are only answered by the time variant, "
+                f"with the options {', '.join(Q_ALL_OPTIONS)}"
+            )
+        return _run_q_all(questions, source, cache, options)
+
+    functions = {question: load(question, variant) for question in questions}
+
+    parameters = {
+        question: inspect.signature(function).parameters
+        for question, function in functions.items()
+    }
+    for name in options:
+        if not any(name in accepted for accepted in parameters.values()):
+            raise ValueError(
+                f"Option {name!r} is not supported by the {variant} variant of "
+                + ", ".join(questions)
+            )
+
+    if variant == "time" and len(questions) > 1 and set(options) <= set(Q_ALL_OPTIONS):
+        return _run_q_all(questions, source, cache, options)
+
+    results = {}
+    for question, function in functions.items():
+        kwargs = {
+            name: value
+            for name, value in options.items()
+            if name in parameters[question]
+        }
+        if cache is not None:
+            results[question] = cache.call(function, source, **kwargs)
+        else:
+            results[question] = function(source, **kwargs)
+    return results
+
+
+def _run_q_all(
+    questions: Sequence[str],
+    source: Union[str, Sequence[str]],
+    cache: Optional[Any],
+    options: Dict[str, Any],
+) -> Dict[str, list]:
+    # Imported here: the engine imports every query module
+    from engine import q_all
+
+    if cache is not None:
+        return cache.call(q_all, source, analyses=questions, **options)
+    return q_all(source, analyses=questions, **options)
+
+
+def to_jsonable(result: list) -> list:
+    """
+    Convert a query result into JSON types: dates become "YYYY-MM-DD"
+    strings and tuples (including sketches.Estimate) become lists.
+    """
+    return [
+        [value.isoformat() if isinstance(value, datetime.date) else value for value in row]
+        for row in result
+    ]
@@ -0,0 +1,153 @@
+import io
+import os
+import json
+import socket
+import threading
+import contextlib
+import socketserver
+from typing import Any, Dict, Optional
+
+from tweets_analyze.queries import run, to_jsonable, warm_up
+
+# Environment variable naming the socket of a running server; the command
+# line tool sends its queries there when it is set
+SOCKET_ENV = "TWEETS_ANALYZE_SOCKET"
+
+# Seconds a client waits for a server to accept its connection
+CONNECT_TIMEOUT = 1.0
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """
+    Answer one request per connection. A request is one line of JSON:
+
+        {"questions": ["q1", "q2"], "source": "tweets.json",
+         "variant": "time", "options": {"k": 10}}
+
+    and the response one line of JSON, with the results of every question
+    (see queries.to_jsonable) and what the queries printed:
+
+        {"results": {"q1": [...], "q2": [...]}, "output": ""}
+
+    A failed request gets {"error": "message"} instead. The requests
+    {"command": "ping"} and {"command": "shutdown"} check and stop the
+    server.
+    """
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            # A connection only checking that the server is listening
+            return
+        try:
+            request = json.loads(line)
+            response = self.server.answer(request)
+        except Exception as e:
+            response = {"error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class QueryServer(socketserver.UnixStreamServer):
+    """
+    Long-lived local server answering queries over a Unix socket.
+
+    Every query module is imported when the server starts, so requests skip
+    the interpreter start, the imports and the compilation of the patterns;
+    process-wide caches (such as the day keys of days.day_key) stay warm
+    between requests. Requests are answered one at a time: the queries are
+    CPU bound and the multi-process variants manage their own workers.
+
+    :param socket_path: Path of the socket to listen on; a stale socket
+        left by a previous server is replaced.
+    :param result_cache: Serve repeated queries from a
+        result_cache.ResultCache.
+    """
+
+    def __init__(self, socket_path: str, result_cache: bool = False):
+        warm_up()
+        self.cache = None
+        if result_cache:
+            # Imported here: the client side does not load the query modules
+            from result_cache import ResultCache
+
+            self.cache = ResultCache()
+
+        if os.path.exists(socket_path):
+            if _is_listening(socket_path):
+                raise OSError(f"A server is already listening on {socket_path}")
+            os.unlink(socket_path)
+        super().__init__(socket_path, QueryHandler)
+
+    def answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        command = request.get("command", "query")
+        if command == "ping":
+            return {"status": "ok", "pid": os.getpid()}
+        if command == "shutdown":
+            # shutdown() waits for serve_forever(), which runs this handler
+            threading.Thread(target=self.shutdown).start()
+            return {"status": "stopping"}
+        if command != "query":
+            raise ValueError(f"Unknown command {command!r}")
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            results = run(
+                request["questions"],
+                request["source"],
+                request.get("variant", "time"),
+                cache=self.cache,
+                **request.get("options", {}),
+            )
+        return {
+            "results": {question: to_jsonable(result) for question, result in results.items()},
+            "output": output.getvalue(),
+        }
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(OSError):
+            os.unlink(self.server_address)
+
+
+def serve(socket_path: str, result_cache: bool = False) -> None:
+    """
+    Run a QueryServer until it is sent a shutdown request or interrupted.
+    """
+    with QueryServer(socket_path, result_cache) as server:
+        print(f"Listening on {socket_path} (pid {os.getpid()})", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def request(
+    socket_path: str, payload: Dict[str, Any], timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Send one request to a QueryServer and return its response.
+
+    :param timeout: Seconds to wait for the response (default is no limit).
+    :raises OSError: If no server is listening on the socket.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(CONNECT_TIMEOUT)
+        client.connect(socket_path)
+        client.settimeout(timeout)
+        client.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+        with client.makefile("rb") as response:
+            line = response.readline()
+    if not line:
+        raise ConnectionError(f"No response from {socket_path}")
+    return json.loads(line)
+
+
+def _is_listening(socket_path: str) -> bool:
+    # A busy server still accepts connections (into its backlog)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(CONNECT_TIMEOUT)
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return False
+    return True
@@ -0,0 +1,174 @@
+from collections import Counter
+from typing import Optional, Union
+
+# What to do with lines that cannot be used:
+#   skip: ignore them (the default; costs nothing)
+#   count: count them by reason
+#   quarantine: count them and append them to a file; given by name as
+#     "quarantine:PATH"
+#   fail: raise MalformedLineError on the first one
+POLICIES = ("skip", "count", "quarantine", "fail")
+
+# Reasons a line is rejected, as also reported by stats.ScanStats
+#   invalid_json: the line is not valid JSON
+#   not_an_object: the line is valid JSON but not an object
+#   missing_field: a field the query needs is missing or malformed
+REASONS = ("invalid_json", "not_an_object", "missing_field")
+
+# Quarantined lines are written in batches of this many lines
+QUARANTINE_BATCH = 1024
+
+
+class MalformedLineError(Exception):
+    """
+    Raised by the "fail" policy on the first line that cannot be used.
+
+    `offset` is the byte offset of the line in the file. Offsets of
+    compressed input do not point into the file, so reader.LineReader
+    replaces them with the 1-based `line_number` instead.
+    """
+
+    def __init__(
+        self,
+        reason: str,
+        offset: Optional[int],
+        line: bytes,
+        line_number: Optional[int] = None,
+    ):
+        super().__init__(reason, offset, line, line_number)
+        self.reason = reason
+        self.offset = offset
+        self.line = line
+        self.line_number = line_number
+
+    def __str__(self) -> str:
+        if self.offset is None:
+            return f"Malformed line {self.line_number}: {self.reason}"
+        return f"Malformed line at byte offset {self.offset}: {self.reason}"
+
+
+class LineValidator:
+    """
+    Policy for the lines of a scan that cannot be used.
+
+    The scans classify lines by the outcome of extracting their fields, so
+    clean lines pay nothing for validation and bad lines cost a counter
+    update instead of a print. Pass an instance as the `validation`
+    argument of the query functions (or engine.scan) and read `summary()`
+    afterwards; one instance can be shared by several scans.
+
+    :param policy: One of POLICIES.
+    :param quarantine_path: File the "quarantine" policy appends bad lines
+        to, one per line.
+    :param batch_size: Quarantined lines buffered between writes.
+    """
+
+    def __init__(
+        self,
+        policy: str = "count",
+        quarantine_path: Optional[str] = None,
+        batch_size: int = QUARANTINE_BATCH,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}")
+        if policy == "quarantine" and quarantine_path is None:
+            raise ValueError(
+                "The quarantine policy needs a quarantine_path "
+                "(quarantine:PATH when given by name)"
+            )
+        self.policy = policy
+        self.quarantine_path = quarantine_path
+        self.batch_size = batch_size
+        self.counts = Counter()
+        self.quarantined = 0
+        self._pending = []
+
+    def reject(self, reason: str, buffer: bytes, start: int, end: int) -> None:
+        """
+        Handle one bad line, given as a span of a buffer.
+
+        :raises MalformedLineError: With the "fail" policy.
+        """
+        if self.policy == "skip":
+            return
+        if self.policy == "fail":
+            raise MalformedLineError(reason, start, bytes(buffer[start:end]))
+        self.counts[reason] += 1
+        if self.policy == "quarantine":
+            self._pending.append(buffer[start:end])
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write the pending quarantined lines."""
+        if not self._pending:
+            return
+        with open(self.quarantine_path, "ab") as file:
+            file.write(b"\n".join(self._pending) + b"\n")
+        self.quarantined += len(self._pending)
+        self._pending.clear()
+
+    @property
+    def rejected(self) -> int:
+        return sum(self.counts.values())
+
+    def summary(self) -> dict:
+        self.flush()
+        return {
+            "policy": self.policy,
+            "rejected": self.rejected,
+            "reasons": dict(self.counts),
+            "quarantined": self.quarantined,
+            "quarantine_path": self.quarantine_path,
+        }
+
+    def describe(self) -> str:
+        reasons = ", ".join(
+            f"{reason}: {count}" for reason, count in sorted(self.counts.items())
+        )
+        return f"Skipped {self.rejected} malformed lines ({reasons})"
+
+    def __repr__(self) -> str:
+        return f"LineValidator(policy={self.policy}, counts={dict(self.counts)})"
+
+
+def resolve_validator(
+    validation: Optional[Union[str, LineValidator]],
+) -> Optional[LineValidator]:
+    """
+    Turn a `validation` argument (None, a policy name, "quarantine:PATH" or
+    a LineValidator) into a validator, or None when bad lines are simply
+    skipped.
+
+    :raises ValueError: If the policy is unknown, or "quarantine" is given
+        without a path.
+    """
+    if validation is None or validation == "skip":
+        return None
+    if isinstance(validation, LineValidator):
+        return validation
+    policy, separator, quarantine_path = validation.partition(":")
+    if policy == "quarantine" and quarantine_path:
+        return LineValidator(policy, quarantine_path)
+    if separator:
+        raise ValueError(
+            f"Unknown policy {validation!r}, only quarantine takes a path "
+            "(quarantine:PATH)"
+        )
+    return LineValidator(validation)
+
+
+def finish(
+    validator: Optional[LineValidator],
+    validation: Optional[Union[str, LineValidator]],
+) -> None:
+    """
+    Flush a validator at the end of a scan. A validator created from a
+    policy name cannot be read by the caller, so its summary is printed
+    once instead.
+    """
+    if validator is None:
+        return
+    validator.flush()
+    if validator is not validation and validator.rejected:
+        print(validator.describe())
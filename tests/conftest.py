@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from synthetic import generate
+
+# Single code point emojis, matched the same way by q2_baseline and the
+# sequence-aware tokenizer
+EMOJIS = (
+    "\U0001F64F", "\U0001F602", "\U0001F525", "\U0001F33E", "\U0001F621",
+    "\U0001F69C", "\U0001F440", "\U0001F4AA", "\U0001F389", "\U0001F914",
+    "\U0001F60D", "\U0001F62D", "\U0001F64C", "\U0001F44F",
+)
+
+DATES = [f"2021-02-{day:02d}" for day in range(1, 15)]
+USERS = [f"user_{name}" for name in "abcdefghi"]
+MENTIONED = [f"handle_{i}" for i in range(14)]
+
+
+def tweet(date: str, username: str, content: str) -> dict:
+    return {
+        "date": f"{date}T12:00:00+00:00",
+        "content": content,
+        "user": {"username": username},
+    }
+
+
+def write_tweets(path, tweets) -> str:
+    with open(path, "w", encoding="utf-8") as file:
+        for item in tweets:
+            line = item if isinstance(item, str) else json.dumps(item, ensure_ascii=False)
+            file.write(line + "\n")
+    return str(path)
+
+
+def tie_tweets() -> list:
+    """
+    Tweets where almost every count is tied: 14 dates, emojis and mentioned
+    users occurring 3 times each (first seen in an order unrelated to their
+    sort order), and 3 users tweeting once on every date, so the top 10 cut
+    and every "most active user" are decided by the tie-breaking rule. Two
+    dates, an emoji and a handle get one extra occurrence.
+    """
+    tweets = []
+    for round_ in range(3):
+        for j in range(14):
+            tweets.append(
+                tweet(
+                    DATES[(j * 5) % 14],
+                    USERS[(j + round_ * 4) % 9],
+                    f"{EMOJIS[(j * 3 + round_) % 14]} hello "
+                    f"@{MENTIONED[(j * 9 + round_) % 14]}",
+                )
+            )
+    tweets.append(tweet(DATES[13], USERS[8], f"extra {EMOJIS[12]} @{MENTIONED[6]}"))
+    tweets.append(tweet(DATES[6], USERS[7], "no emoji nor mention"))
+    return tweets
+
+
+@pytest.fixture(scope="session")
+def ties_file(tmp_path_factory) -> str:
+    return write_tweets(tmp_path_factory.mktemp("data") / "ties.json", tie_tweets())
+
+
+@pytest.fixture(scope="session")
+def synthetic_file(tmp_path_factory) -> str:
+    """Seeded synthetic tweets with emoji sequences and malformed lines."""
+    path = tmp_path_factory.mktemp("data") / "synthetic.json"
+    return generate(str(path), 3000, seed=7, days=12, users=40, malformed_rate=0.01)
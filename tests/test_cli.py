@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import threading
+import subprocess
+
+import pytest
+
+from tweets_analyze import cli
+from tweets_analyze.queries import run, to_jsonable
+from tweets_analyze.server import SOCKET_ENV, QueryServer, request
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+
+
+def expected_json(questions, source, variant="time", **options) -> dict:
+    results = run(questions, source, variant, **options)
+    return {question: to_jsonable(result) for question, result in results.items()}
+
+
+def cli_json(capsys, argv) -> dict:
+    assert cli.main(argv + ["--json"]) == 0
+    return json.loads(capsys.readouterr().out)
+
+
+@pytest.fixture(autouse=True)
+def no_default_socket(monkeypatch):
+    # A server named by the environment would answer the local runs
+    monkeypatch.delenv(SOCKET_ENV, raising=False)
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = str(tmp_path / "query.sock")
+    query_server = QueryServer(socket_path)
+    thread = threading.Thread(target=query_server.serve_forever, daemon=True)
+    thread.start()
+    yield socket_path
+    query_server.shutdown()
+    query_server.server_close()
+    thread.join()
+
+
+def test_cli_json(capsys, ties_file):
+    assert cli_json(capsys, ["q1", "q2", "q3", ties_file]) == expected_json(
+        ["q1", "q2", "q3"], ties_file
+    )
+
+
+def test_cli_options_between_questions_and_files(capsys, synthetic_file):
+    assert cli_json(
+        capsys, ["q2", "--variant", "memory", "-k", "3", synthetic_file]
+    ) == expected_json(["q2"], synthetic_file, "memory", k=3)
+
+
+def test_cli_without_a_question_is_a_usage_error(ties_file):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main([ties_file])
+    assert exit_info.value.code == 2
+
+
+def test_server_round_trip(server, ties_file, synthetic_file):
+    assert request(server, {"command": "ping"})["status"] == "ok"
+    for source in (ties_file, synthetic_file):
+        response = request(
+            server, {"questions": ["q1", "q2", "q3"], "source": source, "variant": "time"}
+        )
+        assert response["results"] == expected_json(["q1", "q2", "q3"], source)
+        assert response["output"] == ""
+
+
+def test_server_reports_bad_requests(server, ties_file):
+    assert "error" in request(server, {"command": "reboot"})
+    response = request(server, {"questions": ["q9"], "source": ties_file})
+    assert "error" in response
+
+
+def test_server_relays_query_output(server, tmp_path):
+    missing = str(tmp_path / "missing.json")
+    response = request(server, {"questions": ["q3"], "source": missing})
+    assert response["results"] == {"q3": []}
+    assert "File not found" in response["output"]
+
+
+def test_cli_through_the_server(capsys, server, ties_file):
+    argv = ["q1", "q3", ties_file, "--socket", server]
+    assert cli_json(capsys, argv) == expected_json(["q1", "q3"], ties_file)
+
+
+def test_cli_without_a_listening_server_runs_locally(capsys, tmp_path, ties_file):
+    argv = ["q2", ties_file, "--socket", str(tmp_path / "nobody.sock")]
+    assert cli_json(capsys, argv) == expected_json(["q2"], ties_file)
+
+
+def test_server_shutdown(tmp_path):
+    socket_path = str(tmp_path / "stop.sock")
+    query_server = QueryServer(socket_path)
+    thread = threading.Thread(target=query_server.serve_forever, daemon=True)
+    thread.start()
+    assert cli.main(["serve", "--socket", socket_path, "--stop"]) == 0
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    query_server.server_close()
+    assert not os.path.exists(socket_path)
+
+
+def test_module_entry_point(ties_file):
+    environment = dict(os.environ, PYTHONPATH=SRC)
+    completed = subprocess.run(
+        [sys.executable, "-m", "tweets_analyze", "q2", "q3", ties_file, "--json"],
+        capture_output=True,
+        text=True,
+        env=environment,
+        check=True,
+    )
+    assert json.loads(completed.stdout) == expected_json(["q2", "q3"], ties_file)
@@ -0,0 +1,52 @@
+import pytest
+
+from emojis import extract_emojis
+from q2_time import q2_time
+from conftest import tweet, write_tweets
+
+WOMAN_TECHNOLOGIST = "\U0001F469\U0001F3FD‍\U0001F4BB"
+FAMILY = "\U0001F468‍\U0001F469‍\U0001F467"
+ENGLAND = "\U0001F3F4\U000E0067\U000E0062\U000E0065\U000E006E\U000E0067\U000E007F"
+INDIA, CHILE = "\U0001F1EE\U0001F1F3", "\U0001F1E8\U0001F1F1"
+THUMBS_UP_DARK = "\U0001F44D\U0001F3FF"
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("\U0001F64F\U0001F64F\U0001F64F", ["\U0001F64F"] * 3),
+        (f"coding {WOMAN_TECHNOLOGIST}!", [WOMAN_TECHNOLOGIST]),
+        (FAMILY, [FAMILY]),
+        (f"{INDIA}{CHILE}", [INDIA, CHILE]),
+        (f"go {ENGLAND} go", [ENGLAND]),
+        (f"{THUMBS_UP_DARK}\U0001F44D", [THUMBS_UP_DARK, "\U0001F44D"]),
+        # Keycaps, with or without VS16, are normalized without it
+        ("1️⃣ 2⃣ #️⃣", ["1⃣", "2⃣", "#⃣"]),
+        # VS16 is dropped; a text-default character alone is not an emoji
+        ("❤️", ["❤"]),
+        ("❤", []),
+        ("\U0001F600 \U0001F600️", ["\U0001F600", "\U0001F600"]),
+        # VS15 asks for text presentation
+        ("\U0001F600︎", []),
+        ("no emojis, 1 2 # * ©", []),
+    ],
+)
+def test_extract_emojis(text, expected):
+    assert extract_emojis(text) == expected
+
+
+def test_q2_counts_sequences_whole(tmp_path):
+    file_path = write_tweets(
+        tmp_path / "sequences.json",
+        [
+            tweet("2021-02-01", "a", f"{WOMAN_TECHNOLOGIST} {FAMILY}"),
+            tweet("2021-02-01", "b", f"{FAMILY}{INDIA}"),
+            tweet("2021-02-02", "c", f"{INDIA} ❤️ {FAMILY}"),
+        ],
+    )
+    assert q2_time(file_path) == [
+        (FAMILY, 3),
+        (INDIA, 2),
+        (WOMAN_TECHNOLOGIST, 1),
+        ("❤", 1),
+    ]
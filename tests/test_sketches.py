@@ -0,0 +1,101 @@
+import random
+from collections import Counter
+
+import pytest
+
+from q2_memory import q2_memory
+from q2_time import q2_time
+from q3_memory import q3_memory
+from q3_time import q3_time
+from sketches import CountMinSketch, HeavyHitters, SpaceSaving
+
+
+def zipf_stream(size: int, distinct: int, seed: int) -> list:
+    rand = random.Random(seed)
+    weights = [1 / rank for rank in range(1, distinct + 1)]
+    return rand.choices([f"item_{i}" for i in range(distinct)], weights, k=size)
+
+
+@pytest.fixture(scope="module")
+def stream() -> list:
+    return zipf_stream(20000, 2000, seed=3)
+
+
+def test_count_min_error_bound(stream):
+    epsilon, delta = 0.01, 0.01
+    sketch = CountMinSketch(epsilon, delta)
+    for item in stream:
+        sketch.add(item)
+    counts = Counter(stream)
+    assert sketch.total == len(stream)
+    errors = [sketch.estimate(item) - count for item, count in counts.items()]
+    # Never underestimates; overestimates by more than epsilon * total with
+    # probability at most delta
+    assert min(errors) >= 0
+    assert sum(error > epsilon * len(stream) for error in errors) <= delta * len(counts)
+    assert sketch.estimate("never seen") <= epsilon * len(stream)
+
+
+def test_count_min_merge_equals_one_sketch(stream):
+    whole, first, second = (CountMinSketch(0.01, 0.01) for _ in range(3))
+    half = len(stream) // 2
+    for item in stream:
+        whole.add(item)
+    for item in stream[:half]:
+        first.add(item)
+    for item in stream[half:]:
+        second.add(item)
+    first.merge(second)
+    assert first.table == whole.table
+    assert first.total == whole.total
+
+
+def assert_intervals_hold(estimates, counts):
+    assert estimates
+    for estimate in estimates:
+        assert estimate.lower <= counts[estimate.item] <= estimate.upper
+        assert estimate.lower <= estimate.count <= estimate.upper
+
+
+@pytest.mark.parametrize("capacity", [10, 100, 5000])
+def test_space_saving_intervals(stream, capacity):
+    summary = SpaceSaving(capacity)
+    summary.update(stream)
+    counts = Counter(stream)
+    top = summary.top(10)
+    assert_intervals_hold(top, counts)
+    if capacity >= len(counts):
+        # Every item is monitored: the counts are exact
+        assert [(e.item, e.count) for e in top] == counts.most_common(10)
+
+
+def test_space_saving_merge_intervals(stream):
+    first, second = SpaceSaving(50), SpaceSaving(50)
+    half = len(stream) // 2
+    first.update(stream[:half])
+    second.update(stream[half:])
+    first.merge(second)
+    assert_intervals_hold(first.top(10), Counter(stream))
+
+
+@pytest.mark.parametrize("epsilon", [0, 0.001])
+def test_heavy_hitters_intervals(stream, epsilon):
+    hitters = HeavyHitters(capacity=50, epsilon=epsilon, delta=0.01)
+    hitters.update(stream)
+    counts = Counter(stream)
+    top = hitters.most_common(10)
+    assert_intervals_hold(top, counts)
+    # The heaviest items of a skewed stream are found
+    assert {e.item for e in top[:3]} == {item for item, _ in counts.most_common(3)}
+
+
+@pytest.mark.parametrize(
+    "memory_query, time_query", [(q2_memory, q2_time), (q3_memory, q3_time)]
+)
+def test_approximate_queries_bound_the_exact_counts(
+    synthetic_file, memory_query, time_query
+):
+    counts = Counter(dict(time_query(synthetic_file, k=10000)))
+    estimates = memory_query(synthetic_file, approximate=True, capacity=20)
+    assert len(estimates) == 10
+    assert_intervals_hold(estimates, counts)
@@ -0,0 +1,54 @@
+import random
+from collections import Counter
+
+import pytest
+
+from q1_memory import q1_memory
+from q1_time import q1_time
+from q2_memory import q2_memory
+from q2_time import q2_time
+from q3_memory import q3_memory
+from q3_time import q3_time
+from spill import SpillingCounter, entries_for_budget
+
+# Small enough for the counts of the test files to spill many times
+TINY_BUDGET_MB = 0.001
+
+
+def test_tiny_budget_spills():
+    assert entries_for_budget(TINY_BUDGET_MB) < 10
+
+
+@pytest.mark.parametrize("max_entries", [1, 2, 5, 64])
+def test_spilling_counter_matches_counter(max_entries):
+    rand = random.Random(max_entries)
+    keys = [f"key_{int(rand.paretovariate(0.8))}" for _ in range(3000)]
+    counter = SpillingCounter(max_entries)
+    counter.update(keys)
+    assert counter.spilled
+
+    first = {}
+    for position, key in enumerate(keys):
+        first.setdefault(key, position)
+    expected = [(key, count, first[key]) for key, count in sorted(Counter(keys).items())]
+    assert list(counter.items()) == expected
+
+
+def test_spilling_counter_most_common_breaks_ties_by_first_appearance():
+    keys = ["c", "a", "b", "a", "c", "d", "b"]
+    counter = SpillingCounter(2)
+    counter.update(keys)
+    assert counter.most_common(3) == Counter(keys).most_common(3)
+
+
+@pytest.mark.parametrize(
+    "memory_query, time_query",
+    [(q1_memory, q1_time), (q2_memory, q2_time), (q3_memory, q3_time)],
+)
+def test_memory_variants_at_a_tiny_budget(
+    ties_file, synthetic_file, memory_query, time_query
+):
+    for file_path in (ties_file, synthetic_file):
+        assert memory_query(file_path, max_memory_mb=TINY_BUDGET_MB) == time_query(
+            file_path
+        )
@@ -0,0 +1,56 @@
+import pytest
+
+from engine import q_all
+from tweets_analyze.queries import VARIANTS, load
+
+VARIANT_CASES = [
+    (question, variant)
+    for question, variants in VARIANTS.items()
+    for variant in variants
+    if variant != "baseline"
+]
+
+
+def answer(question: str, variant: str, file_path: str, **options) -> list:
+    if variant == "numpy":
+        pytest.importorskip("numpy")
+    if variant in ("parallel", "pipeline"):
+        options.setdefault("workers", 2)
+    return load(question, variant)(file_path, **options)
+
+
+@pytest.mark.parametrize("question, variant", VARIANT_CASES)
+def test_variants_match_baseline_on_ties(ties_file, question, variant):
+    expected = load(question, "baseline")(ties_file)
+    assert answer(question, variant, ties_file) == expected
+
+
+@pytest.mark.parametrize("question, variant", VARIANT_CASES)
+def test_variants_match_time_on_synthetic(synthetic_file, question, variant):
+    # The baselines fail on malformed lines, and q2_baseline splits emoji
+    # sequences; q3_handles follows Twitter's handle rules instead of \w+,
+    # which the synthetic usernames satisfy
+    expected = load(question, "time")(synthetic_file)
+    assert answer(question, variant, synthetic_file) == expected
+
+
+def test_ties_are_broken_by_first_appearance(ties_file):
+    q1 = load("q1")(ties_file)
+    # The two dates with an extra tweet, then the others, as first seen
+    assert [day.isoformat() for day, _ in q1[:3]] == [
+        "2021-02-07",
+        "2021-02-14",
+        "2021-02-01",
+    ]
+    # Every user tweeted once on each date: the first one wins
+    assert [user for _, user in q1[:3]] == ["user_e", "user_c", "user_a"]
+    assert load("q2")(ties_file)[0] == ("\U0001F64C", 4)
+    assert load("q3")(ties_file)[0] == ("handle_6", 4)
+
+
+def test_q_all_matches_separate_queries(ties_file, synthetic_file):
+    for file_path in (ties_file, synthetic_file):
+        results = q_all(file_path)
+        assert results == {
+            question: load(question)(file_path) for question in ("q1", "q2", "q3")
+        }